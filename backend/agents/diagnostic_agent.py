@@ -5,6 +5,7 @@ Provides intelligent diagnostic reasoning with tool calling
 
 import os
 import json
+import time
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -16,8 +17,7 @@ from langchain.agents.tool_calling_agent.base import create_tool_calling_agent
 from langchain.tools import Tool, StructuredTool
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain.callbacks import get_openai_callback
 
 # Import EKA-AI services
@@ -48,6 +48,31 @@ Rules:
 """
 
 
+class ProviderStatsHandler(BaseCallbackHandler):
+    """Records each LLM call of an agent run in the provider's router stats"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self._started: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, ok=True)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, ok=False)
+
+    def _finish(self, run_id, ok: bool):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.provider.stats.record(time.monotonic() - started, ok=ok)
+
+
 class DiagnosticAgent:
     """
     LangChain-powered diagnostic agent with tool calling
@@ -55,6 +80,8 @@ class DiagnosticAgent:
     
     def __init__(self):
         self.llm = None
+        self.llm_router = None
+        self.llm_provider = None
         self.agent = None
         self.agent_executor = None
         self.tools = []
@@ -64,32 +91,32 @@ class DiagnosticAgent:
         self._create_agent()
     
     def _initialize_llm(self):
-        """Initialize the language model"""
+        """Initialize the language model from the fastest healthy provider"""
         try:
-            # Try OpenAI first
-            if os.getenv("OPENAI_API_KEY"):
-                self.llm = ChatOpenAI(
-                    model="gpt-4o-mini",
-                    temperature=0.1,
-                    api_key=os.getenv("OPENAI_API_KEY")
-                )
-                logger.info("✅ OpenAI LLM initialized for agent")
-            
-            # Fallback to Gemini
-            elif os.getenv("GEMINI_API_KEY"):
-                self.llm = ChatGoogleGenerativeAI(
-                    model="gemini-2.0-flash",
-                    temperature=0.1,
-                    api_key=os.getenv("GEMINI_API_KEY")
-                )
-                logger.info("✅ Gemini LLM initialized for agent")
+            from services.llm_router import get_llm_router
+            self.llm_router = get_llm_router()
+            self.llm_provider, self.llm = self.llm_router.best_chat_model(temperature=0.1)
             
+            if self.llm_provider:
+                logger.info(f"✅ {self.llm_provider.key} LLM initialized for agent")
             else:
                 logger.warning("⚠️ No LLM API key available for agent")
                 
         except Exception as e:
             logger.error(f"❌ Failed to initialize LLM: {e}")
     
+    def _refresh_llm_if_degraded(self):
+        """Rebuild the agent on a different provider if the current one is unhealthy"""
+        if not self.llm_router or not self.llm_provider:
+            return
+        if self.llm_provider.stats.is_healthy():
+            return
+        provider, llm = self.llm_router.best_chat_model(temperature=0.1)
+        if provider and provider is not self.llm_provider:
+            logger.warning(f"⚠️ Agent LLM {self.llm_provider.key} degraded, switching to {provider.key}")
+            self.llm_provider, self.llm = provider, llm
+            self._create_agent()
+    
     def _setup_tools(self):
         """Define tools available to the agent"""
         
@@ -251,6 +278,8 @@ Pricing Guidance:
         Returns:
             Diagnostic result with root cause, confidence, and recommendations
         """
+        self._refresh_llm_if_degraded()
+        
         if not self.agent_executor:
             return {
                 "success": False,
@@ -285,12 +314,16 @@ Return structured response with clear reasoning.
                     else:
                         formatted_history.append(AIMessage(content=msg.get("content", "")))
             
-            # Execute with callback for token tracking
+            # Execute with callback for token tracking; each LLM call (not the
+            # whole run with its tool calls) feeds the router stats
             with get_openai_callback() as cb:
-                result = self.agent_executor.invoke({
-                    "input": input_text,
-                    "chat_history": formatted_history
-                })
+                result = self.agent_executor.invoke(
+                    {
+                        "input": input_text,
+                        "chat_history": formatted_history
+                    },
+                    config={"callbacks": [ProviderStatsHandler(self.llm_provider)]}
+                )
                 
                 logger.info(f"Agent tokens used: {cb.total_tokens}, Cost: ${cb.total_cost:.4f}")
             
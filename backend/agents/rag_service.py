@@ -9,8 +9,7 @@ from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
 from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_openai import OpenAIEmbeddings
 
 from llama_index.core import VectorStoreIndex, Document
 from llama_index.core.retrievers import VectorIndexRetriever
@@ -56,6 +55,7 @@ Response:"""
     
     def __init__(self):
         self.llm = None
+        self.llm_router = None
         self.embeddings = None
         self.prompt = PromptTemplate(
             template=self.RAG_PROMPT,
@@ -64,28 +64,21 @@ Response:"""
         self._initialize_llm()
     
     def _initialize_llm(self):
-        """Initialize LLM and embeddings"""
+        """Initialize LLM (via the shared latency-aware router) and embeddings"""
         try:
+            from services.llm_router import get_llm_router
+            self.llm_router = get_llm_router()
+            provider, self.llm = self.llm_router.best_chat_model(temperature=0.1)
+            
             if os.getenv("OPENAI_API_KEY"):
-                self.llm = ChatOpenAI(
-                    model="gpt-4o-mini",
-                    temperature=0.1,
-                    api_key=os.getenv("OPENAI_API_KEY")
-                )
                 self.embeddings = OpenAIEmbeddings(
                     model="text-embedding-3-small",
                     api_key=os.getenv("OPENAI_API_KEY")
                 )
-                logger.info("✅ RAG service using OpenAI")
             
-            elif os.getenv("GEMINI_API_KEY"):
-                self.llm = ChatGoogleGenerativeAI(
-                    model="gemini-2.0-flash",
-                    temperature=0.1,
-                    api_key=os.getenv("GEMINI_API_KEY")
-                )
-                logger.info("✅ RAG service using Gemini (embeddings limited)")
-                
+            if provider:
+                logger.info(f"✅ RAG service using LLM router (preferred: {provider.key})")
+            
         except Exception as e:
             logger.error(f"❌ RAG initialization failed: {e}")
     
@@ -137,7 +130,8 @@ Response:"""
                     question=question
                 )
                 
-                response = self.llm.invoke(prompt_input)
+                # Routed call: fastest healthy provider, falls back on errors
+                response, _ = self.llm_router.invoke(prompt_input, temperature=0.1)
                 answer = response.content if hasattr(response, 'content') else str(response)
                 
                 # Estimate tokens (rough approximation)
@@ -4,11 +4,16 @@ import hashlib
 import json
 from datetime import datetime
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
 from supabase import create_client, Client
 
+from middleware.rate_limiter import limiter, limit, RateLimitTiers
+from services.job_card_manager import get_job_card_manager
+
 # --- Configuration & Supabase Connection ---
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -39,6 +44,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Rate Limiting (public token endpoints) ---
+if limiter:
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
 
 # ==================== PYDANTIC MODELS ====================
 
@@ -546,43 +556,50 @@ def add_vehicle_log(contract_id: int, km_driven: int, log_date: str):
 # ==================== PUBLIC APPROVAL ENDPOINT ====================
 
 @app.get("/api/public/job-card")
-def get_public_job_card(token: str):
+@limit(RateLimitTiers.PUBLIC_TOKEN)
+def get_public_job_card(request: Request, token: str):
     """Get job card details for public approval (token-based)."""
     if not supabase:
         raise HTTPException(status_code=503, detail="Database service is not available.")
     
     try:
-        # Validate token and get job card
-        # In production, tokens would be stored in a separate table with expiration
-        data = supabase.table('job_cards').select('*').eq('approval_token', token).single().execute()
-        if not data.data:
-            raise HTTPException(status_code=404, detail="Invalid or expired token")
-        
-        return {"success": True, "data": data.data}
+        # Single indexed read on the token digest; expired links never match
+        job_card = get_job_card_manager(supabase).find_by_approval_token(token)
     except Exception as e:
-        if "no rows" in str(e).lower():
-            raise HTTPException(status_code=404, detail="Invalid or expired token")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    if not job_card:
+        raise HTTPException(status_code=404, detail="Invalid or expired token")
+    
+    job_card.pop("approval_token_hash", None)
+    return {"success": True, "data": job_card}
 
 
 @app.post("/api/public/job-card/approve")
-def approve_job_card(token: str, approved: bool = True):
+@limit(RateLimitTiers.PUBLIC_TOKEN)
+def approve_job_card(request: Request, token: str, approved: bool = True):
     """Approve or reject a job card via public token."""
     if not supabase:
         raise HTTPException(status_code=503, detail="Database service is not available.")
     
     try:
+        job_card = get_job_card_manager(supabase).find_by_approval_token(token)
+        if not job_card:
+            raise HTTPException(status_code=404, detail="Invalid or expired token")
+        
         status = "Customer Approved" if approved else "Customer Rejected"
-        data = supabase.table('job_cards').update({
+        supabase.table('job_cards').update({
             "status": status,
             "customer_approved": approved,
             "approved_at": datetime.now().isoformat()
-        }).eq('approval_token', token).execute()
+        }).eq('id', job_card['id']).execute()
         
         return {
             "success": True,
             "message": f"Job card {'approved' if approved else 'rejected'} successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
@@ -89,6 +89,7 @@ class RateLimitTiers:
     RELAXED = "500/minute"    # 500 requests per minute - for read-heavy
     BURST = "1000/minute"     # 1000 requests per minute - for batch operations
     HEALTH = "60/minute"      # Health checks - generous but not unlimited
+    PUBLIC_TOKEN = "30/minute"  # Unauthenticated token links (customer approval)
 
 # Decorator for exempting routes from rate limiting
 def exempt_from_limit(func):
@@ -96,4 +97,10 @@ def exempt_from_limit(func):
     func.__exempt_from_limit__ = True
     return func
 
-__all__ = ['limiter', 'setup_rate_limiting', 'RateLimitTiers', 'exempt_from_limit']
\ No newline at end of file
+def limit(rule: str):
+    """`limiter.limit(rule)`, or a no-op decorator when rate limiting is disabled"""
+    if limiter is None:
+        return lambda func: func
+    return limiter.limit(rule)
+
+__all__ = ['limiter', 'setup_rate_limiting', 'RateLimitTiers', 'exempt_from_limit', 'limit']
\ No newline at end of file
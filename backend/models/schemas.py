@@ -218,6 +218,7 @@ class ChatRequest(BaseModel):
     status: Optional[str] = "CREATED"
     intelligence_mode: Optional[str] = "FAST"
     operating_mode: Optional[int] = 0
+    session_id: Optional[str] = None
 
 
 class ChatStreamRequest(BaseModel):
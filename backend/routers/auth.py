@@ -18,7 +18,9 @@ from typing import Optional
 
 import httpx
 
-from fastapi import APIRouter, HTTPException, Response, Cookie, Request
+from fastapi import APIRouter, Depends, HTTPException, Response, Cookie, Request
+
+from fastapi.concurrency import run_in_threadpool
 
 from pydantic import BaseModel
 
@@ -28,7 +30,17 @@ from models.schemas import UserLogin, UserRegister, GoogleAuthSession
 
 from utils.database import users_collection, user_sessions_collection, serialize_doc
 
-from utils.security import hash_password, verify_password
+from utils.subscription import revoke_user_sessions, require_admin
+
+from services.auth_cache import get_auth_cache
+
+from services.session_tokens import (
+
+    issue_session, issue_signed_token, cookie_max_age, is_signed_token, decode_session_token, revoke_signed_token
+
+)
+
+from utils.security import hash_password_async, verify_password_async, needs_rehash, hash_pool
 
 
 
@@ -161,31 +173,17 @@ async def google_oauth_login(request: GoogleTokenRequest, response: Response):
 
         # Create session
 
-        session_token = f"google_session_{uuid.uuid4().hex}"
-
-        expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-
         
 
         # Remove old sessions for this user
 
-        user_sessions_collection.delete_many({"user_id": user_id})
+        revoke_user_sessions(user_id)
 
         
 
         # Create new session
 
-        user_sessions_collection.insert_one({
-
-            "user_id": user_id,
-
-            "session_token": session_token,
-
-            "expires_at": expires_at,
-
-            "created_at": datetime.now(timezone.utc)
-
-        })
+        session_token, expires_at = issue_session(user_id, "google")
 
         
 
@@ -205,7 +203,7 @@ async def google_oauth_login(request: GoogleTokenRequest, response: Response):
 
             path="/",
 
-            max_age=7 * 24 * 60 * 60
+            max_age=cookie_max_age(expires_at)
 
         )
 
@@ -347,23 +345,15 @@ async def process_google_session(session_data: GoogleAuthSession, response: Resp
 
         
 
-        expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-
-        user_sessions_collection.delete_many({"user_id": user_id})
+        revoke_user_sessions(user_id)
 
         
 
-        user_sessions_collection.insert_one({
-
-            "user_id": user_id,
-
-            "session_token": session_token,
-
-            "expires_at": expires_at,
+        # Our own session in the configured SESSION_MODE, like register/login;
 
-            "created_at": datetime.now(timezone.utc)
+        # the provider's token only proved the exchange succeeded
 
-        })
+        session_token, expires_at = issue_session(user_id, "google")
 
         
 
@@ -381,7 +371,7 @@ async def process_google_session(session_data: GoogleAuthSession, response: Resp
 
             path="/",
 
-            max_age=7 * 24 * 60 * 60
+            max_age=cookie_max_age(expires_at)
 
         )
 
@@ -441,37 +431,51 @@ async def get_current_user(
 
     
 
-    session_doc = user_sessions_collection.find_one({"session_token": token}, {"_id": 0})
+    if is_signed_token(token):
+
+        claims = decode_session_token(token)
+
+        if not claims:
+
+            raise HTTPException(status_code=401, detail="Invalid session")
+
+        user_id = claims["sub"]
+
+    else:
+
+        session_doc = user_sessions_collection.find_one({"session_token": token}, {"_id": 0})
 
     
 
-    if not session_doc:
+        if not session_doc:
 
-        raise HTTPException(status_code=401, detail="Invalid session")
+            raise HTTPException(status_code=401, detail="Invalid session")
 
     
 
-    expires_at = session_doc.get("expires_at")
+        expires_at = session_doc.get("expires_at")
 
-    if isinstance(expires_at, str):
+        if isinstance(expires_at, str):
 
-        expires_at = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
+            expires_at = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
 
-    if expires_at.tzinfo is None:
+        if expires_at.tzinfo is None:
 
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
 
     
 
-    if expires_at < datetime.now(timezone.utc):
+        if expires_at < datetime.now(timezone.utc):
 
-        user_sessions_collection.delete_one({"session_token": token})
+            user_sessions_collection.delete_one({"session_token": token})
 
-        raise HTTPException(status_code=401, detail="Session expired")
+            get_auth_cache().invalidate_sessions([token])
+
+            raise HTTPException(status_code=401, detail="Session expired")
 
     
 
-    user_id = session_doc.get("user_id")
+        user_id = session_doc.get("user_id")
 
     user_doc = users_collection.find_one({"user_id": user_id}, {"_id": 0, "password": 0})
 
@@ -517,10 +521,16 @@ async def logout_user(
 
     
 
-    if token:
+    if token and is_signed_token(token):
+
+        revoke_signed_token(token)
+
+    elif token:
 
         user_sessions_collection.delete_one({"session_token": token})
 
+        get_auth_cache().invalidate_sessions([token])
+
     
 
     response.delete_cookie(key="session_token", path="/", secure=True, samesite="none")
@@ -533,13 +543,135 @@ async def logout_user(
 
 
 
+@router.post("/refresh")
+
+async def refresh_session(
+
+    request: Request,
+
+    response: Response,
+
+    session_token: Optional[str] = Cookie(None)
+
+):
+
+    """Exchange a valid signed session token for a fresh one (SESSION_MODE=signed)."""
+
+    token = session_token
+
+    
+
+    if not token:
+
+        auth_header = request.headers.get("Authorization")
+
+        if auth_header and auth_header.startswith("Bearer "):
+
+            token = auth_header.split(" ")[1]
+
+    
+
+    claims = decode_session_token(token) if token and is_signed_token(token) else None
+
+    if not claims:
+
+        raise HTTPException(status_code=401, detail="Invalid session")
+
+    
+
+    new_token, expires_at = issue_signed_token(claims["sub"])
+
+    revoke_signed_token(token)
+
+    
+
+    response.set_cookie(
+
+        key="session_token",
+
+        value=new_token,
+
+        httponly=True,
+
+        secure=True,
+
+        samesite="none",
+
+        path="/",
+
+        max_age=cookie_max_age(expires_at)
+
+    )
+
+    
+
+    return {"success": True, "token": new_token, "expires_at": expires_at.isoformat()}
+
+
+
+
+
+def _create_email_user(doc: dict):
+
+    """Insert a registered user and open their session (blocking DB work)."""
+
+    users_collection.insert_one(doc)
+
+    session_token, expires_at = issue_session(doc["user_id"], "email")
+
+    user_doc = users_collection.find_one({"user_id": doc["user_id"]}, {"_id": 0, "password": 0})
+
+    return session_token, expires_at, user_doc
+
+
+
+
+
+def _start_email_login(email: str, user_id: Optional[str], new_hash: Optional[str]):
+
+    """Persist login-time upgrades and open a fresh session (blocking DB work)."""
+
+    updates = {}
+
+    # Upgrade legacy plain-text or old-cost hashes while we have the password
+
+    if new_hash:
+
+        updates["password"] = new_hash
+
+    if not user_id:
+
+        user_id = f"user_{uuid.uuid4().hex[:12]}"
+
+        updates["user_id"] = user_id
+
+    if updates:
+
+        users_collection.update_one({"email": email}, {"$set": updates})
+
+    
+
+    revoke_user_sessions(user_id)
+
+    session_token, expires_at = issue_session(user_id, "email")
+
+    user_data = users_collection.find_one({"user_id": user_id}, {"_id": 0, "password": 0})
+
+    return session_token, expires_at, user_data
+
+
+
+
+
 @router.post("/register")
 
-def register_user(user: UserRegister, response: Response):
+async def register_user(user: UserRegister, response: Response):
 
     """Register a new user with email/password."""
 
-    existing = users_collection.find_one({"email": user.email})
+    # pymongo is synchronous: keep it off the event loop
+
+    existing = await run_in_threadpool(users_collection.find_one, {"email": user.email}, {"_id": 1})
 
     if existing:
 
@@ -553,7 +685,7 @@ def register_user(user: UserRegister, response: Response):
 
     # Hash password for security
 
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hash_password_async(user.password)
 
     
 
@@ -570,8 +702,11 @@ def register_user(user: UserRegister, response: Response):
         "workshop_name": user.workshop_name,
 
         "role": "user",
+
         "subscription_tier": "free",
+
         "subscription_started": datetime.now(timezone.utc),
+
         "auth_provider": "email",
 
         "created_at": datetime.now(timezone.utc),
@@ -582,27 +717,7 @@ def register_user(user: UserRegister, response: Response):
 
     
 
-    users_collection.insert_one(doc)
-
-    
-
-    session_token = f"email_session_{uuid.uuid4().hex}"
-
-    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-
-    
-
-    user_sessions_collection.insert_one({
-
-        "user_id": user_id,
-
-        "session_token": session_token,
-
-        "expires_at": expires_at,
-
-        "created_at": datetime.now(timezone.utc)
-
-    })
+    session_token, expires_at, user_doc = await run_in_threadpool(_create_email_user, doc)
 
     
 
@@ -620,16 +735,12 @@ def register_user(user: UserRegister, response: Response):
 
         path="/",
 
-        max_age=7 * 24 * 60 * 60
+        max_age=cookie_max_age(expires_at)
 
     )
 
     
 
-    user_doc = users_collection.find_one({"user_id": user_id}, {"_id": 0, "password": 0})
-
-    
-
     return {"success": True, "user": user_doc, "token": session_token}
 
 
@@ -638,11 +749,13 @@ def register_user(user: UserRegister, response: Response):
 
 @router.post("/login")
 
-def login_user(credentials: UserLogin, response: Response):
+async def login_user(credentials: UserLogin, response: Response):
 
     """Login user with email/password."""
 
-    user = users_collection.find_one({"email": credentials.email})
+    # pymongo is synchronous: keep it off the event loop
+
+    user = await run_in_threadpool(users_collection.find_one, {"email": credentials.email})
 
     
 
@@ -654,51 +767,25 @@ def login_user(credentials: UserLogin, response: Response):
 
     # Verify password (supports both hashed and legacy plain text)
 
-    if not verify_password(credentials.password, user.get("password", "")):
+    if not await verify_password_async(credentials.password, user.get("password", "")):
 
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     
 
-    user_id = user.get("user_id")
-
-    
+    new_hash = None
 
-    if not user_id:
+    if needs_rehash(user.get("password", "")):
 
-        user_id = f"user_{uuid.uuid4().hex[:12]}"
-
-        users_collection.update_one(
-
-            {"email": credentials.email},
-
-            {"$set": {"user_id": user_id}}
-
-        )
+        new_hash = await hash_password_async(credentials.password)
 
     
 
-    user_sessions_collection.delete_many({"user_id": user_id})
+    session_token, expires_at, user_data = await run_in_threadpool(
 
-    
-
-    session_token = f"email_session_{uuid.uuid4().hex}"
-
-    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-
-    
-
-    user_sessions_collection.insert_one({
-
-        "user_id": user_id,
-
-        "session_token": session_token,
-
-        "expires_at": expires_at,
-
-        "created_at": datetime.now(timezone.utc)
+        _start_email_login, credentials.email, user.get("user_id"), new_hash
 
-    })
+    )
 
     
 
@@ -716,15 +803,22 @@ def login_user(credentials: UserLogin, response: Response):
 
         path="/",
 
-        max_age=7 * 24 * 60 * 60
+        max_age=cookie_max_age(expires_at)
 
     )
 
     
 
-    user_data = users_collection.find_one({"user_id": user_id}, {"_id": 0, "password": 0})
+    return {"success": True, "user": user_data, "token": session_token}
 
-    
 
-    return {"success": True, "user": user_data, "token": session_token}
 
+
+
+@router.get("/metrics/hashing", dependencies=[Depends(require_admin)])
+
+def get_hashing_pool_stats():
+
+    """Password hashing pool queue depth and throughput."""
+
+    return {"success": True, "pool": hash_pool.get_stats()}
@@ -10,26 +10,46 @@ import asyncio
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 
-from fastapi import APIRouter, HTTPException, Query, Request, Cookie
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Cookie
 from fastapi.responses import StreamingResponse, JSONResponse
 
 from models.schemas import ChatRequest, ChatStreamRequest, ChatSessionCreate, ChatMessageSave
 from utils.database import chat_sessions_collection, serialize_doc, serialize_docs
+from utils.pagination import keyset_filter, next_cursor
 
 # AI Governance Integration
 from services.ai_governance import AIGovernance, UserRole
 
+# Latency-aware multi-provider LLM routing
+from services.llm_router import get_llm_router
+
+# Server-side rolling conversation memory
+from services.conversation_memory import get_conversation_memory
+
+# Bucketed chat message storage
+from services.chat_store import (
+    append_message, get_messages, get_session_meta, delete_session_messages, SESSION_LIST_PROJECTION
+)
+
 # Subscription Enforcement
 from utils.subscription import ( # noqa
-    get_user_tier, TIER_PRO_AI, TIER_ELITE, require_subscription, get_current_user_id, get_subscription_info, check_chat_limit, FREE_DAILY_QUERY_LIMIT
+    get_user_tier, TIER_PRO_AI, TIER_ELITE, require_subscription, get_current_user_id, get_subscription_info, check_chat_limit, check_usage_limit, FREE_DAILY_QUERY_LIMIT,
+    require_admin
 )
 
+# Per-stage latency histograms and Server-Timing
+from utils.stage_timer import stage, get_stage_metrics
+
 router = APIRouter(prefix="/api/chat", tags=["AI Chat"])
 
 # Initialize AI Governance
 governance = AIGovernance()
 
-EMERGENT_LLM_KEY = os.environ.get("EMERGENT_LLM_KEY")
+# Shared LLM router (OpenAI / Gemini / Emergent, fastest healthy first)
+llm_router = get_llm_router()
+
+# Recent turns plus running summary per chat session
+conversation_memory = get_conversation_memory()
 
 
 @router.get("/subscription", summary="Get user subscription info")
@@ -40,6 +60,18 @@ async def get_user_subscription(request: Request, session_token: Optional[str] =
     return {"success": True, "subscription": info}
 
 
+@router.get("/providers", summary="LLM provider routing stats", dependencies=[Depends(require_admin)])
+def get_llm_provider_stats():
+    """Rolling latency, error rate and current ranking of LLM providers."""
+    return {"success": True, "router": llm_router.get_stats()}
+
+
+@router.get("/metrics/stages", summary="Chat pipeline stage latency", dependencies=[Depends(require_admin)])
+def get_chat_stage_metrics():
+    """Per-stage latency percentiles (ms) aggregated since process start."""
+    return {"success": True, "stages": get_stage_metrics()}
+
+
 @router.post("")
 @check_chat_limit  # Use the decorator for cleaner enforcement
 async def chat_with_ai(chat_request: ChatRequest, request: Request, session_token: Optional[str] = Cookie(None)):
@@ -58,16 +90,20 @@ async def chat_with_ai(chat_request: ChatRequest, request: Request, session_toke
         if last_msg.role == "user" and last_msg.parts:
             user_text = last_msg.parts[0].get("text", "")
     
-    # Get user tier for governance and response
-    tier = get_user_tier(user_id)
+    # Tier was resolved by check_chat_limit
+    tier = request.state.tier
+
+    # Continue the client's session, or start one the client can reuse
+    session_id = chat_request.session_id or f"chat-{uuid.uuid4().hex[:12]}"
 
     # AI Governance Check - 4-Layer Safety System (simplified for now)
-    decision = governance.evaluate(
-        query_id=f"chat-{uuid.uuid4().hex[:8]}",
-        query=user_text,
-        user_role=UserRole.TECHNICIAN,  # Placeholder
-        vehicle_context=chat_request.context,
-    )
+    with stage("governance"):
+        decision = governance.evaluate(
+            query_id=f"chat-{uuid.uuid4().hex[:8]}",
+            query=user_text,
+            user_role=UserRole.TECHNICIAN,  # Placeholder
+            vehicle_context=chat_request.context,
+        )
 
     # Handle blocked queries
     if decision.final_action == "BLOCK":
@@ -107,10 +143,10 @@ async def chat_with_ai(chat_request: ChatRequest, request: Request, session_toke
         }
     
 
-    if not EMERGENT_LLM_KEY:
+    if not llm_router.has_providers():
         return {
             "response_content": {
-                "visual_text": "AI service not configured. Please set up the EMERGENT_LLM_KEY.",
+                "visual_text": "AI service not configured. Please set up an LLM API key.",
                 "audio_text": "AI service unavailable."
             },
             "job_status_update": chat_request.status,
@@ -119,13 +155,11 @@ async def chat_with_ai(chat_request: ChatRequest, request: Request, session_toke
     
 
     try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-
         # Check if user has Pro AI Access for advanced features
         has_pro = tier in [TIER_PRO_AI, TIER_ELITE]
         
-        system_prompt = f"""You are EKA-AI, an expert automobile intelligence assistant for Go4Garage. 
+        with stage("prompt_build"):
+            system_prompt = f"""You are EKA-AI, an expert automobile intelligence assistant for Go4Garage. 
 
 Your expertise includes:
 - Vehicle diagnostics and troubleshooting
@@ -144,14 +178,14 @@ Guidelines:
 6. Mention warranty considerations when relevant
 
 Current context:
-- Operating mode: {"Workshop" if request.operating_mode == 1 else "MG Fleet" if request.operating_mode == 2 else "General"}
+- Operating mode: {"Workshop" if chat_request.operating_mode == 1 else "MG Fleet" if chat_request.operating_mode == 2 else "General"}
 - Intelligence mode: {chat_request.intelligence_mode}
 - User tier: {tier}
 {"- Pro AI Access: Enabled with vehicle history memory" if has_pro else "- Free tier: Basic Q&A only"}
 """
-        
-        if chat_request.context:
-            system_prompt += f"""
+            
+            if chat_request.context:
+                system_prompt += f"""
 Vehicle Context:
 - Type: {chat_request.context.get('vehicleType', 'Unknown')}
 - Brand: {chat_request.context.get('brand', 'Unknown')}
@@ -160,29 +194,31 @@ Vehicle Context:
 - Fuel: {chat_request.context.get('fuelType', 'Unknown')}
 - Registration: {chat_request.context.get('registrationNumber', 'Not provided')}
 """
+
+        # Prior turns come from server-side memory, not the client history
+        with stage("memory_load"):
+            memory_window = conversation_memory.load(session_id, user_id)
+            system_prompt += memory_window.render()
         
-        session_id = f"eka-chat-{uuid.uuid4().hex[:8]}"
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=session_id,
-            system_message=system_prompt
-        ).with_model("gemini", "gemini-1.5-flash")
-
-        user_message = UserMessage(text=user_text)
-        response_text = await chat.send_message(user_message)
-        
+        with stage("llm"):
+            llm_result = await llm_router.complete(system_prompt, user_text)
+        response_text = llm_result.text
 
-        reg_pattern = r'([A-Z]{{2}}[\s-]?\d{{1,2}}[\s-]?[A-Z]{{0,2}}[\s-]?\d{{1,4}})'
-        show_orange_border = bool(re.search(reg_pattern, user_text, re.IGNORECASE))
+        with stage("memory_save"):
+            conversation_memory.append_exchange(session_id, user_text, response_text, memory_window)
         
 
-        new_status = chat_request.status
-        if "diagnos" in user_text.lower():
-            new_status = "DIAGNOSED"
-        elif "estimate" in user_text.lower():
-            new_status = "ESTIMATED"
-        elif "approv" in user_text.lower():
-            new_status = "CUSTOMER_APPROVAL"
+        with stage("post_process"):
+            reg_pattern = r'([A-Z]{{2}}[\s-]?\d{{1,2}}[\s-]?[A-Z]{{0,2}}[\s-]?\d{{1,4}})'
+            show_orange_border = bool(re.search(reg_pattern, user_text, re.IGNORECASE))
+
+            new_status = chat_request.status
+            if "diagnos" in user_text.lower():
+                new_status = "DIAGNOSED"
+            elif "estimate" in user_text.lower():
+                new_status = "ESTIMATED"
+            elif "approv" in user_text.lower():
+                new_status = "CUSTOMER_APPROVAL"
         
 
         response = {
@@ -190,6 +226,7 @@ Vehicle Context:
                 "visual_text": response_text,
                 "audio_text": response_text[:200] if response_text else ""
             },
+            "session_id": session_id,
             "job_status_update": new_status,
             "ui_triggers": {
                 "theme_color": "#F45D3D",
@@ -239,22 +276,21 @@ async def chat_stream(request: ChatStreamRequest, http_request: Request, session
     """
     # The decorator is not used here to allow custom streaming response on limit reached.
     # This is a valid pattern for SSE.
-    user_id = get_current_user_id(http_request, session_token)
-    allowed, used, limit = check_usage_limit(user_id)
+    with stage("auth"):
+        user_id = get_current_user_id(http_request, session_token)
+    with stage("usage_check"):
+        allowed, used, limit = check_usage_limit(user_id)
     if not allowed:
         # Handle limit reached for streaming response
         pass # The original code for this is correct.
 
     async def generate_stream():
-        if not EMERGENT_LLM_KEY:
+        if not llm_router.has_providers():
             yield f"data: {json.dumps({'type': 'error', 'content': 'AI service not configured'})}\n\n"
             return
         
 
         try:
-            from emergentintegrations.llm.chat import LlmChat, UserMessage
-            
-
             system_prompt = """You are EKA-AI, an expert automobile intelligence assistant for Go4Garage. 
             
 Your expertise includes vehicle diagnostics, job card management, service estimates, and MG Fleet management.
@@ -266,17 +302,16 @@ Be professional yet friendly. Provide accurate automotive advice with cost estim
             
 
             session_id = request.session_id or f"eka-stream-{uuid.uuid4().hex[:8]}"
-            chat = LlmChat(
-                api_key=EMERGENT_LLM_KEY,
-                session_id=session_id,
-                system_message=system_prompt
-            ).with_model("gemini", "gemini-1.5-flash")
+            memory_window = conversation_memory.load(session_id, user_id)
+            system_prompt += memory_window.render()
 
             yield f"data: {json.dumps({'type': 'start', 'session_id': session_id})}\n\n"
             
 
-            user_message = UserMessage(text=request.message)
-            response_text = await chat.send_message(user_message)
+            with stage("llm"):
+                llm_result = await llm_router.complete(system_prompt, request.message)
+            response_text = llm_result.text
+            conversation_memory.append_exchange(session_id, request.message, response_text, memory_window)
             
 
             words = response_text.split(' ')
@@ -331,14 +366,18 @@ Be professional yet friendly. Provide accurate automotive advice with cost estim
 # ==================== CHAT SESSIONS CRUD ====================
 
 @router.post("/sessions", status_code=201)
-def create_chat_session(session_data: ChatSessionCreate):
+def create_chat_session(session_data: ChatSessionCreate, request: Request, session_token: Optional[str] = Cookie(None)):
     """Create a new chat session."""
+    user_id = get_current_user_id(request, session_token)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
     session_id = f"chat-{uuid.uuid4().hex[:12]}"
     doc = {
         "session_id": session_id,
+        "user_id": user_id,
         "title": session_data.title or "New Conversation",
         "context": session_data.context or {},
-        "messages": [],
+        "message_count": 0,
         "created_at": datetime.now(timezone.utc),
         "updated_at": datetime.now(timezone.utc)
     }
@@ -348,57 +387,72 @@ def create_chat_session(session_data: ChatSessionCreate):
 
 
 @router.get("/sessions")
-def get_chat_sessions(limit: int = Query(20, ge=1, le=100)):
-    """Get all chat sessions, ordered by most recent."""
-    cursor = chat_sessions_collection.find({}).sort("updated_at", -1).limit(limit)
-    docs = list(cursor)
-    return {"success": True, "sessions": serialize_docs(docs)}
+def get_chat_sessions(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    session_token: Optional[str] = Cookie(None)
+):
+    """List the current user's chat sessions, most recent first (no messages)."""
+    user_id = get_current_user_id(request, session_token)
+    if not user_id:
+        # {"user_id": None} would match every ownerless session
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    query = {"user_id": user_id}
+    query.update(keyset_filter("updated_at", cursor))
+
+    docs = list(chat_sessions_collection.aggregate([
+        {"$match": query},
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": SESSION_LIST_PROJECTION}
+    ]))
+    page, cursor_out = next_cursor(docs, limit, "updated_at")
+    return {
+        "success": True,
+        "sessions": serialize_docs(page),
+        "next_cursor": cursor_out,
+        "has_more": cursor_out is not None
+    }
 
 
 @router.get("/sessions/{session_id}")
-def get_chat_session(session_id: str):
-    """Get a single chat session with all messages."""
-    doc = chat_sessions_collection.find_one({"session_id": session_id})
-    if not doc:
+def get_chat_session(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[int] = Query(None, ge=1, description="Cursor (message seq) from a previous page")
+):
+    """Get a chat session with a page of its messages (latest first page)."""
+    meta = get_session_meta(session_id)
+    if not meta:
         raise HTTPException(status_code=404, detail="Chat session not found")
-    return {"success": True, "data": serialize_doc(doc)}
+    page = get_messages(session_id, limit=limit, before=before, meta=meta)
+    meta.pop("legacy_count", None)
+    data = serialize_doc(meta)
+    data["messages"] = page["messages"]
+    return {
+        "success": True,
+        "data": data,
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
+    }
 
 
 @router.post("/sessions/{session_id}/messages")
 def add_message_to_session(session_id: str, message: ChatMessageSave):
     """Add a message to an existing chat session."""
-    msg_doc = {
-        "id": uuid.uuid4().hex[:8],
-        "role": message.role,
-        "content": message.content,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
-    
-    session = chat_sessions_collection.find_one({"session_id": session_id})
-    update_data = {
-        "$push": {"messages": msg_doc},
-        "$set": {"updated_at": datetime.now(timezone.utc)}
-    }
-    
-    if session and session.get("title") == "New Conversation" and message.role == "user":
-        title = message.content[:50] + "..." if len(message.content) > 50 else message.content
-        update_data["$set"]["title"] = title
-    
-    result = chat_sessions_collection.update_one(
-        {"session_id": session_id},
-        update_data
-    )
-    
-    if result.matched_count == 0:
+    msg_doc = append_message(session_id, message.role, message.content)
+    if msg_doc is None:
         raise HTTPException(status_code=404, detail="Chat session not found")
-    
     return {"success": True, "message": msg_doc}
 
 
 @router.delete("/sessions/{session_id}")
 def delete_chat_session(session_id: str):
     """Delete a chat session."""
-    result = chat_sessions_collection.delete_one({"session_id": session_id})
-    if result.deleted_count == 0:
+    deleted = chat_sessions_collection.find_one_and_delete({"session_id": session_id}, {"user_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Chat session not found")
+    delete_session_messages(session_id)
+    conversation_memory.clear(session_id, deleted.get("user_id"))
     return {"success": True, "message": "Session deleted"}
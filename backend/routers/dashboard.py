@@ -2,33 +2,30 @@
 Dashboard routes for EKA-AI Backend.
 Handles dashboard metrics and analytics.
 """
-from fastapi import APIRouter
+from typing import Optional
 
-from utils.database import job_cards_collection, invoices_collection, mg_contracts_collection
+from fastapi import APIRouter, Query
+
+from utils.database import mg_contracts_collection
+from services.job_card_stats import get_job_card_stats, get_paid_revenue
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
 
 
 @router.get("/metrics")
-def get_dashboard_metrics():
+def get_dashboard_metrics(workshop_id: Optional[str] = Query(None)):
     """Get dashboard metrics overview."""
-    total_jobs = job_cards_collection.count_documents({})
-    pending_jobs = job_cards_collection.count_documents({"status": {"$in": ["Pending", "CREATED"]}})
-    completed_jobs = job_cards_collection.count_documents({"status": {"$in": ["Completed", "CLOSED"]}})
-    in_progress = job_cards_collection.count_documents({"status": {"$in": ["In-Progress", "IN_PROGRESS"]}})
-    
-    paid_invoices = list(invoices_collection.find({"status": "Paid"}))
-    total_revenue = sum(inv.get("total_amount", 0) for inv in paid_invoices)
-    
+    job_stats = get_job_card_stats(workshop_id)
+    total_revenue = get_paid_revenue(workshop_id)
     active_contracts = mg_contracts_collection.count_documents({"status": "Active"})
     
     return {
         "success": True,
         "metrics": {
-            "total_job_cards": total_jobs,
-            "pending_jobs": pending_jobs,
-            "completed_jobs": completed_jobs,
-            "in_progress": in_progress,
+            "total_job_cards": job_stats["total"],
+            "pending_jobs": job_stats["by_status"]["CREATED"],
+            "completed_jobs": job_stats["by_status"]["COMPLETED"],
+            "in_progress": job_stats["by_status"]["IN_PROGRESS"],
             "total_revenue": total_revenue,
             "active_mg_contracts": active_contracts
         }
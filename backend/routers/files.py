@@ -9,10 +9,11 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query, File, UploadFile, Form
+from fastapi import APIRouter, HTTPException, Query, File, UploadFile, Form, BackgroundTasks
 from fastapi.responses import FileResponse
 
 from utils.database import files_collection, serialize_doc, serialize_docs
+from services.job_card_views import schedule_refresh
 
 router = APIRouter(prefix="/api/files", tags=["Files"])
 
@@ -40,6 +41,7 @@ def get_file_type(filename: str) -> str:
 
 @router.post("/upload")
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     job_card_id: Optional[str] = Form(None),
     category: Optional[str] = Form(None)
@@ -83,6 +85,8 @@ async def upload_file(
         
         result = files_collection.insert_one(file_doc)
         file_doc["_id"] = result.inserted_id
+        if job_card_id:
+            schedule_refresh(background_tasks, job_card_id)
         
         return {
             "success": True,
@@ -140,7 +144,7 @@ def list_files(
 
 
 @router.delete("/{file_id}")
-def delete_file(file_id: str):
+def delete_file(file_id: str, background_tasks: BackgroundTasks):
     """Delete a file."""
     file_doc = files_collection.find_one({"file_id": file_id})
     if not file_doc:
@@ -151,6 +155,8 @@ def delete_file(file_id: str):
         file_path.unlink()
     
     files_collection.delete_one({"file_id": file_id})
+    if file_doc.get("job_card_id"):
+        schedule_refresh(background_tasks, file_doc["job_card_id"])
     
     return {"success": True, "message": "File deleted"}
 
@@ -10,17 +10,19 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from bson import ObjectId
 from pydantic import BaseModel, EmailStr
 from supabase import create_client, Client
 
 from models.schemas import InvoiceCreate
-from utils.database import invoices_collection, serialize_doc, serialize_docs, job_cards_collection
+from utils.database import invoices_collection, serialize_doc, serialize_docs, job_cards_collection, async_db
 from services.email_service import send_email_async, generate_invoice_email_html, is_email_enabled
+from services.pdf_renderer import PDF_BATCH_QUEUE, PDF_QUEUE, enqueue_render, get_pdf_renderer
 
 # Invoice Manager Integration
-from services.invoice_manager import InvoiceManager, InvoiceStatus
+from services.invoice_manager import Invoice, InvoiceItem, InvoiceItemType, InvoiceManager, InvoiceStatus
 
 router = APIRouter(prefix="/api/invoices", tags=["Invoices"])
 
@@ -254,6 +256,15 @@ def finalize_invoice(invoice_id: str):
             raise HTTPException(status_code=404, detail="Invoice not found")
         
         updated = invoices_collection.find_one({"_id": ObjectId(invoice_id)})
+        
+        if invoice_manager:
+            # Pre-render on the batch queue so the download is a cache hit
+            try:
+                html, css = _gst_pdf_document(updated)
+                enqueue_render(html, css, f"/api/invoices/{invoice_id}/pdf-gst", queue=PDF_BATCH_QUEUE)
+            except Exception as e:
+                print(f"Warning: Could not queue invoice PDF: {e}")
+        
         return {"success": True, "data": serialize_doc(updated)}
     except HTTPException:
         raise
@@ -562,8 +573,61 @@ def generate_invoice_from_job_card(job_card_id: str, workshop_id: str):
         raise HTTPException(status_code=500, detail=f"Invoice generation failed: {str(e)}")
 
 
+def _gst_pdf_document(doc: dict):
+    """HTML and stylesheet of the GST invoice PDF for a MongoDB invoice document."""
+    from decimal import Decimal
+    
+    items = [
+        InvoiceItem(
+            item_type=InvoiceItemType(item_data.get("item_type", "PART")),
+            description=item_data.get("description", ""),
+            hsn_sac_code=item_data.get("hsn_sac_code", ""),
+            quantity=Decimal(str(item_data.get("quantity", 1))),
+            unit_price=Decimal(str(item_data.get("unit_price", 0))),
+            discount_amount=Decimal(str(item_data.get("discount_amount", 0))),
+            gst_rate=Decimal(str(item_data.get("gst_rate", 18)))
+        )
+        for item_data in doc.get("items", [])
+    ]
+    
+    created_at = doc.get("created_at") or datetime.now(timezone.utc)
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    
+    invoice = Invoice(
+        id=str(doc["_id"]),
+        job_card_id=doc.get("job_card_id", ""),
+        workshop_id=doc.get("workshop_id", ""),
+        invoice_number=doc.get("invoice_number", "UNKNOWN"),
+        customer_gstin=doc.get("customer_gstin"),
+        customer_name=doc.get("customer_name", ""),
+        customer_address=doc.get("customer_address", ""),
+        customer_phone=doc.get("customer_phone"),
+        generated_at=created_at,
+        notes=doc.get("notes", ""),
+        items=items
+    )
+    invoice.calculate_totals()
+    return invoice_manager.build_pdf_document(invoice.to_dict())
+
+
+@router.get("/pdf-jobs/{task_id}")
+def get_pdf_job_status(task_id: str):
+    """Status of a queued PDF render; pdf_url is set once the file is stored."""
+    from celery.result import AsyncResult
+    from workers.celery_config import celery_app
+    
+    result = AsyncResult(task_id, app=celery_app)
+    response = {"success": True, "task_id": task_id, "status": result.state.lower()}
+    if result.state == "SUCCESS":
+        response["pdf_url"] = (result.result or {}).get("pdf_url")
+    elif result.state == "FAILURE":
+        response["error"] = str(result.result)
+    return response
+
+
 @router.get("/{invoice_id}/pdf-gst")
-def generate_gst_invoice_pdf(invoice_id: str):
+async def generate_gst_invoice_pdf(invoice_id: str):
     """
     Generate a professional GST-compliant PDF invoice using InvoiceManager.
     
@@ -573,11 +637,16 @@ def generate_gst_invoice_pdf(invoice_id: str):
     - HSN/SAC codes for each item
     - Proper GST breakdown (CGST/SGST or IGST)
     - Authorized signature area
+    
+    An unchanged invoice is served straight from the PDF cache. Otherwise
+    rendering is queued and 202 is returned with a status URL; poll it,
+    then request this URL again once the job has finished.
     """
-    from bson import ObjectId
+    if not invoice_manager:
+        raise HTTPException(status_code=503, detail="Invoice service is not available.")
     
     try:
-        doc = invoices_collection.find_one({"_id": ObjectId(invoice_id)})
+        doc = await async_db["invoices"].find_one({"_id": ObjectId(invoice_id)})
     except:
         raise HTTPException(status_code=400, detail="Invalid invoice ID format")
     
@@ -585,44 +654,36 @@ def generate_gst_invoice_pdf(invoice_id: str):
         raise HTTPException(status_code=404, detail="Invoice not found")
     
     try:
-        # Convert MongoDB document to Invoice object
-        from decimal import Decimal
-        
-        items = []
-        for item_data in doc.get("items", []):
-            item = invoice_manager.create_invoice_item(
-                description=item_data.get("description", ""),
-                hsn_sac_code=item_data.get("hsn_sac_code", ""),
-                quantity=Decimal(str(item_data.get("quantity", 1))),
-                unit_price=Decimal(str(item_data.get("unit_price", 0))),
-                discount_amount=Decimal(str(item_data.get("discount_amount", 0))),
-                gst_rate=Decimal(str(item_data.get("gst_rate", 18))),
-                item_type=item_data.get("item_type", "PART")
-            )
-            items.append(item)
-        
-        invoice = invoice_manager.generate_invoice(
-            job_card_id=doc.get("job_card_id", ""),
-            workshop_id=doc.get("workshop_id", ""),
-            customer_id=doc.get("customer_id", ""),
-            items=items,
-            notes=doc.get("notes", ""),
-            due_days=30
-        )
-        
-        # Generate PDF using InvoiceManager
-        pdf_buffer = invoice_manager.generate_pdf(invoice)
-        
         invoice_number = doc.get("invoice_number", "UNKNOWN")
+        html, css = _gst_pdf_document(doc)
+        renderer = get_pdf_renderer()
+        # Cache reads (S3) and the broker call block: keep them off the event loop
+        pdf_bytes = await run_in_threadpool(renderer.cached, html, css)
+        
+        if pdf_bytes is None:
+            task_id = await run_in_threadpool(
+                enqueue_render, html, css, f"/api/invoices/{invoice_id}/pdf-gst", PDF_QUEUE
+            )
+            if task_id:
+                return JSONResponse(status_code=202, content={
+                    "success": True,
+                    "status": "queued",
+                    "task_id": task_id,
+                    "status_url": f"/api/invoices/pdf-jobs/{task_id}"
+                })
+            # No task queue reachable: render here without blocking the event loop
+            pdf_bytes = await renderer.render_async(html, css)
         
         return StreamingResponse(
-            pdf_buffer,
+            io.BytesIO(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f"attachment; filename=GST-Invoice-{invoice_number}.pdf"
             }
         )
         
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ImportError as e:
         raise HTTPException(status_code=500, detail=f"PDF library not installed: {str(e)}")
     except Exception as e:
@@ -2,6 +2,7 @@
 Job Cards routes for EKA-AI Backend.
 Handles CRUD operations for workshop job cards with FSM enforcement.
 """
+import json
 from datetime import datetime, timezone
 from typing import Optional, List
 import random
@@ -18,7 +19,15 @@ from utils.database import (
     job_cards_collection, serialize_doc, serialize_docs,
     vehicles_collection, customers_collection, services_collection,
     parts_collection, job_card_notes_collection, job_card_timeline_collection,
-    signatures_collection, files_collection, invoices_collection
+    signatures_collection, invoices_collection, async_db
+)
+from utils.pagination import keyset_filter, next_cursor
+from utils.stage_timer import stage
+from utils.ttl_cache import TTLCache
+from services.job_card_stats import get_job_card_stats as compute_job_card_stats
+from services.sequence_service import get_sequence_service, max_issued_number
+from services.job_card_views import (
+    get_job_card_view, schedule_refresh, mark_vehicle_stale, drop_view
 )
 
 # Job Card Manager Integration
@@ -40,11 +49,31 @@ if supabase_url and supabase_key:
         print(f"Warning: Could not initialize JobCardManager: {e}")
 
 
-def generate_job_card_number():
-    """Generate a unique job card number."""
+# Fields needed by list views; full documents via ?full=true or the detail endpoint
+# (everything the list screens read: table columns, search and filters)
+JOB_CARD_LIST_PROJECTION = {
+    "job_card_number": 1, "customer_name": 1, "phone": 1, "email": 1,
+    "customer_phone": 1, "customer_email": 1, "details": 1,
+    "vehicle_registration": 1, "registration_number": 1, "vehicle_model": 1,
+    "status": 1, "priority": 1, "estimated_cost": 1, "workshop_id": 1,
+    "created_at": 1, "updated_at": 1,
+}
+
+# Filtered list totals are approximate within this window
+JOB_CARD_COUNT_TTL = int(os.getenv("JOB_CARD_COUNT_TTL", "30"))
+_count_cache = TTLCache(max_entries=1000)
+
+
+def generate_job_card_number(workshop_id: Optional[str] = None):
+    """Generate a unique job card number (per workshop and year)."""
     year = datetime.now().year
-    count = job_cards_collection.count_documents({}) + 1
-    return f"JC-{year}-{count:05d}"
+    prefix = f"JC-{year}-"
+    scope = {"workshop_id": workshop_id} if workshop_id else {}
+    number = get_sequence_service().next_value(
+        f"job_card:{workshop_id or 'default'}:{year}",
+        seed=lambda: max_issued_number(job_cards_collection, "job_card_number", prefix, scope)
+    )
+    return f"{prefix}{number:05d}"
 
 
 def get_client_ip(request: Request) -> str:
@@ -57,85 +86,78 @@ def get_client_ip(request: Request) -> str:
 
 @router.get("/stats/overview")
 @router.get("/stats")
-def get_job_card_stats():
-    """Get job card statistics."""
-    total = job_cards_collection.count_documents({})
-    
-    pending = job_cards_collection.count_documents({
-        "status": {"$in": ["Pending", "CREATED", "pending"]}
-    })
-    
-    in_progress = job_cards_collection.count_documents({
-        "status": {"$in": ["In-Progress", "IN_PROGRESS", "in_progress", "DIAGNOSED", "ESTIMATED"]}
-    })
-    
-    completed = job_cards_collection.count_documents({
-        "status": {"$in": ["Completed", "CLOSED", "completed", "INVOICED"]}
-    })
-    
-    cancelled = job_cards_collection.count_documents({
-        "status": {"$in": ["Cancelled", "CANCELLED", "cancelled"]}
-    })
-    
-    active = pending + in_progress
-    
-    by_status = {
-        "CUSTOMER_APPROVAL": job_cards_collection.count_documents({"status": "CUSTOMER_APPROVAL"}),
-        "PDI": job_cards_collection.count_documents({"status": "PDI"}),
-        "PDI_COMPLETED": job_cards_collection.count_documents({"status": "PDI_COMPLETED"}),
-        "CREATED": job_cards_collection.count_documents({"status": {"$in": ["CREATED", "Pending"]}}),
-        "IN_PROGRESS": job_cards_collection.count_documents({"status": {"$in": ["IN_PROGRESS", "In-Progress"]}}),
-        "COMPLETED": job_cards_collection.count_documents({"status": {"$in": ["CLOSED", "Completed"]}}),
-    }
-    
-    stats = {
-        "total": total,
-        "pending": pending,
-        "in_progress": in_progress,
-        "completed": completed,
-        "cancelled": cancelled,
-        "active": active,
-        "by_status": by_status
-    }
-    
+def get_job_card_stats(workshop_id: Optional[str] = Query(None)):
+    """Get job card statistics (one aggregation, cached briefly)."""
+    stats = compute_job_card_stats(workshop_id)
     return {"success": True, "data": stats, **stats}
 
 
 @router.post("", status_code=201)
-def create_job_card(job_card: JobCardCreate):
+def create_job_card(job_card: JobCardCreate, background_tasks: BackgroundTasks):
     """Create a new job card."""
     doc = job_card.model_dump()
+    doc["job_card_number"] = generate_job_card_number(doc.get("workshop_id"))
     doc["created_at"] = datetime.now(timezone.utc)
     doc["updated_at"] = datetime.now(timezone.utc)
     result = job_cards_collection.insert_one(doc)
     doc["_id"] = result.inserted_id
+    mark_vehicle_stale(doc.get("vehicle_registration"))
+    schedule_refresh(background_tasks, str(result.inserted_id))
     return {"success": True, "data": serialize_doc(doc)}
 
 
 @router.get("")
 def get_all_job_cards(
     status: Optional[str] = Query(None),
+    workshop_id: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    full: bool = Query(False, description="Return full documents instead of list fields"),
+    exact_total: bool = Query(False, description="Exact count instead of cached/estimated")
 ):
-    """Retrieve all job cards with optional filtering."""
+    """Retrieve job cards, newest first, with keyset pagination."""
     query = {}
+    if workshop_id:
+        query["workshop_id"] = workshop_id
     if status:
         query["status"] = status
     
-    cursor = job_cards_collection.find(query).sort("created_at", -1).skip(offset).limit(limit)
-    docs = list(cursor)
-    total = job_cards_collection.count_documents(query)
+    find_query = {**query, **keyset_filter("created_at", cursor)}
+    projection = None if full else JOB_CARD_LIST_PROJECTION
+    db_cursor = job_cards_collection.find(find_query, projection).sort([("created_at", -1), ("_id", -1)])
+    if offset and not cursor:
+        db_cursor = db_cursor.skip(offset)
+    docs, next_page = next_cursor(list(db_cursor.limit(limit + 1)), limit, "created_at")
     
     return {
         "success": True, 
         "data": serialize_docs(docs), 
         "job_cards": serialize_docs(docs),
         "count": len(docs), 
-        "total": total
+        "total": count_job_cards(query, exact=exact_total),
+        "next_cursor": next_page,
+        "has_more": next_page is not None
     }
 
 
+def count_job_cards(query: dict, exact: bool = False) -> int:
+    """
+    Total for a list query. Unfiltered totals use collection metadata;
+    filtered totals are cached for JOB_CARD_COUNT_TTL seconds.
+    """
+    if exact:
+        return job_cards_collection.count_documents(query)
+    if not query:
+        return job_cards_collection.estimated_document_count()
+    key = json.dumps(query, sort_keys=True, default=str)
+    total = _count_cache.get(key)
+    if total is None:
+        total = job_cards_collection.count_documents(query)
+        _count_cache.set(key, total, JOB_CARD_COUNT_TTL)
+    return total
+
+
 @router.get("/{job_card_id}")
 def get_job_card_by_id(job_card_id: str):
     """Retrieve a single job card by ID."""
@@ -150,7 +172,7 @@ def get_job_card_by_id(job_card_id: str):
 
 
 @router.put("/{job_card_id}")
-def update_job_card(job_card_id: str, job_card: JobCardUpdate):
+def update_job_card(job_card_id: str, job_card: JobCardUpdate, background_tasks: BackgroundTasks):
     """Update an existing job card."""
     try:
         existing = job_cards_collection.find_one({"_id": ObjectId(job_card_id)})
@@ -165,6 +187,11 @@ def update_job_card(job_card_id: str, job_card: JobCardUpdate):
     
     job_cards_collection.update_one({"_id": ObjectId(job_card_id)}, {"$set": update_data})
     updated = job_cards_collection.find_one({"_id": ObjectId(job_card_id)})
+    # Sibling cards list this one under "related cards"
+    mark_vehicle_stale(updated.get("vehicle_registration"))
+    if updated.get("vehicle_registration") != existing.get("vehicle_registration"):
+        mark_vehicle_stale(existing.get("vehicle_registration"))
+    schedule_refresh(background_tasks, job_card_id)
     
     return {"success": True, "data": serialize_doc(updated)}
 
@@ -173,13 +200,18 @@ def update_job_card(job_card_id: str, job_card: JobCardUpdate):
 def delete_job_card(job_card_id: str):
     """Delete a job card."""
     try:
-        result = job_cards_collection.delete_one({"_id": ObjectId(job_card_id)})
+        deleted = job_cards_collection.find_one_and_delete(
+            {"_id": ObjectId(job_card_id)}, {"vehicle_registration": 1}
+        )
     except:
         raise HTTPException(status_code=400, detail="Invalid job card ID format")
     
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Job Card not found")
     
+    drop_view(job_card_id)
+    mark_vehicle_stale(deleted.get("vehicle_registration"))
+    
     return {"success": True, "message": "Job Card deleted successfully"}
 
 
@@ -250,6 +282,7 @@ async def transition_job_card(
             "status": "completed"
         }
         job_card_timeline_collection.insert_one(timeline_entry)
+        schedule_refresh(background_tasks, job_card_id)
         
         # Send notification in background if requested
         if send_notification:
@@ -289,7 +322,7 @@ async def trigger_status_notification(job_card_id: str):
 # ==================== DETAILED JOB CARD ENDPOINTS ====================
 
 @router.get("/{job_card_id}/detail")
-def get_job_card_detail(job_card_id: str):
+async def get_job_card_detail(job_card_id: str):
     """
     Get comprehensive job card details including:
     - Vehicle information
@@ -300,198 +333,15 @@ def get_job_card_detail(job_card_id: str):
     - Photos and documents
     """
     try:
-        job_card = job_cards_collection.find_one({"_id": ObjectId(job_card_id)})
-    except:
+        oid = ObjectId(job_card_id)
+    except Exception:
         raise HTTPException(status_code=400, detail="Invalid job card ID format")
     
-    if not job_card:
-        raise HTTPException(status_code=404, detail="Job Card not found")
+    with stage("db", "job card detail"):
+        response = await get_job_card_view(str(oid))
     
-    job_card_id_str = str(job_card["_id"])
-    
-    # Get related vehicle
-    vehicle = vehicles_collection.find_one({"job_card_id": job_card_id_str})
-    if not vehicle:
-        # Create default vehicle from job card data
-        vehicle = {
-            "registration_number": job_card.get("vehicle_registration", "N/A"),
-            "make": "Unknown",
-            "model": job_card.get("vehicle_model", "Unknown"),
-            "variant": None,
-            "year": 2022,
-            "fuel_type": "Petrol",
-            "chassis_vin": None,
-            "engine_number": None,
-            "odometer_reading": 0,
-            "color": "Unknown",
-            "insurance_valid_till": None,
-            "puc_valid_till": None,
-            "last_service_date": None,
-            "last_service_km": None,
-            "tyre_condition": None
-        }
-    
-    # Get related customer
-    customer = customers_collection.find_one({"job_card_id": job_card_id_str})
-    if not customer:
-        # Create default customer from job card data
-        customer = {
-            "name": job_card.get("customer_name", "Unknown"),
-            "phone": job_card.get("phone", "N/A"),
-            "email": job_card.get("email"),
-            "address": None,
-            "total_visits": 1,
-            "lifetime_value": job_card.get("estimated_cost", 0) or 0,
-            "rating": 0,
-            "member_since": None,
-            "preferences": []
-        }
-    
-    # Get services
-    services = list(services_collection.find({"job_card_id": job_card_id_str}))
-    services_list = []
-    for svc in services:
-        services_list.append({
-            "id": str(svc["_id"]),
-            "service_type": svc.get("service_type", "General Service"),
-            "description": svc.get("description", ""),
-            "technician": svc.get("technician", "Unassigned"),
-            "priority": svc.get("priority", "normal"),
-            "status": svc.get("status", "queued"),
-            "estimated_time": svc.get("estimated_time", "1h 00m"),
-            "actual_time": svc.get("actual_time"),
-            "cost": svc.get("cost", 0)
-        })
-    
-    # Get parts
-    parts = list(parts_collection.find({"job_card_id": job_card_id_str}))
-    parts_list = []
-    for part in parts:
-        parts_list.append({
-            "id": str(part["_id"]),
-            "name": part.get("name", "Unknown Part"),
-            "part_number": part.get("part_number", "N/A"),
-            "category": part.get("category", "General"),
-            "quantity": part.get("quantity", "1"),
-            "unit_price": part.get("unit_price", 0),
-            "total": part.get("total", 0),
-            "warranty": part.get("warranty"),
-            "availability": part.get("availability", "in-stock"),
-            "availability_note": part.get("availability_note")
-        })
-    
-    # Calculate payment
-    parts_total = sum(p.get("total", 0) for p in parts_list)
-    services_total = sum(s.get("cost", 0) for s in services_list)
-    subtotal = parts_total + services_total
-    cgst = round(subtotal * 0.09, 2)
-    sgst = round(subtotal * 0.09, 2)
-    grand_total = subtotal + cgst + sgst
-    
-    payment = {
-        "subtotal": subtotal,
-        "discounts": job_card.get("discounts", []),
-        "cgst": cgst,
-        "sgst": sgst,
-        "igst": 0,
-        "grand_total": grand_total,
-        "amount_paid": job_card.get("amount_paid", 0),
-        "balance_due": grand_total - job_card.get("amount_paid", 0),
-        "payment_status": job_card.get("payment_status", "pending"),
-        "payment_mode": job_card.get("payment_mode"),
-        "transaction_id": job_card.get("transaction_id"),
-        "paid_on": job_card.get("paid_on")
-    }
-    
-    # Get timeline
-    timeline = list(job_card_timeline_collection.find({"job_card_id": job_card_id_str}).sort("timestamp", 1))
-    timeline_list = []
-    for entry in timeline:
-        timeline_list.append({
-            "id": str(entry["_id"]),
-            "timestamp": entry.get("timestamp", datetime.now(timezone.utc)).isoformat() if isinstance(entry.get("timestamp"), datetime) else entry.get("timestamp", ""),
-            "description": entry.get("description", ""),
-            "actor": entry.get("actor", "System"),
-            "status": entry.get("status", "completed")
-        })
-    
-    # Get notes
-    notes = list(job_card_notes_collection.find({"job_card_id": job_card_id_str}).sort("timestamp", 1))
-    notes_list = []
-    for note in notes:
-        notes_list.append({
-            "id": str(note["_id"]),
-            "author": note.get("author", "Unknown"),
-            "timestamp": note.get("timestamp", datetime.now(timezone.utc)).isoformat() if isinstance(note.get("timestamp"), datetime) else note.get("timestamp", ""),
-            "text": note.get("text", ""),
-            "is_ai": note.get("is_ai", False),
-            "attachments": note.get("attachments", [])
-        })
-    
-    # Get photos
-    photos = list(files_collection.find({
-        "job_card_id": job_card_id_str,
-        "category": "vehicle_photo"
-    }))
-    photo_list = [serialize_doc(p) for p in photos]
-    
-    # Get documents
-    documents = list(files_collection.find({
-        "job_card_id": job_card_id_str,
-        "category": {"$ne": "vehicle_photo"}
-    }))
-    doc_list = [serialize_doc(d) for d in documents]
-    
-    # Get signature
-    signature = signatures_collection.find_one({"job_card_id": job_card_id_str})
-    
-    # Get related job cards (same vehicle or customer)
-    related = []
-    if vehicle.get("registration_number"):
-        related_cards = job_cards_collection.find({
-            "vehicle_registration": vehicle.get("registration_number"),
-            "_id": {"$ne": job_card["_id"]}
-        }).limit(5)
-        for rc in related_cards:
-            related.append({
-                "id": str(rc["_id"]),
-                "job_card_number": rc.get("job_card_number", f"JC-{str(rc['_id'])[-5:]}"),
-                "date": rc.get("created_at").isoformat() if isinstance(rc.get("created_at"), datetime) else rc.get("created_at", ""),
-                "service": rc.get("details", "Service"),
-                "relation": "Same vehicle",
-                "badge": "Previous",
-                "badge_variant": "info"
-            })
-    
-    response = {
-        "id": job_card_id_str,
-        "job_card_number": job_card.get("job_card_number", f"JC-{job_card_id_str[-5:].upper()}"),
-        "status": job_card.get("status", "Pending"),
-        "priority": job_card.get("priority", "normal"),
-        "created_at": job_card.get("created_at").isoformat() if isinstance(job_card.get("created_at"), datetime) else job_card.get("created_at", ""),
-        "updated_at": job_card.get("updated_at").isoformat() if isinstance(job_card.get("updated_at"), datetime) else job_card.get("updated_at", ""),
-        "created_by": job_card.get("created_by", "System"),
-        "bay_number": job_card.get("bay_number"),
-        "technician": job_card.get("technician"),
-        "promised_delivery": job_card.get("promised_delivery"),
-        
-        "vehicle": vehicle if "_id" not in vehicle else serialize_doc(vehicle),
-        "customer": customer if "_id" not in customer else serialize_doc(customer),
-        "services": services_list,
-        "parts": parts_list,
-        "payment": payment,
-        "timeline": timeline_list,
-        "notes": notes_list,
-        
-        "pre_inspection": job_card.get("pre_inspection", {}),
-        "photos": photo_list,
-        "documents": doc_list,
-        "related_job_cards": related,
-        
-        "approval_status": job_card.get("approval_status", "pending"),
-        "signature": serialize_doc(signature) if signature else None,
-        "feedback": job_card.get("feedback")
-    }
+    if response is None:
+        raise HTTPException(status_code=404, detail="Job Card not found")
     
     return {"success": True, "data": response}
 
@@ -579,7 +429,7 @@ def get_job_card_insights(job_card_id: str):
 
 
 @router.post("/{job_card_id}/notes")
-def add_internal_note(job_card_id: str, note: InternalNoteCreate):
+def add_internal_note(job_card_id: str, note: InternalNoteCreate, background_tasks: BackgroundTasks):
     """Add an internal note to a job card."""
     try:
         job_card = job_cards_collection.find_one({"_id": ObjectId(job_card_id)})
@@ -610,6 +460,7 @@ def add_internal_note(job_card_id: str, note: InternalNoteCreate):
         "status": "completed"
     }
     job_card_timeline_collection.insert_one(timeline_entry)
+    schedule_refresh(background_tasks, str(job_card["_id"]))
     
     return {"success": True, "data": serialize_doc(note_doc)}
 
@@ -631,7 +482,8 @@ def get_internal_notes(job_card_id: str):
 
 
 @router.post("/{job_card_id}/signature")
-def save_signature(job_card_id: str, signature: SignatureData, request: Request):
+def save_signature(job_card_id: str, signature: SignatureData, request: Request,
+                   background_tasks: BackgroundTasks):
     """Save customer signature for approval."""
     try:
         job_card = job_cards_collection.find_one({"_id": ObjectId(job_card_id)})
@@ -677,6 +529,7 @@ def save_signature(job_card_id: str, signature: SignatureData, request: Request)
         "status": "completed"
     }
     job_card_timeline_collection.insert_one(timeline_entry)
+    schedule_refresh(background_tasks, str(job_card["_id"]))
     
     return {"success": True, "message": "Signature saved successfully"}
 
@@ -698,7 +551,8 @@ def get_timeline(job_card_id: str):
 
 
 @router.post("/{job_card_id}/timeline")
-def add_timeline_entry(job_card_id: str, description: str, actor: str, status: str = "completed"):
+def add_timeline_entry(job_card_id: str, description: str, actor: str, background_tasks: BackgroundTasks,
+                       status: str = "completed"):
     """Add an entry to the job card timeline."""
     try:
         job_card = job_cards_collection.find_one({"_id": ObjectId(job_card_id)})
@@ -718,6 +572,7 @@ def add_timeline_entry(job_card_id: str, description: str, actor: str, status: s
     
     result = job_card_timeline_collection.insert_one(entry)
     entry["_id"] = result.inserted_id
+    schedule_refresh(background_tasks, str(job_card["_id"]))
     
     return {"success": True, "data": serialize_doc(entry)}
 
@@ -732,7 +587,8 @@ def get_services(job_card_id: str):
 
 
 @router.post("/{job_card_id}/services")
-def add_service(job_card_id: str, service_type: str, description: str, technician: str = "Unassigned", 
+def add_service(job_card_id: str, service_type: str, description: str, background_tasks: BackgroundTasks,
+                technician: str = "Unassigned", 
                 priority: str = "normal", estimated_time: str = "1h 00m", cost: float = 0):
     """Add a service to a job card."""
     try:
@@ -758,12 +614,14 @@ def add_service(job_card_id: str, service_type: str, description: str, technicia
     
     result = services_collection.insert_one(service)
     service["_id"] = result.inserted_id
+    schedule_refresh(background_tasks, str(job_card["_id"]))
     
     return {"success": True, "data": serialize_doc(service)}
 
 
 @router.put("/{job_card_id}/services/{service_id}")
-def update_service(job_card_id: str, service_id: str, status: Optional[str] = None, 
+def update_service(job_card_id: str, service_id: str, background_tasks: BackgroundTasks,
+                   status: Optional[str] = None, 
                    actual_time: Optional[str] = None, technician: Optional[str] = None):
     """Update a service."""
     update_data = {"updated_at": datetime.now(timezone.utc)}
@@ -785,6 +643,7 @@ def update_service(job_card_id: str, service_id: str, status: Optional[str] = No
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Service not found")
     
+    schedule_refresh(background_tasks, job_card_id)
     service = services_collection.find_one({"_id": ObjectId(service_id)})
     return {"success": True, "data": serialize_doc(service)}
 
@@ -800,7 +659,8 @@ def get_parts(job_card_id: str):
 
 @router.post("/{job_card_id}/parts")
 def add_part(job_card_id: str, name: str, part_number: str, category: str,
-             quantity: str, unit_price: float, warranty: Optional[str] = None):
+             quantity: str, unit_price: float, background_tasks: BackgroundTasks,
+             warranty: Optional[str] = None):
     """Add a part to a job card."""
     try:
         job_card = job_cards_collection.find_one({"_id": ObjectId(job_card_id)})
@@ -830,5 +690,6 @@ def add_part(job_card_id: str, name: str, part_number: str, category: str,
     
     result = parts_collection.insert_one(part)
     part["_id"] = result.inserted_id
+    schedule_refresh(background_tasks, str(job_card["_id"]))
     
     return {"success": True, "data": serialize_doc(part)}
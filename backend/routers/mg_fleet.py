@@ -18,6 +18,7 @@ from utils.database import (
 
 # MG Service Integration
 from services.mg_service import MGEngine
+from services.sequence_service import get_sequence_service, max_issued_number
 
 router = APIRouter(prefix="/api/mg-fleet", tags=["MG Fleet"])
 
@@ -58,8 +59,12 @@ def create_contract(contract: ContractCreate):
     try:
         # Generate contract number
         year = datetime.now().year
-        count = mg_contracts_collection.count_documents({}) + 1
-        contract_number = f"MG-{year}-{count:05d}"
+        prefix = f"MG-{year}-"
+        number = get_sequence_service().next_value(
+            f"mg_contract:{year}",
+            seed=lambda: max_issued_number(mg_contracts_collection, "contract_number", prefix)
+        )
+        contract_number = f"{prefix}{number:05d}"
         
         # Create contract document
         contract_doc = {
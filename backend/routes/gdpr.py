@@ -7,6 +7,8 @@ from middleware.auth import require_auth
 import json
 from datetime import datetime
 
+from services.audit_archive import query_audit_logs
+
 gdpr_bp = Blueprint('gdpr', __name__, url_prefix='/api/gdpr')
 
 @gdpr_bp.route('/export-data', methods=['GET'])
@@ -55,9 +57,8 @@ def export_user_data():
         subs = supabase.table('subscription_logs').select('*').eq('workshop_id', workshop_id).execute()
         data_package['subscription_history'] = subs.data
         
-        # Fetch audit logs
-        logs = supabase.table('audit_logs').select('*').eq('user_id', user_id).execute()
-        data_package['activity_logs'] = logs.data
+        # Fetch audit logs (hot table and archived months)
+        data_package['activity_logs'] = query_audit_logs(supabase, limit=None, user_id=user_id)
         
         return jsonify({
             "success": True,
@@ -20,6 +20,12 @@ load_dotenv()
 
 # Import database utilities
 from utils.database import create_indexes, close_connection
+from utils.stage_timer import begin_request_timer
+from services.auth_cache import get_auth_cache
+from services.job_card_views import start_change_stream
+from services.audit_pipeline import drain_audit_pipeline
+from services.pdf_renderer import shutdown_pdf_renderer
+from utils.security import hash_pool
 
 # Import routers
 from routers import auth, job_cards, chat, invoices, mg_fleet, files, dashboard, notifications, voice
@@ -33,9 +39,17 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler for startup and shutdown."""
     # Startup
     create_indexes()
+    get_auth_cache().start_listener()
+    view_watcher = start_change_stream()
     print("EKA-AI Backend started with MongoDB (Refactored v3.0)")
     yield
     # Shutdown
+    if view_watcher:
+        view_watcher.cancel()
+    get_auth_cache().stop_listener()
+    hash_pool.shutdown()
+    drain_audit_pipeline()
+    shutdown_pdf_renderer()
     close_connection()
     print("MongoDB connection closed")
 
@@ -67,10 +81,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["Authorization", "Content-Type", "X-Requested-With", "Accept", "Origin"],
+    expose_headers=["Server-Timing"],
     max_age=600,
 )
 
 
+@app.middleware("http")
+async def server_timing_middleware(request, call_next):
+    """Expose per-stage timings recorded during the request as Server-Timing."""
+    timer = begin_request_timer()
+    response = await call_next(request)
+    if timer.stages:
+        response.headers["Server-Timing"] = timer.server_timing_header()
+    return response
+
+
 # ==================== REGISTER ROUTERS ====================
 app.include_router(auth.router)
 app.include_router(job_cards.router)
@@ -0,0 +1,248 @@
+"""
+Audit Archive - Cold storage for monthly audit_logs partitions
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- One compressed file per archived month: Parquet (zstd) when pyarrow is
+  installed, gzip JSONL otherwise
+- Stored under AUDIT_ARCHIVE_URI: s3://bucket/prefix (boto3) or a local
+  directory standing in for object storage
+- archive_cold_partitions() exports months older than AUDIT_HOT_DAYS and
+  detaches their partitions once the archive row count is verified
+- query_audit_logs() reads the hot table and archived months together
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Try to import pyarrow for columnar archives
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Try to import boto3 for S3 archives
+try:
+    import boto3
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+AUDIT_ARCHIVE_URI = os.getenv(
+    "AUDIT_ARCHIVE_URI",
+    str(Path(__file__).resolve().parent.parent / "data" / "audit_archive")
+)
+AUDIT_HOT_DAYS = int(os.getenv("AUDIT_HOT_DAYS", "90"))
+EXPORT_PAGE_SIZE = 1000
+FILTER_FIELDS = ("workshop_id", "user_id", "entity_type", "entity_id", "action")
+
+
+def _month_key(month: date, extension: str) -> str:
+    return f"audit_logs/{month:%Y}/{month:%m}.{extension}"
+
+
+class AuditArchive:
+    """Reads and writes monthly audit archive files"""
+
+    def __init__(self, uri: str = AUDIT_ARCHIVE_URI):
+        self.uri = uri
+        if uri.startswith("s3://"):
+            if not BOTO3_AVAILABLE:
+                raise RuntimeError("boto3 is required for s3:// audit archives")
+            self.bucket, _, prefix = uri[len("s3://"):].partition("/")
+            self.key_root = prefix.strip("/") + "/" if prefix.strip("/") else ""
+            self.s3 = boto3.client("s3")
+            self.root = None
+        else:
+            self.root = Path(uri)
+            self.s3 = None
+        self.extension = "parquet" if PYARROW_AVAILABLE else "jsonl.gz"
+
+    # ═══════════════════════════════════════════════════════════════
+    # STORAGE
+    # ═══════════════════════════════════════════════════════════════
+
+    def _put(self, key: str, data: bytes):
+        if self.s3:
+            self.s3.put_object(Bucket=self.bucket, Key=self.key_root + key, Body=data)
+            return
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _get(self, key: str) -> bytes:
+        if self.s3:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self.key_root + key)
+            return obj["Body"].read()
+        return (self.root / key).read_bytes()
+
+    def _keys(self) -> List[str]:
+        if self.s3:
+            keys = []
+            paginator = self.s3.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self.key_root + "audit_logs/"):
+                keys.extend(obj["Key"][len(self.key_root):] for obj in page.get("Contents", []))
+            return keys
+        base = self.root / "audit_logs"
+        if not base.exists():
+            return []
+        return [str(p.relative_to(self.root)) for p in base.glob("*/*.*") if not p.name.endswith(".tmp")]
+
+    def archived_months(self) -> Dict[date, str]:
+        """Archived month -> storage key, both formats"""
+        months = {}
+        for key in self._keys():
+            parts = key.split("/")
+            if len(parts) == 3:
+                month = parts[2].split(".", 1)[0]
+                months[date(int(parts[1]), int(month), 1)] = key
+        return months
+
+    # ═══════════════════════════════════════════════════════════════
+    # ENCODING
+    # ═══════════════════════════════════════════════════════════════
+
+    def write_month(self, month: date, rows: List[Dict[str, Any]]) -> str:
+        """Write one month of rows; returns the storage key"""
+        key = _month_key(month, self.extension)
+        if PYARROW_AVAILABLE:
+            # JSON columns are stored as text to keep one schema across months
+            table = pa.Table.from_pylist([
+                {**row, "old_values": json.dumps(row.get("old_values")),
+                 "new_values": json.dumps(row.get("new_values"))}
+                for row in rows
+            ])
+            buffer = io.BytesIO()
+            pq.write_table(table, buffer, compression="zstd")
+            data = buffer.getvalue()
+        else:
+            data = gzip.compress("".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8"))
+        self._put(key, data)
+        return key
+
+    def read_month(self, key: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Rows of one archived month matching equality filters"""
+        data = self._get(key)
+        if key.endswith(".parquet"):
+            if not PYARROW_AVAILABLE:
+                raise RuntimeError("pyarrow is required to read Parquet audit archives")
+            rows = pq.read_table(io.BytesIO(data)).to_pylist()
+            for row in rows:
+                row["old_values"] = json.loads(row["old_values"]) if row.get("old_values") else None
+                row["new_values"] = json.loads(row["new_values"]) if row.get("new_values") else None
+        else:
+            rows = [json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines() if line]
+        return [row for row in rows if all(row.get(f) == v for f, v in (filters or {}).items())]
+
+
+# ═══════════════════════════════════════════════════════════════
+# ARCHIVAL JOB
+# ═══════════════════════════════════════════════════════════════
+
+def _export_rows(supabase, start: date, end: date) -> List[Dict[str, Any]]:
+    rows = []
+    offset = 0
+    while True:
+        page = supabase.table("audit_logs")\
+            .select("*")\
+            .gte("created_at", start.isoformat())\
+            .lt("created_at", end.isoformat())\
+            .order("created_at")\
+            .order("id")\
+            .range(offset, offset + EXPORT_PAGE_SIZE - 1)\
+            .execute()
+        rows.extend(page.data)
+        if len(page.data) < EXPORT_PAGE_SIZE:
+            return rows
+        offset += EXPORT_PAGE_SIZE
+
+
+def archive_cold_partitions(supabase, archive: Optional[AuditArchive] = None,
+                            hot_days: int = AUDIT_HOT_DAYS) -> Dict[str, Any]:
+    """Create upcoming partitions, archive and detach months older than hot_days"""
+    archive = archive or AuditArchive()
+    supabase.rpc("ensure_audit_partitions", {"p_months_ahead": 2}).execute()
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=hot_days)).date().replace(day=1)
+    cold = supabase.rpc("cold_audit_partitions", {"p_before": cutoff.isoformat()}).execute().data or []
+
+    archived = []
+    for partition in cold:
+        month_start = date.fromisoformat(partition["month_start"])
+        rows = _export_rows(supabase, month_start, date.fromisoformat(partition["month_end"]))
+        key = archive.write_month(month_start, rows)
+        # Verify what landed in storage before dropping the source
+        stored = len(archive.read_month(key))
+        supabase.rpc("detach_audit_partition", {
+            "p_name": partition["partition_name"],
+            "p_expected_rows": stored
+        }).execute()
+        archived.append({"partition": partition["partition_name"], "rows": stored, "key": key})
+        logger.info(f"Archived audit partition {partition['partition_name']} ({stored} rows) to {key}")
+
+    return {"cutoff": cutoff.isoformat(), "archived": archived}
+
+
+# ═══════════════════════════════════════════════════════════════
+# QUERY
+# ═══════════════════════════════════════════════════════════════
+
+def query_audit_logs(
+    supabase,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = 100,
+    archive: Optional[AuditArchive] = None,
+    **filters: Any
+) -> List[Dict[str, Any]]:
+    """
+    Audit rows newest first across the hot table and archived months
+
+    filters: equality on workshop_id, user_id, entity_type, entity_id, action.
+    Archived months are read newest first and only until `limit` is met.
+    """
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unsupported audit filters: {sorted(unknown)}")
+    filters = {field: value for field, value in filters.items() if value is not None}
+
+    query = supabase.table("audit_logs").select("*")
+    for field, value in filters.items():
+        query = query.eq(field, value)
+    if start:
+        query = query.gte("created_at", start.isoformat())
+    if end:
+        query = query.lt("created_at", end.isoformat())
+    query = query.order("created_at", desc=True)
+    if limit:
+        query = query.limit(limit)
+    rows = query.execute().data
+
+    archive = archive or AuditArchive()
+    for month, key in sorted(archive.archived_months().items(), reverse=True):
+        if limit and len(rows) >= limit:
+            break
+        if end and month >= end.date():
+            continue
+        if start and month < start.date().replace(day=1):
+            break
+        archived_rows = [
+            row for row in archive.read_month(key, filters)
+            if (not start or str(row["created_at"]) >= start.isoformat())
+            and (not end or str(row["created_at"]) < end.isoformat())
+        ]
+        rows.extend(sorted(archived_rows, key=lambda row: str(row["created_at"]), reverse=True))
+
+    return rows[:limit] if limit else rows
@@ -0,0 +1,309 @@
+"""
+Audit Pipeline - Buffered, batched audit_logs writer shared by all managers
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- Managers enqueue audit rows in-process; requests never wait on the insert
+- A background thread writes rows in bulk (AUDIT_BATCH_SIZE per insert,
+  at least every AUDIT_FLUSH_INTERVAL seconds)
+- Rows that cannot be written (DB unavailable, queue full) are appended to
+  a local JSONL spill file and replayed once writes succeed again
+- A batch rejected for its data (constraint, type or PostgREST schema
+  error) is retried row by row; rows that fail permanently go to a
+  dead-letter file instead of taking the rest of the batch with them
+- Replay is at-least-once: the file being replayed is only removed once
+  every row in it is written, dead-lettered or spilled again, and a file
+  left behind by a crash is picked up when the writer starts
+- drain() flushes everything still queued on shutdown
+"""
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_MAX_QUEUE = int(os.getenv("AUDIT_MAX_QUEUE", "10000"))
+AUDIT_SPILL_PATH = os.getenv(
+    "AUDIT_SPILL_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "audit_spill.jsonl")
+)
+AUDIT_DEAD_LETTER_PATH = os.getenv(
+    "AUDIT_DEAD_LETTER_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "audit_dead_letter.jsonl")
+)
+REPLAY_INTERVAL = 30.0
+
+
+def _is_permanent(error: Exception) -> bool:
+    """
+    Errors that fail again on every retry: SQLSTATE class 22/23 (data,
+    constraints) and PostgREST request/schema errors (PGRST1xx/2xx, e.g.
+    PGRST204 unknown column). Connection and auth errors stay retryable.
+    """
+    code = str(getattr(error, "code", "") or "")
+    return code[:2] in ("22", "23") or code[:6] in ("PGRST1", "PGRST2")
+
+
+class AuditPipeline:
+    """Queue + batching writer thread + spill file for audit rows"""
+
+    def __init__(
+        self,
+        writer: Callable[[List[Dict[str, Any]]], Any],
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        max_queue: int = AUDIT_MAX_QUEUE,
+        spill_path: str = AUDIT_SPILL_PATH,
+        dead_letter_path: str = AUDIT_DEAD_LETTER_PATH
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path)
+        self.dead_letter_path = Path(dead_letter_path)
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._last_replay = 0.0
+        self.enqueued = 0
+        self.written = 0
+        self.spilled = 0
+        self.dead_lettered = 0
+        self.failed_batches = 0
+
+    # ═══════════════════════════════════════════════════════════════
+    # PRODUCER SIDE
+    # ═══════════════════════════════════════════════════════════════
+
+    def record(self, row: Dict[str, Any]):
+        """Enqueue one audit_logs row (never blocks the caller)"""
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        if self._stop.is_set():
+            # Shutting down: nothing will consume the queue any more
+            self._spill([row])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+            self.enqueued += 1
+        except queue.Full:
+            self._spill([row])
+
+    def _ensure_started(self):
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-pipeline", daemon=True)
+                self._thread.start()
+
+    # ═══════════════════════════════════════════════════════════════
+    # WRITER THREAD
+    # ═══════════════════════════════════════════════════════════════
+
+    def _run(self):
+        # Rows spilled, or left mid-replay, by a previous process
+        self._last_replay = time.monotonic()
+        self.replay_spill()
+        while not self._stop.is_set():
+            batch = self._next_batch(self.flush_interval)
+            if batch:
+                self._write(batch)
+            self._maybe_replay()
+        # Drain whatever is left after stop() without waiting
+        while True:
+            batch = self._next_batch(0)
+            if not batch:
+                break
+            self._write(batch)
+
+    def _next_batch(self, wait: float) -> List[Dict[str, Any]]:
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write a batch; False if rows had to be spilled for a later retry"""
+        try:
+            self.writer(batch)
+            self.written += len(batch)
+            return True
+        except Exception as e:
+            self.failed_batches += 1
+            if not _is_permanent(e):
+                logger.error(f"Audit batch insert failed ({len(batch)} rows), spilling: {e}")
+                self._spill(batch)
+                return False
+            logger.warning(f"Audit batch rejected ({len(batch)} rows), writing rows individually: {e}")
+            return self._write_rows(batch)
+
+    def _write_rows(self, batch: List[Dict[str, Any]]) -> bool:
+        """Row-by-row fallback that isolates the rows the database rejects"""
+        for i, row in enumerate(batch):
+            try:
+                self.writer([row])
+                self.written += 1
+            except Exception as e:
+                if _is_permanent(e):
+                    self._dead_letter(row, e)
+                    continue
+                logger.error(f"Audit insert failed, spilling {len(batch) - i} rows: {e}")
+                self._spill(batch[i:])
+                return False
+        return True
+
+    # ═══════════════════════════════════════════════════════════════
+    # SPILL FILE
+    # ═══════════════════════════════════════════════════════════════
+
+    def _append(self, path: Path, rows: List[Dict[str, Any]]):
+        with self._spill_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _spill(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        try:
+            self._append(self.spill_path, rows)
+            self.spilled += len(rows)
+        except OSError as e:
+            # Last resort: keep the events in the application log
+            logger.error(f"Audit spill failed, dropping {len(rows)} rows: {e} {rows}")
+
+    def _dead_letter(self, row: Dict[str, Any], error: Exception):
+        """Park a row the database will never accept; it is not replayed"""
+        logger.error(f"Audit row rejected, moving to dead letter: {error}")
+        try:
+            self._append(self.dead_letter_path, [{"row": row, "error": str(error)}])
+            self.dead_lettered += 1
+        except OSError as e:
+            logger.error(f"Audit dead letter failed, dropping row: {e} {row}")
+
+    def _maybe_replay(self):
+        now = time.monotonic()
+        if now - self._last_replay < REPLAY_INTERVAL:
+            return
+        self._last_replay = now
+        self.replay_spill()
+
+    def _replaying_path(self) -> Path:
+        return self.spill_path.with_suffix(".replaying")
+
+    def replay_spill(self) -> int:
+        """Write spilled rows back to the database; returns rows written"""
+        replaying = self._replaying_path()
+        with self._spill_lock:
+            # A leftover .replaying file is finished before new spills are taken
+            if not replaying.exists():
+                if not self.spill_path.exists():
+                    return 0
+                os.replace(self.spill_path, replaying)
+        try:
+            f = open(replaying, encoding="utf-8")
+        except FileNotFoundError:
+            return 0
+        with f:
+            # One replayer per file across processes; the lock dies with its holder
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            try:
+                if os.fstat(f.fileno()).st_ino != os.stat(replaying).st_ino:
+                    return 0
+            except FileNotFoundError:
+                # Replayed and removed by another process before we got the lock
+                return 0
+            rows = [json.loads(line) for line in f if line.strip()]
+
+            written_before = self.written
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                if not self._write(batch):
+                    # _write spilled what it could not write; keep the rest for the next attempt
+                    self._spill(rows[start + self.batch_size:])
+                    break
+            # Every row is now in the database, the dead letter or the spill file
+            replaying.unlink()
+        replayed = self.written - written_before
+        if replayed:
+            logger.info(f"Replayed {replayed} spilled audit rows")
+        return replayed
+
+    # ═══════════════════════════════════════════════════════════════
+    # LIFECYCLE
+    # ═══════════════════════════════════════════════════════════════
+
+    def drain(self, timeout: float = 10.0):
+        """Stop the writer thread once it has written everything still queued"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        # Anything still queued (no thread, or join timed out) goes to disk
+        leftover = self._next_batch(0)
+        while leftover:
+            self._spill(leftover)
+            leftover = self._next_batch(0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "spilled": self.spilled,
+            "dead_lettered": self.dead_lettered,
+            "failed_batches": self.failed_batches,
+            "spill_pending": self.spill_path.exists() or self._replaying_path().exists(),
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_audit_pipeline: Optional[AuditPipeline] = None
+_audit_pipeline_lock = threading.Lock()
+
+
+def get_audit_pipeline(supabase_client, table: str = "audit_logs") -> AuditPipeline:
+    """Get or create the AuditPipeline singleton (first client wins)"""
+    global _audit_pipeline
+    with _audit_pipeline_lock:
+        if _audit_pipeline is None:
+            _audit_pipeline = AuditPipeline(lambda rows: supabase_client.table(table).insert(rows).execute())
+            atexit.register(_audit_pipeline.drain)
+    return _audit_pipeline
+
+
+def drain_audit_pipeline():
+    """Flush queued audit rows (application shutdown)"""
+    if _audit_pipeline is not None:
+        _audit_pipeline.drain()
@@ -0,0 +1,215 @@
+"""
+Auth Cache - Two-level cache for session and subscription lookups
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- session token -> user_id and user_id -> tier/expiry
+- L1: in-process TTL LRU per worker; L2: Redis shared by all workers
+- Entries never outlive the session or subscription they describe
+- Invalidation (logout, login elsewhere, tier change, expiry) deletes
+  the Redis entry and publishes on a pub/sub channel so every worker
+  evicts its L1 copy
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from utils.ttl_cache import TTLCache
+
+try:
+    from config.redis_client import redis_client
+    REDIS_AVAILABLE = redis_client is not None
+except Exception:
+    redis_client = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+L1_TTL_SECONDS = int(os.getenv("AUTH_CACHE_L1_TTL", "60"))
+L2_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL", "300"))
+L1_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_L1_SIZE", "10000"))
+NEGATIVE_TTL_SECONDS = 30
+INVALIDATION_CHANNEL = "auth:invalidate"
+
+# Marker for "looked up, does not exist" (invalid token / unknown user)
+MISSING: Dict[str, Any] = {"missing": True}
+
+
+def _token_key(token: str) -> str:
+    # Raw session tokens never leave the process
+    return "auth:session:" + hashlib.sha256(token.encode()).hexdigest()
+
+
+def _user_key(user_id: str) -> str:
+    return f"auth:tier:{user_id}"
+
+
+class AuthCache:
+    """Session and tier lookups with L1/L2 caching and push invalidation"""
+
+    def __init__(self, redis=None):
+        self.redis = redis
+        self.local = TTLCache(L1_MAX_ENTRIES)
+        self._listener: Optional[threading.Thread] = None
+        self._pubsub = None
+        self.hits = 0
+        self.misses = 0
+
+    # ═══════════════════════════════════════════════════════════════
+    # LOOKUPS
+    # ═══════════════════════════════════════════════════════════════
+
+    def get_session(self, token: str, loader: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """
+        Cached {"user_id", "expires_at" (unix ts)} for a session token
+
+        `loader` reads the session from Mongo on a miss; returns None
+        for an unknown token.
+        """
+        return self._get(_token_key(token), loader, "expires_at")
+
+    def get_tier(self, user_id: str, loader: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Cached {"tier", "expires" (unix ts or None)} for a user"""
+        return self._get(_user_key(user_id), loader, "expires")
+
+    def _get(self, key: str, loader: Callable, expiry_field: str) -> Optional[Dict[str, Any]]:
+        value = self.local.get(key)
+        if value is None and self.redis:
+            try:
+                raw = self.redis.get(key)
+                if raw:
+                    value = json.loads(raw)
+                    self.local.set(key, value, self._ttl(value, expiry_field, L1_TTL_SECONDS))
+            except Exception as e:
+                logger.error(f"Auth cache GET error: {e}")
+
+        if value is not None:
+            self.hits += 1
+            return None if value.get("missing") else value
+
+        self.misses += 1
+        value = loader() or MISSING
+        self._store(key, value, expiry_field)
+        return None if value.get("missing") else value
+
+    def _store(self, key: str, value: Dict[str, Any], expiry_field: str):
+        self.local.set(key, value, self._ttl(value, expiry_field, L1_TTL_SECONDS))
+        if self.redis and not value.get("missing"):
+            ttl = int(self._ttl(value, expiry_field, L2_TTL_SECONDS))
+            if ttl > 0:
+                try:
+                    self.redis.setex(key, ttl, json.dumps(value))
+                except Exception as e:
+                    logger.error(f"Auth cache SET error: {e}")
+
+    @staticmethod
+    def _ttl(value: Dict[str, Any], expiry_field: str, default: int) -> float:
+        """Cache lifetime capped at the expiry of the cached session/subscription"""
+        if value.get("missing"):
+            return min(default, NEGATIVE_TTL_SECONDS)
+        expires = value.get(expiry_field)
+        if expires is None:
+            return default
+        return min(default, expires - time.time())
+
+    # ═══════════════════════════════════════════════════════════════
+    # INVALIDATION
+    # ═══════════════════════════════════════════════════════════════
+
+    def invalidate_sessions(self, tokens: Iterable[str]):
+        """Forget session tokens everywhere (logout, session replaced)"""
+        self._invalidate([_token_key(token) for token in tokens])
+
+    def invalidate_user(self, user_id: str):
+        """Forget a user's cached tier everywhere (subscription change/expiry)"""
+        self._invalidate([_user_key(user_id)])
+
+    def _invalidate(self, keys):
+        if not keys:
+            return
+        for key in keys:
+            self.local.delete(key)
+        if self.redis:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.delete(*keys)
+                pipe.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+                pipe.execute()
+            except Exception as e:
+                logger.error(f"Auth cache invalidation error: {e}")
+
+    def handle_invalidation(self, payload: str):
+        """Evict L1 entries named in a pub/sub message"""
+        try:
+            for key in json.loads(payload):
+                self.local.delete(key)
+        except Exception as e:
+            logger.error(f"Bad auth invalidation message: {e}")
+            self.local.clear()
+
+    def start_listener(self):
+        """Subscribe this worker to invalidation messages (idempotent)"""
+        if not self.redis or self._listener:
+            return
+        try:
+            self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(INVALIDATION_CHANNEL)
+        except Exception as e:
+            logger.warning(f"Auth cache invalidation listener not started: {e}")
+            self._pubsub = None
+            return
+
+        def listen():
+            while self._pubsub is not None:
+                try:
+                    message = self._pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self.handle_invalidation(message["data"])
+                except Exception as e:
+                    # Messages may have been missed: drop L1 and rely on Redis
+                    logger.error(f"Auth invalidation listener error: {e}")
+                    self.local.clear()
+                    time.sleep(1.0)
+
+        self._listener = threading.Thread(target=listen, name="auth-cache-invalidation", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self):
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+        self._listener = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "l1_entries": len(self.local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "redis": bool(self.redis),
+            "listening": self._listener is not None,
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_auth_cache: Optional[AuthCache] = None
+
+
+def get_auth_cache() -> AuthCache:
+    """Get or create AuthCache singleton"""
+    global _auth_cache
+    if _auth_cache is None:
+        _auth_cache = AuthCache(redis_client if REDIS_AVAILABLE else None)
+    return _auth_cache
@@ -0,0 +1,188 @@
+"""
+Chat Message Store - Bucketed message storage for chat sessions
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- Messages live in fixed-size bucket documents, never in one unbounded array
+- Each message gets a per-session sequence number (seq) from an atomic
+  counter on the session document, which also maintains the title
+- Cursor-paginated reads by seq (newest first pages)
+- Sessions created before bucketing keep their embedded `messages`
+  array; those messages are seq 1..N and new ones continue after them
+"""
+
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from utils.database import chat_sessions_collection, chat_message_buckets_collection
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SIZE = int(os.getenv("CHAT_BUCKET_SIZE", "50"))
+DEFAULT_TITLE = "New Conversation"
+TITLE_LENGTH = 50
+
+# Projection for session metadata; the legacy array is only sized, never loaded
+SESSION_META_PROJECTION = {
+    "_id": 1,
+    "session_id": 1,
+    "user_id": 1,
+    "title": 1,
+    "context": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "message_count": {"$ifNull": ["$message_count", {"$size": {"$ifNull": ["$messages", []]}}]},
+    "legacy_count": {"$size": {"$ifNull": ["$messages", []]}},
+}
+
+# Projection for sidebar listings: no context, no messages
+SESSION_LIST_PROJECTION = {
+    "_id": 1,
+    "session_id": 1,
+    "title": 1,
+    "updated_at": 1,
+    "message_count": SESSION_META_PROJECTION["message_count"],
+}
+
+
+def _bucket_for(seq: int) -> int:
+    return (seq - 1) // BUCKET_SIZE
+
+
+def _title_from(content: str) -> str:
+    return content[:TITLE_LENGTH] + "..." if len(content) > TITLE_LENGTH else content
+
+
+def append_message(session_id: str, role: str, content: str) -> Optional[Dict[str, Any]]:
+    """
+    Append a message to a session
+
+    Returns the stored message, or None if the session does not exist.
+    The counter/title update is a single atomic pipeline update; the
+    message is then pushed into its bucket with an upsert.
+    """
+    now = datetime.now(timezone.utc)
+    set_stage: Dict[str, Any] = {
+        "message_count": {"$add": [
+            {"$ifNull": ["$message_count", {"$size": {"$ifNull": ["$messages", []]}}]},
+            1
+        ]},
+        "updated_at": now,
+    }
+    if role == "user":
+        set_stage["title"] = {"$cond": [
+            {"$eq": ["$title", DEFAULT_TITLE]},
+            # User text must never be read as a field path or operator
+            {"$literal": _title_from(content)},
+            "$title"
+        ]}
+
+    session = chat_sessions_collection.find_one_and_update(
+        {"session_id": session_id},
+        [{"$set": set_stage}],
+        projection={"_id": 0, "message_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not session:
+        return None
+
+    seq = session["message_count"]
+    msg_doc = {
+        "id": uuid.uuid4().hex[:8],
+        "seq": seq,
+        "role": role,
+        "content": content,
+        "timestamp": now.isoformat()
+    }
+    chat_message_buckets_collection.update_one(
+        {"session_id": session_id, "bucket": _bucket_for(seq)},
+        {
+            "$push": {"messages": msg_doc},
+            "$inc": {"count": 1},
+            "$set": {"updated_at": now},
+            "$setOnInsert": {"created_at": now}
+        },
+        upsert=True
+    )
+    return msg_doc
+
+
+def get_session_meta(session_id: str) -> Optional[Dict[str, Any]]:
+    """Session metadata without loading any messages"""
+    docs = list(chat_sessions_collection.aggregate([
+        {"$match": {"session_id": session_id}},
+        {"$limit": 1},
+        {"$project": SESSION_META_PROJECTION}
+    ]))
+    return docs[0] if docs else None
+
+
+def get_messages(
+    session_id: str,
+    limit: int = 50,
+    before: Optional[int] = None,
+    meta: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Page of messages ending just before seq `before` (latest page if None)
+
+    Messages are returned oldest-first within the page. `next_cursor`
+    is the value to pass as `before` for the previous (older) page.
+    """
+    meta = meta or get_session_meta(session_id)
+    if not meta:
+        return {"messages": [], "next_cursor": None, "has_more": False}
+
+    total = meta.get("message_count", 0)
+    legacy_count = meta.get("legacy_count", 0)
+    upper = min(total, before - 1) if before else total
+    lower = max(1, upper - limit + 1)
+    if upper < 1:
+        return {"messages": [], "next_cursor": None, "has_more": False}
+
+    messages: List[Dict[str, Any]] = []
+
+    # Pre-bucketing messages embedded in the session document
+    if lower <= legacy_count:
+        legacy_upper = min(upper, legacy_count)
+        doc = chat_sessions_collection.find_one(
+            {"session_id": session_id},
+            {"_id": 0, "messages": {"$slice": [lower - 1, legacy_upper - lower + 1]}}
+        )
+        for offset, message in enumerate((doc or {}).get("messages", [])):
+            messages.append({**message, "seq": lower + offset})
+
+    # Bucketed messages
+    if upper > legacy_count:
+        bucket_lower = max(lower, legacy_count + 1)
+        cursor = chat_message_buckets_collection.find(
+            {
+                "session_id": session_id,
+                "bucket": {"$gte": _bucket_for(bucket_lower), "$lte": _bucket_for(upper)}
+            },
+            {"_id": 0, "messages": 1}
+        ).sort("bucket", 1)
+        for bucket in cursor:
+            messages.extend(
+                m for m in bucket.get("messages", [])
+                if bucket_lower <= m.get("seq", 0) <= upper
+            )
+
+    messages.sort(key=lambda m: m["seq"])
+    has_more = lower > 1
+    return {
+        "messages": messages,
+        "next_cursor": lower if has_more else None,
+        "has_more": has_more,
+    }
+
+
+def delete_session_messages(session_id: str) -> int:
+    """Delete all message buckets of a session"""
+    result = chat_message_buckets_collection.delete_many({"session_id": session_id})
+    return result.deleted_count
@@ -0,0 +1,274 @@
+"""
+Conversation Memory - Server-side rolling chat history for EKA-AI
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- Memory keyed by user id and chat session id (same ids as
+  /api/chat/sessions); a session id alone never reaches another user's
+  history, and rebuilds only read sessions the caller owns
+- Compact window: recent turns plus a running summary of older turns
+- Trimmed by token budget, not by message count alone
+- Redis-backed with TTL, in-process LRU fallback, rebuilt from the
+  Mongo chat session on a cache miss
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Memory configuration
+TOKEN_BUDGET = int(os.getenv("CHAT_MEMORY_TOKEN_BUDGET", "2000"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_MEMORY_SUMMARY_TOKENS", "400"))
+MAX_TURNS = int(os.getenv("CHAT_MEMORY_MAX_TURNS", "20"))
+MEMORY_TTL_SECONDS = int(os.getenv("CHAT_MEMORY_TTL", str(7 * 24 * 3600)))
+LOCAL_CACHE_SIZE = int(os.getenv("CHAT_MEMORY_LOCAL_SIZE", "1000"))
+SUMMARY_LINE_CHARS = 160
+
+_encoder = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count via tiktoken when available, ~4 chars/token otherwise"""
+    global _encoder
+    if not text:
+        return 0
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text))
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class ConversationWindow:
+    """Compact conversation state sent to the LLM"""
+    session_id: str
+    user_id: Optional[str] = None
+    summary: str = ""
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    total_turns: int = 0
+
+    def token_count(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(t["content"]) for t in self.turns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "summary": self.summary,
+            "turns": self.turns,
+            "total_turns": self.total_turns,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationWindow":
+        return cls(
+            session_id=data["session_id"],
+            user_id=data.get("user_id"),
+            summary=data.get("summary", ""),
+            turns=data.get("turns", []),
+            total_turns=data.get("total_turns", len(data.get("turns", []))),
+        )
+
+    def render(self) -> str:
+        """Render as a prompt section (empty string for a new conversation)"""
+        if not self.summary and not self.turns:
+            return ""
+        parts = ["\nConversation so far:"]
+        if self.summary:
+            parts.append(f"Summary of earlier turns:\n{self.summary}")
+        for turn in self.turns:
+            speaker = "User" if turn["role"] == "user" else "EKA-AI"
+            parts.append(f"{speaker}: {turn['content']}")
+        return "\n".join(parts) + "\n"
+
+
+class ConversationMemory:
+    """
+    Rolling conversation memory store
+
+    Windows are cached in Redis (shared across workers) or a bounded
+    in-process LRU when Redis is unavailable. On a cache miss the window
+    is rebuilt from the persisted chat session via `session_loader`,
+    which must only return messages of a session owned by `user_id`.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        session_loader: Optional[Callable[[str, int, Optional[str]], List[Dict[str, str]]]] = None,
+        token_budget: int = TOKEN_BUDGET,
+        summary_budget: int = SUMMARY_TOKEN_BUDGET,
+        max_turns: int = MAX_TURNS,
+        ttl: int = MEMORY_TTL_SECONDS
+    ):
+        self.redis = redis_client
+        self.session_loader = session_loader
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self._local: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(session_id: str, user_id: Optional[str]) -> str:
+        return f"chat:memory:{user_id or 'anonymous'}:{session_id}"
+
+    # ═══════════════════════════════════════════════════════════════
+    # CACHE ACCESS
+    # ═══════════════════════════════════════════════════════════════
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.redis:
+            try:
+                raw = self.redis.get(key)
+                return json.loads(raw) if raw else None
+            except Exception as e:
+                logger.error(f"Conversation memory GET error: {e}")
+        with self._lock:
+            data = self._local.get(key)
+            if data is not None:
+                self._local.move_to_end(key)
+            return data
+
+    def _cache_set(self, window: ConversationWindow):
+        data = window.to_dict()
+        key = self._key(window.session_id, window.user_id)
+        if self.redis:
+            try:
+                self.redis.setex(key, self.ttl, json.dumps(data))
+                return
+            except Exception as e:
+                logger.error(f"Conversation memory SET error: {e}")
+        with self._lock:
+            self._local[key] = data
+            self._local.move_to_end(key)
+            while len(self._local) > LOCAL_CACHE_SIZE:
+                self._local.popitem(last=False)
+
+    # ═══════════════════════════════════════════════════════════════
+    # PUBLIC API
+    # ═══════════════════════════════════════════════════════════════
+
+    def load(self, session_id: str, user_id: Optional[str] = None) -> ConversationWindow:
+        """Load the caller's compact window for a session (empty for a new session)"""
+        cached = self._cache_get(self._key(session_id, user_id))
+        if cached is not None:
+            return ConversationWindow.from_dict(cached)
+
+        window = ConversationWindow(session_id=session_id, user_id=user_id)
+        if self.session_loader:
+            try:
+                for message in self.session_loader(session_id, self.max_turns * 2, user_id):
+                    self._push(window, message["role"], message["content"])
+            except Exception as e:
+                logger.error(f"Conversation memory rebuild failed for {session_id}: {e}")
+        return window
+
+    def append(self, session_id: str, role: str, content: str, user_id: Optional[str] = None) -> ConversationWindow:
+        """Append a turn, trim to budget and write the window back"""
+        window = self.load(session_id, user_id)
+        self._push(window, role, content)
+        self._cache_set(window)
+        return window
+
+    def append_exchange(
+        self,
+        session_id: str,
+        user_text: str,
+        assistant_text: str,
+        window: Optional[ConversationWindow] = None,
+        user_id: Optional[str] = None
+    ) -> ConversationWindow:
+        """Append a user/assistant pair; pass the already loaded window to skip a cache read"""
+        window = window or self.load(session_id, user_id)
+        self._push(window, "user", user_text)
+        self._push(window, "assistant", assistant_text)
+        self._cache_set(window)
+        return window
+
+    def clear(self, session_id: str, user_id: Optional[str] = None):
+        """Forget a session (e.g. when the chat session is deleted)"""
+        key = self._key(session_id, user_id)
+        if self.redis:
+            try:
+                self.redis.delete(key)
+            except Exception as e:
+                logger.error(f"Conversation memory DELETE error: {e}")
+        with self._lock:
+            self._local.pop(key, None)
+
+    # ═══════════════════════════════════════════════════════════════
+    # TRIMMING
+    # ═══════════════════════════════════════════════════════════════
+
+    def _push(self, window: ConversationWindow, role: str, content: str):
+        window.turns.append({
+            "role": "user" if role == "user" else "assistant",
+            "content": content or "",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        })
+        window.total_turns += 1
+        self._trim(window)
+
+    def _trim(self, window: ConversationWindow):
+        """Fold the oldest turns into the summary until the window fits"""
+        while len(window.turns) > 1 and (
+            len(window.turns) > self.max_turns or window.token_count() > self.token_budget
+        ):
+            evicted = window.turns.pop(0)
+            window.summary = self._fold_into_summary(window.summary, evicted)
+
+    def _fold_into_summary(self, summary: str, turn: Dict[str, str]) -> str:
+        """Extractive summary: one clipped line per evicted turn, oldest lines dropped first"""
+        speaker = "User" if turn["role"] == "user" else "EKA-AI"
+        text = " ".join(turn["content"].split())
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[:SUMMARY_LINE_CHARS].rstrip() + "..."
+        lines = [line for line in summary.split("\n") if line] + [f"- {speaker}: {text}"]
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_budget:
+            lines.pop(0)
+        return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_conversation_memory: Optional[ConversationMemory] = None
+
+
+def _load_session_messages(session_id: str, limit: int, user_id: Optional[str]) -> List[Dict[str, str]]:
+    """Last `limit` messages of a persisted chat session owned by user_id"""
+    from services.chat_store import get_messages, get_session_meta
+    meta = get_session_meta(session_id)
+    if not meta or user_id is None or meta.get("user_id") != user_id:
+        return []
+    return get_messages(session_id, limit=limit, meta=meta)["messages"]
+
+
+def get_conversation_memory() -> ConversationMemory:
+    """Get or create the shared ConversationMemory singleton"""
+    global _conversation_memory
+    if _conversation_memory is None:
+        try:
+            from config.redis_client import redis_client
+        except Exception:
+            redis_client = None
+        _conversation_memory = ConversationMemory(
+            redis_client=redis_client,
+            session_loader=_load_session_messages
+        )
+    return _conversation_memory
@@ -0,0 +1,228 @@
+"""
+GST Engine - Vectorized GST computation over integer paise
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- Amounts are fixed-point int64 arrays: prices in paise, quantities in
+  thousandths, GST rates in basis points, so no float rounding is involved
+- Every rounding step is ROUND_HALF_UP on exact integers, giving the same
+  paise as calculate_invoice_totals() / InvoiceItem.calculate_amounts()
+- compute_gst_bulk() returns per-line amounts, invoice_totals() per-invoice
+  totals, for any number of invoices in one call
+- bulk_invoice_totals() is a drop-in for calling calculate_invoice_totals()
+  once per invoice; gst_rate_summary() aggregates rate-wise for reports
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+from services.billing import calculate_invoice_totals
+
+logger = logging.getLogger(__name__)
+
+# Try to import NumPy for vectorized computation
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not available. Bulk GST computation falls back to Decimal.")
+
+PRICE_SCALE = 100       # paise per rupee
+QTY_SCALE = 1000        # quantities to 3 decimals
+RATE_SCALE = 100        # GST rate percent -> basis points
+
+# Intermediate products (quantity x price, taxable x rate) must stay in int64
+_INT64_LIMIT = 2 ** 62
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is required for bulk GST computation")
+
+
+def to_fixed(values: Sequence[Any], scale: int) -> "np.ndarray":
+    """
+    Convert amounts (numbers, numeric strings or Decimals) to int64 units of 1/scale
+
+    Raises ValueError if a value has more precision than the scale allows,
+    since the Decimal path would then round differently.
+    """
+    _require_numpy()
+    floats = np.asarray(values, dtype=np.float64) * scale
+    if floats.size and not np.all(np.abs(floats) < 2 ** 53):
+        raise ValueError("Amount too large for exact fixed-point conversion")
+    fixed = np.rint(floats)
+    # A few ulps of slack absorbs the binary representation of e.g. 0.1
+    if not np.all(np.abs(floats - fixed) <= 4 * np.spacing(np.abs(floats)) + 1e-9):
+        raise ValueError(f"Amounts must have at most {len(str(scale)) - 1} decimal places")
+    return fixed.astype(np.int64)
+
+
+def _div_half_up(numerator: "np.ndarray", denominator: int) -> "np.ndarray":
+    """Integer division rounding halves away from zero (Decimal ROUND_HALF_UP)"""
+    quotient, remainder = np.divmod(np.abs(numerator), denominator)
+    quotient += 2 * remainder >= denominator
+    return np.where(numerator < 0, -quotient, quotient)
+
+
+def _check_range(a: "np.ndarray", b: "np.ndarray"):
+    if a.size and float(np.max(np.abs(a))) * float(np.max(np.abs(b))) >= _INT64_LIMIT:
+        raise ValueError("Line amounts exceed the int64 range of the GST engine")
+
+
+# ═══════════════════════════════════════════════════════════════
+# LINE ARRAYS
+# ═══════════════════════════════════════════════════════════════
+
+@dataclass
+class GSTLines:
+    """Invoice lines flattened into fixed-point arrays"""
+    quantity: "np.ndarray"          # thousandths
+    unit_price: "np.ndarray"        # paise
+    gst_rate: "np.ndarray"          # basis points
+    discount: "np.ndarray"          # paise
+    is_interstate: "np.ndarray"     # bool per line
+    offsets: "np.ndarray"           # invoice i owns lines offsets[i]:offsets[i + 1]
+
+    @property
+    def invoice_count(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def from_invoices(
+        cls,
+        invoices: List[Dict[str, Any]],
+        workshop_state: str,
+        apply_discount: bool = False
+    ) -> "GSTLines":
+        """
+        Flatten invoices ({"customer_state": ..., "items": [...]}) into arrays
+
+        Items use the calculate_invoice_totals() keys: quantity, unit_price,
+        gst_rate. With apply_discount, discount_amount is subtracted from the
+        taxable value as in InvoiceItem.calculate_amounts().
+        """
+        _require_numpy()
+        items = [item for invoice in invoices for item in invoice.get("items", [])]
+        counts = np.fromiter((len(invoice.get("items", [])) for invoice in invoices), np.int64, len(invoices))
+        offsets = np.zeros(len(invoices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        interstate = np.fromiter(
+            (invoice.get("customer_state") != workshop_state for invoice in invoices), bool, len(invoices)
+        )
+
+        def column(key: str, scale: int) -> "np.ndarray":
+            return to_fixed([item.get(key, 0) for item in items], scale)
+
+        return cls(
+            quantity=column("quantity", QTY_SCALE),
+            unit_price=column("unit_price", PRICE_SCALE),
+            gst_rate=column("gst_rate", RATE_SCALE),
+            discount=column("discount_amount", PRICE_SCALE) if apply_discount else np.zeros(len(items), np.int64),
+            is_interstate=np.repeat(interstate, counts),
+            offsets=offsets
+        )
+
+
+# ═══════════════════════════════════════════════════════════════
+# COMPUTATION
+# ═══════════════════════════════════════════════════════════════
+
+def compute_gst_bulk(lines: GSTLines) -> Dict[str, "np.ndarray"]:
+    """Per-line taxable value and tax split, all int64 paise"""
+    _require_numpy()
+    _check_range(lines.quantity, lines.unit_price)
+    taxable = _div_half_up(lines.quantity * lines.unit_price - lines.discount * QTY_SCALE, QTY_SCALE)
+    _check_range(taxable, lines.gst_rate)
+    tax = _div_half_up(taxable * lines.gst_rate, 100 * RATE_SCALE)
+    # Intrastate: each half rounded on its own, as in calculate_gst()
+    half = _div_half_up(tax, 2)
+    zero = np.zeros_like(tax)
+    return {
+        "taxable_value": taxable,
+        "tax_amount": tax,
+        "igst_amount": np.where(lines.is_interstate, tax, zero),
+        "cgst_amount": np.where(lines.is_interstate, zero, half),
+        "sgst_amount": np.where(lines.is_interstate, zero, half),
+    }
+
+
+def invoice_totals(lines: GSTLines, computed: Dict[str, "np.ndarray"]) -> Dict[str, "np.ndarray"]:
+    """Per-invoice sums of compute_gst_bulk() output, int64 paise"""
+    totals = {}
+    for key in ("taxable_value", "tax_amount", "igst_amount", "cgst_amount", "sgst_amount"):
+        running = np.concatenate(([0], np.cumsum(computed[key])))
+        totals[key] = running[lines.offsets[1:]] - running[lines.offsets[:-1]]
+    totals["grand_total"] = totals["taxable_value"] + totals["tax_amount"]
+    return totals
+
+
+def bulk_invoice_totals(invoices: List[Dict[str, Any]], workshop_state: str) -> List[Dict[str, Any]]:
+    """
+    calculate_invoice_totals() for many invoices in one vectorized pass
+
+    Each invoice is {"customer_state": ..., "items": [...]}; the result list
+    holds exactly what calculate_invoice_totals() returns for each of them.
+    """
+    if not NUMPY_AVAILABLE:
+        return [
+            calculate_invoice_totals(invoice.get("items", []), workshop_state, invoice.get("customer_state"))
+            for invoice in invoices
+        ]
+
+    lines = GSTLines.from_invoices(invoices, workshop_state)
+    computed = compute_gst_bulk(lines)
+    totals = invoice_totals(lines, computed)
+    # Paise -> rupees once, as Python floats
+    line_values = {key: (values / PRICE_SCALE).tolist() for key, values in computed.items()}
+    total_values = {key: (values / PRICE_SCALE).tolist() for key, values in totals.items()}
+
+    results = []
+    for i, invoice in enumerate(invoices):
+        start = int(lines.offsets[i])
+        is_interstate = bool(lines.is_interstate[start]) if lines.offsets[i + 1] > start \
+            else invoice.get("customer_state") != workshop_state
+        results.append({
+            "tax_type": "IGST" if is_interstate else "CGST_SGST",
+            "total_taxable_value": total_values["taxable_value"][i],
+            "total_tax_amount": total_values["tax_amount"][i],
+            "grand_total": total_values["grand_total"][i],
+            "is_interstate": is_interstate,
+            "items": [
+                {**item, **{key: values[start + j] for key, values in line_values.items()}}
+                for j, item in enumerate(invoice.get("items", []))
+            ]
+        })
+    return results
+
+
+def gst_rate_summary(
+    invoices: List[Dict[str, Any]],
+    workshop_state: str,
+    apply_discount: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Rate-wise taxable value and tax across invoices (GST return style)
+
+    Returns one row per GST rate, ascending, with rupee amounts.
+    """
+    lines = GSTLines.from_invoices(invoices, workshop_state, apply_discount=apply_discount)
+    computed = compute_gst_bulk(lines)
+    rates, group = np.unique(lines.gst_rate, return_inverse=True)
+
+    sums = {}
+    for key, values in computed.items():
+        sums[key] = np.zeros(len(rates), dtype=np.int64)
+        np.add.at(sums[key], group, values)
+    line_counts = np.bincount(group, minlength=len(rates))
+
+    return [
+        {
+            "gst_rate": int(rate) / RATE_SCALE,
+            "line_count": int(line_counts[i]),
+            **{key: int(sums[key][i]) / PRICE_SCALE for key in computed},
+        }
+        for i, rate in enumerate(rates)
+    ]
@@ -9,7 +9,7 @@ Features:
 - Credit/Debit note support
 """
 
-from datetime import datetime, timezone, date
+from datetime import datetime, timezone, date, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from decimal import Decimal, ROUND_HALF_UP
@@ -18,15 +18,34 @@ import uuid
 import logging
 import os
 
+from services.audit_pipeline import get_audit_pipeline
+from services.pdf_renderer import enqueue_pdf_task, get_pdf_renderer, WEASYPRINT_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
-# Try to import WeasyPrint for PDF generation
-try:
-    from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
-    logger.warning("WeasyPrint not available. PDF generation will be disabled.")
+# Invoices created per create_invoices_batch RPC call
+INVOICE_BATCH_SIZE = 200
+
+# Invoice stylesheet, parsed once per renderer process
+INVOICE_PDF_CSS = """
+@page { size: A4; margin: 2cm; }
+body { font-family: Arial, sans-serif; font-size: 10pt; line-height: 1.4; }
+.header { text-align: center; border-bottom: 2px solid #333; padding-bottom: 10px; margin-bottom: 20px; }
+.header h1 { margin: 0; color: #333; }
+.workshop-info { text-align: center; margin-bottom: 20px; }
+.invoice-details { display: flex; justify-content: space-between; margin-bottom: 20px; }
+.section { margin-bottom: 15px; }
+.section h3 { margin: 0 0 5px 0; color: #555; border-bottom: 1px solid #ddd; }
+table { width: 100%; border-collapse: collapse; margin: 10px 0; }
+th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+th { background-color: #f5f5f5; font-weight: bold; }
+.totals { margin-top: 20px; text-align: right; }
+.totals table { width: 50%; margin-left: auto; }
+.totals td { border: none; padding: 5px; }
+.grand-total { font-size: 14pt; font-weight: bold; color: #333; }
+.footer { margin-top: 30px; padding-top: 10px; border-top: 1px solid #ddd; text-align: center; font-size: 9pt; color: #666; }
+.gst-badge { background: #f18a22; color: white; padding: 2px 8px; border-radius: 3px; font-size: 8pt; }
+"""
 
 
 class InvoiceStatus(str, Enum):
@@ -203,6 +222,7 @@ class InvoiceManager:
         self.items_table = "invoice_items"
         self.sequences_table = "invoice_sequences"
         self.audit_table = "audit_logs"
+        self.audit = get_audit_pipeline(supabase_client, self.audit_table)
         
         # Default invoice prefix
         self.default_prefix = os.environ.get("INVOICE_PREFIX", "G4G")
@@ -221,44 +241,18 @@ class InvoiceManager:
         
         Format: PREFIX-YYYY-XXXXX (e.g., G4G-2026-00001)
         
+        One allocate_invoice_numbers RPC (a single upsert ... RETURNING on
+        invoice_sequences). create_invoice numbers inside its insert RPC
+        instead; this is for callers that need a number up front.
+        
         Returns:
             (success: bool, invoice_number or error message)
         """
         try:
-            current_year = datetime.now().year
             use_prefix = prefix or self.default_prefix
-            fiscal_year = str(current_year)
-            
-            # Get or create sequence
-            result = self.supabase.table(self.sequences_table)\
-                .select("*")\
-                .eq("workshop_id", workshop_id)\
-                .eq("fiscal_year", fiscal_year)\
-                .execute()
+            fiscal_year = str(datetime.now().year)
             
-            if result.data:
-                # Update existing sequence
-                sequence = result.data[0]
-                new_number = sequence["last_number"] + 1
-                
-                self.supabase.table(self.sequences_table)\
-                    .update({
-                        "last_number": new_number,
-                        "updated_at": datetime.now(timezone.utc).isoformat()
-                    })\
-                    .eq("workshop_id", workshop_id)\
-                    .eq("fiscal_year", fiscal_year)\
-                    .execute()
-            else:
-                # Create new sequence
-                new_number = 1
-                self.supabase.table(self.sequences_table).insert({
-                    "workshop_id": workshop_id,
-                    "fiscal_year": fiscal_year,
-                    "last_number": new_number,
-                    "prefix": use_prefix,
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }).execute()
+            new_number = self._allocate_invoice_numbers(workshop_id, fiscal_year, use_prefix, 1)
             
             # Format: PREFIX-YYYY-XXXXX
             invoice_number = f"{use_prefix}-{fiscal_year}-{new_number:05d}"
@@ -269,6 +263,16 @@ class InvoiceManager:
             logger.error(f"Error generating invoice number: {e}")
             return False, str(e)
     
+    def _allocate_invoice_numbers(self, workshop_id: str, fiscal_year: str, prefix: str, count: int) -> int:
+        """First number of a freshly reserved block of `count` numbers"""
+        result = self.supabase.rpc("allocate_invoice_numbers", {
+            "p_workshop_id": workshop_id,
+            "p_fiscal_year": fiscal_year,
+            "p_count": count,
+            "p_prefix": prefix
+        }).execute()
+        return int(result.data)
+    
     # ═══════════════════════════════════════════════════════════════
     # INVOICE CRUD
     # ═══════════════════════════════════════════════════════════════
@@ -303,86 +307,98 @@ class InvoiceManager:
             (success: bool, result: dict with invoice or error)
         """
         try:
-            # Generate invoice number
-            success, invoice_number = self.generate_invoice_number(workshop_id)
-            if not success:
-                return False, {"error": f"Failed to generate invoice number: {invoice_number}"}
-            
-            # Determine tax type
-            tax_type = TaxType.IGST if workshop_state != customer_state else TaxType.CGST_SGST
-            
-            # Create invoice object
-            invoice_id = str(uuid.uuid4())
-            invoice = Invoice(
-                id=invoice_id,
+            invoice = self._build_invoice(
                 job_card_id=job_card_id,
                 workshop_id=workshop_id,
-                invoice_number=invoice_number,
-                customer_gstin=customer_details.get("customer_gstin"),
-                customer_name=customer_details.get("customer_name", ""),
-                customer_address=customer_details.get("customer_address", ""),
-                customer_phone=customer_details.get("customer_phone"),
-                customer_email=customer_details.get("customer_email"),
-                tax_type=tax_type,
+                invoice_number="",
+                customer_details=customer_details,
+                items=items,
+                workshop_state=workshop_state,
+                customer_state=customer_state,
                 generated_by=generated_by,
                 notes=notes,
-                due_date=date.today() + __import__("datetime").timedelta(days=due_days)
+                due_days=due_days
             )
             
-            # Process items
-            invoice.items = self._process_invoice_items(items, invoice_id)
-            
-            # Calculate totals
-            invoice.calculate_totals()
-            
-            # Save to database
-            invoice_data = {
-                "id": invoice.id,
-                "job_card_id": invoice.job_card_id,
-                "workshop_id": invoice.workshop_id,
-                "invoice_number": invoice.invoice_number,
-                "customer_gstin": invoice.customer_gstin,
-                "customer_name": invoice.customer_name,
-                "customer_address": invoice.customer_address,
-                "tax_type": invoice.tax_type.value,
-                "total_taxable_value": float(invoice.total_taxable_value),
-                "total_tax_amount": float(invoice.total_tax_amount),
-                "grand_total": float(invoice.grand_total),
-                "status": invoice.status.value,
-                "due_date": invoice.due_date.isoformat() if invoice.due_date else None,
-                "generated_at": invoice.generated_at.isoformat(),
-                "generated_by": invoice.generated_by,
-                "notes": invoice.notes
-            }
-            
-            result = self.supabase.table(self.invoices_table).insert(invoice_data).execute()
-            
-            if not result.data:
+            # Number allocation, invoice, items and audit commit together,
+            # so a failed insert never burns an invoice number
+            if not self._insert_numbered(
+                workshop_id, [invoice], str(datetime.now().year), self.default_prefix, generated_by
+            ):
                 return False, {"error": "Failed to create invoice"}
             
-            # Save items
-            for item in invoice.items:
-                item.id = str(uuid.uuid4())
-                item_data = item.to_dict()
-                item_data["id"] = item.id
-                self.supabase.table(self.items_table).insert(item_data).execute()
-            
-            # Log audit
-            self._log_audit(
-                workshop_id=workshop_id,
-                user_id=generated_by,
-                action="CREATE_INVOICE",
-                entity_type="INVOICE",
-                entity_id=invoice_id,
-                new_values={"invoice_number": invoice_number, "amount": float(invoice.grand_total)}
-            )
-            
             return True, {"invoice": invoice.to_dict()}
             
         except Exception as e:
             logger.error(f"Error creating invoice: {e}")
             return False, {"error": str(e)}
     
+    def create_invoices_batch(
+        self,
+        workshop_id: str,
+        invoices: List[Dict[str, Any]],
+        workshop_state: str,
+        generated_by: Optional[str] = None,
+        due_days: int = 15,
+        prefix: Optional[str] = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Create many invoices for one workshop (month-end fleet runs)
+        
+        Each chunk of INVOICE_BATCH_SIZE invoices is one create_invoices_batch
+        RPC: a single block of invoice numbers, one insert for the invoices,
+        one for all their items and one for the audit rows, in one
+        transaction. Numbers are contiguous within a chunk, in input order.
+        
+        Args:
+            workshop_id: Workshop ID
+            invoices: List of dicts with job_card_id, customer_details,
+                items, customer_state and optional notes (as create_invoice)
+            workshop_state: Workshop state code (2-digit)
+            generated_by: User ID
+            due_days: Days until due
+            prefix: Invoice number prefix (defaults to INVOICE_PREFIX)
+        
+        Returns:
+            (success: bool, result: dict with invoices and count, or error)
+        """
+        try:
+            use_prefix = prefix or self.default_prefix
+            fiscal_year = str(datetime.now().year)
+            
+            built = [
+                self._build_invoice(
+                    job_card_id=entry["job_card_id"],
+                    workshop_id=workshop_id,
+                    invoice_number="",
+                    customer_details=entry.get("customer_details", {}),
+                    items=entry.get("items", []),
+                    workshop_state=workshop_state,
+                    customer_state=entry.get("customer_state", workshop_state),
+                    generated_by=generated_by,
+                    notes=entry.get("notes"),
+                    due_days=due_days
+                )
+                for entry in invoices
+            ]
+            
+            created = []
+            for start in range(0, len(built), INVOICE_BATCH_SIZE):
+                chunk = built[start:start + INVOICE_BATCH_SIZE]
+                if not self._insert_numbered(workshop_id, chunk, fiscal_year, use_prefix, generated_by):
+                    return False, {
+                        "error": "Failed to create invoice batch",
+                        "invoices": created,
+                        "count": len(created)
+                    }
+                created.extend(invoice.to_dict() for invoice in chunk)
+            
+            return True, {"invoices": created, "count": len(created)}
+            
+        except Exception as e:
+            logger.error(f"Error creating invoice batch: {e}")
+            return False, {"error": str(e)}
+    
     def get_invoice(
         self,
         invoice_id: str,
@@ -535,6 +551,9 @@ class InvoiceManager:
                 entity_id=invoice_id
             )
             
+            # Pre-render in the background so downloads hit the PDF cache
+            enqueue_pdf_task("workers.tasks.generate_invoice_pdf", invoice_id, workshop_id)
+            
             return True, {"success": True, "status": InvoiceStatus.SENT.value}
             
         except Exception as e:
@@ -617,9 +636,8 @@ class InvoiceManager:
             # Generate HTML
             html_content = self._generate_invoice_html(invoice_data, workshop_details)
             
-            # Generate PDF
-            html = HTML(string=html_content)
-            pdf_bytes = html.write_pdf()
+            # Render in the shared renderer pool (cached by content hash)
+            pdf_bytes = get_pdf_renderer().render(html_content, INVOICE_PDF_CSS)
             
             return True, pdf_bytes
             
@@ -627,6 +645,14 @@ class InvoiceManager:
             logger.error(f"Error generating PDF: {e}")
             return False, str(e).encode()
     
+    def build_pdf_document(
+        self,
+        invoice: Dict[str, Any],
+        workshop_details: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, str]:
+        """HTML and stylesheet for an invoice dict, as passed to the PDF renderer"""
+        return self._generate_invoice_html(invoice, workshop_details), INVOICE_PDF_CSS
+    
     def _generate_invoice_html(
         self,
         invoice: Dict[str, Any],
@@ -672,25 +698,6 @@ class InvoiceManager:
         <head>
             <meta charset="utf-8">
             <title>Invoice {invoice['invoice_number']}</title>
-            <style>
-                @page {{ size: A4; margin: 2cm; }}
-                body {{ font-family: Arial, sans-serif; font-size: 10pt; line-height: 1.4; }}
-                .header {{ text-align: center; border-bottom: 2px solid #333; padding-bottom: 10px; margin-bottom: 20px; }}
-                .header h1 {{ margin: 0; color: #333; }}
-                .workshop-info {{ text-align: center; margin-bottom: 20px; }}
-                .invoice-details {{ display: flex; justify-content: space-between; margin-bottom: 20px; }}
-                .section {{ margin-bottom: 15px; }}
-                .section h3 {{ margin: 0 0 5px 0; color: #555; border-bottom: 1px solid #ddd; }}
-                table {{ width: 100%; border-collapse: collapse; margin: 10px 0; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f5f5f5; font-weight: bold; }}
-                .totals {{ margin-top: 20px; text-align: right; }}
-                .totals table {{ width: 50%; margin-left: auto; }}
-                .totals td {{ border: none; padding: 5px; }}
-                .grand-total {{ font-size: 14pt; font-weight: bold; color: #333; }}
-                .footer {{ margin-top: 30px; padding-top: 10px; border-top: 1px solid #ddd; text-align: center; font-size: 9pt; color: #666; }}
-                .gst-badge {{ background: #f18a22; color: white; padding: 2px 8px; border-radius: 3px; font-size: 8pt; }}
-            </style>
         </head>
         <body>
             <div class="header">
@@ -764,6 +771,96 @@ class InvoiceManager:
     # PRIVATE HELPERS
     # ═══════════════════════════════════════════════════════════════
     
+    def _build_invoice(
+        self,
+        job_card_id: str,
+        workshop_id: str,
+        invoice_number: str,
+        customer_details: Dict[str, Any],
+        items: List[Dict[str, Any]],
+        workshop_state: str,
+        customer_state: str,
+        generated_by: Optional[str] = None,
+        notes: Optional[str] = None,
+        due_days: int = 15
+    ) -> Invoice:
+        """Invoice object with processed items and calculated totals"""
+        # Determine tax type
+        tax_type = TaxType.IGST if workshop_state != customer_state else TaxType.CGST_SGST
+        
+        invoice_id = str(uuid.uuid4())
+        invoice = Invoice(
+            id=invoice_id,
+            job_card_id=job_card_id,
+            workshop_id=workshop_id,
+            invoice_number=invoice_number,
+            customer_gstin=customer_details.get("customer_gstin"),
+            customer_name=customer_details.get("customer_name", ""),
+            customer_address=customer_details.get("customer_address", ""),
+            customer_phone=customer_details.get("customer_phone"),
+            customer_email=customer_details.get("customer_email"),
+            tax_type=tax_type,
+            generated_by=generated_by,
+            notes=notes,
+            due_date=date.today() + timedelta(days=due_days)
+        )
+        
+        invoice.items = self._process_invoice_items(items, invoice_id)
+        invoice.calculate_totals()
+        return invoice
+    
+    def _invoice_row(self, invoice: Invoice) -> Dict[str, Any]:
+        """invoices table row for an Invoice"""
+        return {
+            "id": invoice.id,
+            "job_card_id": invoice.job_card_id,
+            "workshop_id": invoice.workshop_id,
+            "invoice_number": invoice.invoice_number,
+            "customer_gstin": invoice.customer_gstin,
+            "customer_name": invoice.customer_name,
+            "customer_address": invoice.customer_address,
+            "tax_type": invoice.tax_type.value,
+            "total_taxable_value": float(invoice.total_taxable_value),
+            "total_tax_amount": float(invoice.total_tax_amount),
+            "grand_total": float(invoice.grand_total),
+            "status": invoice.status.value,
+            "due_date": invoice.due_date.isoformat() if invoice.due_date else None,
+            "generated_at": invoice.generated_at.isoformat(),
+            "generated_by": invoice.generated_by,
+            "notes": invoice.notes
+        }
+    
+    def _insert_numbered(
+        self,
+        workshop_id: str,
+        invoices: List[Invoice],
+        fiscal_year: str,
+        prefix: str,
+        generated_by: Optional[str] = None
+    ) -> bool:
+        """
+        Number and insert invoices with their items and audit rows in one
+        create_invoices_batch transaction; sets invoice_number on success
+        """
+        payload = [
+            {**self._invoice_row(invoice), "items": [item.to_dict() for item in invoice.items]}
+            for invoice in invoices
+        ]
+        result = self.supabase.rpc("create_invoices_batch", {
+            "p_workshop_id": workshop_id,
+            "p_fiscal_year": fiscal_year,
+            "p_prefix": prefix,
+            "p_invoices": payload,
+            "p_generated_by": generated_by
+        }).execute()
+        
+        numbers = {row["id"]: row["invoice_number"] for row in result.data or []}
+        if len(numbers) != len(invoices):
+            return False
+        for invoice in invoices:
+            invoice.invoice_number = numbers[invoice.id]
+        return True
+    
     def _process_invoice_items(
         self,
         items_data: List[Dict[str, Any]],
@@ -798,19 +895,16 @@ class InvoiceManager:
         old_values: Optional[Dict] = None,
         new_values: Optional[Dict] = None
     ):
-        """Log audit entry"""
-        try:
-            self.supabase.table(self.audit_table).insert({
-                "workshop_id": workshop_id,
-                "user_id": user_id,
-                "action": action,
-                "entity_type": entity_type,
-                "entity_id": entity_id,
-                "old_values": old_values,
-                "new_values": new_values
-            }).execute()
-        except Exception as e:
-            logger.error(f"Error logging audit: {e}")
+        """Queue audit entry for the shared batched writer"""
+        self.audit.record({
+            "workshop_id": workshop_id,
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "old_values": old_values,
+            "new_values": new_values
+        })
 
 
 # ═══════════════════════════════════════════════════════════════
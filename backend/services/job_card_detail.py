@@ -0,0 +1,222 @@
+"""
+Job Card Detail - Concurrent assembly of the job card detail view
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- Independent lookups (vehicle, customer, services, parts, timeline,
+  notes, photos, documents, signature) issued concurrently on the
+  async Mongo client, so latency is the slowest query rather than the sum
+- Each query projects only the fields the view renders
+- Related cards are the only dependent lookup (needs the vehicle)
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.database import async_db, serialize_doc
+
+SERVICE_PROJECTION = {
+    "service_type": 1, "description": 1, "technician": 1, "priority": 1,
+    "status": 1, "estimated_time": 1, "actual_time": 1, "cost": 1,
+}
+PART_PROJECTION = {
+    "name": 1, "part_number": 1, "category": 1, "quantity": 1, "unit_price": 1,
+    "total": 1, "warranty": 1, "availability": 1, "availability_note": 1,
+}
+TIMELINE_PROJECTION = {"timestamp": 1, "description": 1, "actor": 1, "status": 1}
+NOTE_PROJECTION = {"author": 1, "timestamp": 1, "text": 1, "is_ai": 1, "attachments": 1}
+RELATED_PROJECTION = {"job_card_number": 1, "created_at": 1, "details": 1}
+RELATED_LIMIT = 5
+
+
+def _iso(value: Any, default: Any = "") -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return default if value is None else value
+
+
+def _default_vehicle(job_card: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "registration_number": job_card.get("vehicle_registration", "N/A"),
+        "make": "Unknown",
+        "model": job_card.get("vehicle_model", "Unknown"),
+        "variant": None,
+        "year": 2022,
+        "fuel_type": "Petrol",
+        "chassis_vin": None,
+        "engine_number": None,
+        "odometer_reading": 0,
+        "color": "Unknown",
+        "insurance_valid_till": None,
+        "puc_valid_till": None,
+        "last_service_date": None,
+        "last_service_km": None,
+        "tyre_condition": None
+    }
+
+
+def _default_customer(job_card: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": job_card.get("customer_name", "Unknown"),
+        "phone": job_card.get("phone", "N/A"),
+        "email": job_card.get("email"),
+        "address": None,
+        "total_visits": 1,
+        "lifetime_value": job_card.get("estimated_cost", 0) or 0,
+        "rating": 0,
+        "member_since": None,
+        "preferences": []
+    }
+
+
+async def _find(collection: str, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None,
+                sort: Optional[str] = None, limit: int = 0) -> List[Dict[str, Any]]:
+    cursor = async_db[collection].find(query, projection)
+    if sort:
+        cursor = cursor.sort(sort, 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list(length=limit or None)
+
+
+async def build_job_card_detail(job_card: Dict[str, Any]) -> Dict[str, Any]:
+    """Assemble the detail view for an already fetched job card document"""
+    job_card_id_str = str(job_card["_id"])
+    by_card = {"job_card_id": job_card_id_str}
+
+    vehicle_task = asyncio.ensure_future(async_db["vehicles"].find_one(by_card))
+
+    async def related_cards() -> List[Dict[str, Any]]:
+        vehicle = await vehicle_task
+        registration = (vehicle or _default_vehicle(job_card)).get("registration_number")
+        if not registration:
+            return []
+        return await _find(
+            "job_cards",
+            {"vehicle_registration": registration, "_id": {"$ne": job_card["_id"]}},
+            RELATED_PROJECTION,
+            limit=RELATED_LIMIT
+        )
+
+    (vehicle, customer, services, parts, timeline, notes,
+     photos, documents, signature, related_cards_found) = await asyncio.gather(
+        vehicle_task,
+        async_db["customers"].find_one(by_card),
+        _find("services", by_card, SERVICE_PROJECTION),
+        _find("parts", by_card, PART_PROJECTION),
+        _find("job_card_timeline", by_card, TIMELINE_PROJECTION, sort="timestamp"),
+        _find("job_card_notes", by_card, NOTE_PROJECTION, sort="timestamp"),
+        _find("files", {**by_card, "category": "vehicle_photo"}),
+        _find("files", {**by_card, "category": {"$ne": "vehicle_photo"}}),
+        async_db["signatures"].find_one(by_card),
+        related_cards(),
+    )
+
+    vehicle = serialize_doc(vehicle) if vehicle else _default_vehicle(job_card)
+    customer = serialize_doc(customer) if customer else _default_customer(job_card)
+
+    services_list = [{
+        "id": str(svc["_id"]),
+        "service_type": svc.get("service_type", "General Service"),
+        "description": svc.get("description", ""),
+        "technician": svc.get("technician", "Unassigned"),
+        "priority": svc.get("priority", "normal"),
+        "status": svc.get("status", "queued"),
+        "estimated_time": svc.get("estimated_time", "1h 00m"),
+        "actual_time": svc.get("actual_time"),
+        "cost": svc.get("cost", 0)
+    } for svc in services]
+
+    parts_list = [{
+        "id": str(part["_id"]),
+        "name": part.get("name", "Unknown Part"),
+        "part_number": part.get("part_number", "N/A"),
+        "category": part.get("category", "General"),
+        "quantity": part.get("quantity", "1"),
+        "unit_price": part.get("unit_price", 0),
+        "total": part.get("total", 0),
+        "warranty": part.get("warranty"),
+        "availability": part.get("availability", "in-stock"),
+        "availability_note": part.get("availability_note")
+    } for part in parts]
+
+    # Calculate payment
+    parts_total = sum(p.get("total", 0) for p in parts_list)
+    services_total = sum(s.get("cost", 0) for s in services_list)
+    subtotal = parts_total + services_total
+    cgst = round(subtotal * 0.09, 2)
+    sgst = round(subtotal * 0.09, 2)
+    grand_total = subtotal + cgst + sgst
+
+    payment = {
+        "subtotal": subtotal,
+        "discounts": job_card.get("discounts", []),
+        "cgst": cgst,
+        "sgst": sgst,
+        "igst": 0,
+        "grand_total": grand_total,
+        "amount_paid": job_card.get("amount_paid", 0),
+        "balance_due": grand_total - job_card.get("amount_paid", 0),
+        "payment_status": job_card.get("payment_status", "pending"),
+        "payment_mode": job_card.get("payment_mode"),
+        "transaction_id": job_card.get("transaction_id"),
+        "paid_on": job_card.get("paid_on")
+    }
+
+    timeline_list = [{
+        "id": str(entry["_id"]),
+        "timestamp": _iso(entry.get("timestamp")),
+        "description": entry.get("description", ""),
+        "actor": entry.get("actor", "System"),
+        "status": entry.get("status", "completed")
+    } for entry in timeline]
+
+    notes_list = [{
+        "id": str(note["_id"]),
+        "author": note.get("author", "Unknown"),
+        "timestamp": _iso(note.get("timestamp")),
+        "text": note.get("text", ""),
+        "is_ai": note.get("is_ai", False),
+        "attachments": note.get("attachments", [])
+    } for note in notes]
+
+    related = [{
+        "id": str(rc["_id"]),
+        "job_card_number": rc.get("job_card_number", f"JC-{str(rc['_id'])[-5:]}"),
+        "date": _iso(rc.get("created_at")),
+        "service": rc.get("details", "Service"),
+        "relation": "Same vehicle",
+        "badge": "Previous",
+        "badge_variant": "info"
+    } for rc in related_cards_found]
+
+    return {
+        "id": job_card_id_str,
+        "job_card_number": job_card.get("job_card_number", f"JC-{job_card_id_str[-5:].upper()}"),
+        "status": job_card.get("status", "Pending"),
+        "priority": job_card.get("priority", "normal"),
+        "created_at": _iso(job_card.get("created_at")),
+        "updated_at": _iso(job_card.get("updated_at")),
+        "created_by": job_card.get("created_by", "System"),
+        "bay_number": job_card.get("bay_number"),
+        "technician": job_card.get("technician"),
+        "promised_delivery": job_card.get("promised_delivery"),
+
+        "vehicle": vehicle,
+        "customer": customer,
+        "services": services_list,
+        "parts": parts_list,
+        "payment": payment,
+        "timeline": timeline_list,
+        "notes": notes_list,
+
+        "pre_inspection": job_card.get("pre_inspection", {}),
+        "photos": [serialize_doc(p) for p in photos],
+        "documents": [serialize_doc(d) for d in documents],
+        "related_job_cards": related,
+
+        "approval_status": job_card.get("approval_status", "pending"),
+        "signature": serialize_doc(signature) if signature else None,
+        "feedback": job_card.get("feedback")
+    }
@@ -11,21 +11,42 @@ Features:
 """
 
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple, Union
+from dataclasses import dataclass
 from enum import Enum
+import hashlib
+import os
+import re
 import uuid
 import logging
 
+from utils.pagination import encode_cursor, decode_cursor
+from utils.ttl_cache import TTLCache
+from services.audit_pipeline import get_audit_pipeline
+from services.pdf_renderer import enqueue_pdf_task, get_pdf_renderer, WEASYPRINT_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
-# Try to import WeasyPrint for PDF generation
-try:
-    from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
-    logger.warning("WeasyPrint not available. PDF generation will be disabled.")
+# Job card report stylesheet, parsed once per renderer process
+JOB_CARD_PDF_CSS = """
+@page { size: A4; margin: 2cm; }
+body { font-family: Arial, sans-serif; font-size: 10pt; line-height: 1.4; color: #333; }
+.header { text-align: center; border-bottom: 3px solid #f18a22; padding-bottom: 10px; margin-bottom: 20px; }
+.header h1 { margin: 0; color: #333; font-size: 24pt; }
+.workshop-info { text-align: center; margin-bottom: 20px; }
+.section { margin-bottom: 15px; border: 1px solid #ddd; padding: 10px; border-radius: 5px; }
+.section h3 { margin: 0 0 10px 0; color: #f18a22; border-bottom: 1px solid #eee; padding-bottom: 5px; }
+.two-col { display: flex; justify-content: space-between; }
+.col { width: 48%; }
+table { width: 100%; border-collapse: collapse; margin: 10px 0; }
+th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+th { background-color: #f5f5f5; font-weight: bold; }
+.status-badge { background: #f18a22; color: white; padding: 3px 10px; border-radius: 3px; font-weight: bold; }
+.footer { margin-top: 30px; padding-top: 10px; border-top: 2px solid #f18a22; text-align: center; font-size: 9pt; color: #666; }
+.vehicle-info { background: #f9f9f9; padding: 10px; border-radius: 5px; margin-bottom: 15px; }
+.vehicle-info p { margin: 5px 0; }
+ul { margin: 5px 0; padding-left: 20px; }
+"""
 
 
 class JobStatus(str, Enum):
@@ -51,6 +72,29 @@ class JobPriority(str, Enum):
     CRITICAL = "CRITICAL"
 
 
+# Columns returned by list views (full rows via full=True or get_job_card)
+LIST_COLUMNS = (
+    "id,workshop_id,vehicle_id,registration_number,status,priority,"
+    "customer_phone,technician_id,created_at,updated_at"
+)
+
+
+# Cards read and moved per transition_job_cards call in transition_many
+TRANSITION_BATCH_SIZE = 200
+
+# Approval links: only the SHA-256 digest of a token is stored and queried.
+# Digests that matched nothing are remembered briefly so scanners hammering
+# random tokens are answered from memory instead of the database.
+APPROVAL_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,128}$")
+INVALID_TOKEN_TTL = int(os.getenv("APPROVAL_TOKEN_NEGATIVE_TTL", "60"))
+_invalid_tokens = TTLCache(max_entries=50000)
+
+
+def hash_approval_token(token: str) -> str:
+    """Hex SHA-256 digest stored in job_cards.approval_token_hash"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 # Valid FSM Transitions
 VALID_TRANSITIONS: Dict[JobStatus, List[JobStatus]] = {
     JobStatus.CREATED: [JobStatus.CONTEXT_VERIFIED],
@@ -80,33 +124,122 @@ class VehicleContext:
     owner_phone: Optional[str] = None
 
 
-@dataclass
+# Allowed target states per state, as JSON-ready tuples shared by every card
+ALLOWED_TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+    state.value: tuple(target.value for target in targets)
+    for state, targets in VALID_TRANSITIONS.items()
+}
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _format_timestamp(value: Any) -> Optional[str]:
+    # Rows from the database already carry ISO 8601 strings
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+class _LazyTimestamp:
+    """Holds a datetime or ISO string; strings are parsed on first read"""
+
+    def __set_name__(self, owner, name):
+        self.slot = "_" + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if isinstance(value, str):
+            value = _parse_timestamp(value)
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+
 class JobCard:
-    """Job Card data structure"""
-    id: str
-    vehicle_id: Optional[str]
-    workshop_id: str
-    registration_number: str
-    status: JobStatus = JobStatus.CREATED
-    priority: JobPriority = JobPriority.NORMAL
-    symptoms: List[str] = field(default_factory=list)
-    diagnosis: Optional[Dict[str, Any]] = None
-    estimate: Optional[Dict[str, Any]] = None
-    customer_phone: Optional[str] = None
-    customer_email: Optional[str] = None
-    technician_id: Optional[str] = None
-    notes: Optional[str] = None
-    approval_token: Optional[str] = None
-    approval_expires_at: Optional[datetime] = None
-    customer_approved_at: Optional[datetime] = None
-    sent_for_approval_at: Optional[datetime] = None
-    started_at: Optional[datetime] = None
-    closed_at: Optional[datetime] = None
-    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_by: Optional[str] = None
-    status_notes: Optional[str] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    """Job Card record (slotted; timestamps parsed only when accessed)"""
+
+    __slots__ = (
+        "id", "vehicle_id", "workshop_id", "registration_number", "status", "priority",
+        "symptoms", "diagnosis", "estimate", "customer_phone", "customer_email",
+        "technician_id", "notes", "approval_token", "updated_by", "status_notes", "metadata",
+        "_approval_expires_at", "_customer_approved_at", "_sent_for_approval_at",
+        "_started_at", "_closed_at", "_created_at", "_updated_at",
+    )
+
+    approval_expires_at = _LazyTimestamp()
+    customer_approved_at = _LazyTimestamp()
+    sent_for_approval_at = _LazyTimestamp()
+    started_at = _LazyTimestamp()
+    closed_at = _LazyTimestamp()
+    created_at = _LazyTimestamp()
+    updated_at = _LazyTimestamp()
+
+    def __init__(
+        self,
+        id: str,
+        vehicle_id: Optional[str],
+        workshop_id: str,
+        registration_number: str,
+        status: JobStatus = JobStatus.CREATED,
+        priority: JobPriority = JobPriority.NORMAL,
+        symptoms: Optional[List[str]] = None,
+        diagnosis: Optional[Dict[str, Any]] = None,
+        estimate: Optional[Dict[str, Any]] = None,
+        customer_phone: Optional[str] = None,
+        customer_email: Optional[str] = None,
+        technician_id: Optional[str] = None,
+        notes: Optional[str] = None,
+        approval_token: Optional[str] = None,
+        approval_expires_at: Union[datetime, str, None] = None,
+        customer_approved_at: Union[datetime, str, None] = None,
+        sent_for_approval_at: Union[datetime, str, None] = None,
+        started_at: Union[datetime, str, None] = None,
+        closed_at: Union[datetime, str, None] = None,
+        created_at: Union[datetime, str, None] = None,
+        updated_at: Union[datetime, str, None] = None,
+        updated_by: Optional[str] = None,
+        status_notes: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.id = id
+        self.vehicle_id = vehicle_id
+        self.workshop_id = workshop_id
+        self.registration_number = registration_number
+        self.status = status
+        self.priority = priority
+        self.symptoms = symptoms if symptoms is not None else []
+        self.diagnosis = diagnosis
+        self.estimate = estimate
+        self.customer_phone = customer_phone
+        self.customer_email = customer_email
+        self.technician_id = technician_id
+        self.notes = notes
+        self.approval_token = approval_token
+        self._approval_expires_at = approval_expires_at
+        self._customer_approved_at = customer_approved_at
+        self._sent_for_approval_at = sent_for_approval_at
+        self._started_at = started_at
+        self._closed_at = closed_at
+        if created_at is None or updated_at is None:
+            now = datetime.now(timezone.utc)
+            created_at = created_at or now
+            updated_at = updated_at or now
+        self._created_at = created_at
+        self._updated_at = updated_at
+        self.updated_by = updated_by
+        self.status_notes = status_notes
+        self.metadata = metadata if metadata is not None else {}
+
+    def __repr__(self) -> str:
+        return f"JobCard(id={self.id!r}, status={self.status.value!r}, workshop_id={self.workshop_id!r})"
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for API response"""
@@ -124,20 +257,55 @@ class JobCard:
             "customer_email": self.customer_email,
             "technician_id": self.technician_id,
             "notes": self.notes,
-            "approval_expires_at": self.approval_expires_at.isoformat() if self.approval_expires_at else None,
-            "customer_approved_at": self.customer_approved_at.isoformat() if self.customer_approved_at else None,
-            "sent_for_approval_at": self.sent_for_approval_at.isoformat() if self.sent_for_approval_at else None,
-            "started_at": self.started_at.isoformat() if self.started_at else None,
-            "closed_at": self.closed_at.isoformat() if self.closed_at else None,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
+            "approval_expires_at": _format_timestamp(self._approval_expires_at),
+            "customer_approved_at": _format_timestamp(self._customer_approved_at),
+            "sent_for_approval_at": _format_timestamp(self._sent_for_approval_at),
+            "started_at": _format_timestamp(self._started_at),
+            "closed_at": _format_timestamp(self._closed_at),
+            "created_at": _format_timestamp(self._created_at),
+            "updated_at": _format_timestamp(self._updated_at),
             "updated_by": self.updated_by,
             "status_notes": self.status_notes,
             "metadata": self.metadata,
-            "allowed_transitions": [t.value for t in VALID_TRANSITIONS.get(self.status, [])]
+            "allowed_transitions": ALLOWED_TRANSITIONS.get(self.status.value, ())
         }
 
 
+def job_card_row_to_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    JobCard.to_dict() output built straight from a job_cards row
+    
+    List endpoints use this to skip constructing a JobCard per row; string
+    timestamps pass through untouched.
+    """
+    return {
+        "id": row["id"],
+        "vehicle_id": row.get("vehicle_id"),
+        "workshop_id": row["workshop_id"],
+        "registration_number": row["registration_number"],
+        "status": row["status"],
+        "priority": row.get("priority", JobPriority.NORMAL.value),
+        "symptoms": row.get("symptoms", []),
+        "diagnosis": row.get("diagnosis"),
+        "estimate": row.get("estimate"),
+        "customer_phone": row.get("customer_phone"),
+        "customer_email": row.get("customer_email"),
+        "technician_id": row.get("technician_id"),
+        "notes": row.get("notes"),
+        "approval_expires_at": _format_timestamp(row.get("approval_expires_at")),
+        "customer_approved_at": _format_timestamp(row.get("customer_approved_at")),
+        "sent_for_approval_at": _format_timestamp(row.get("sent_for_approval_at")),
+        "started_at": _format_timestamp(row.get("started_at")),
+        "closed_at": _format_timestamp(row.get("closed_at")),
+        "created_at": _format_timestamp(row["created_at"]),
+        "updated_at": _format_timestamp(row["updated_at"]),
+        "updated_by": row.get("updated_by"),
+        "status_notes": row.get("status_notes"),
+        "metadata": row.get("metadata", {}),
+        "allowed_transitions": ALLOWED_TRANSITIONS.get(row["status"], ())
+    }
+
+
 class JobCardManager:
     """
     Job Card Manager - Core business logic for workshop job cards
@@ -154,6 +322,8 @@ class JobCardManager:
         self.table = "job_cards"
         self.states_table = "job_card_states"
         self.audit_table = "audit_logs"
+        self.audit = get_audit_pipeline(supabase_client, self.audit_table)
+        self.counters_table = "job_card_counters"
     
     # ═══════════════════════════════════════════════════════════════
     # CRUD OPERATIONS
@@ -197,6 +367,7 @@ class JobCardManager:
                 "updated_by": created_by
             }
             
+            # job_card_counters is bumped by trigger in the same transaction
             result = self.supabase.table(self.table).insert(job_data).execute()
             
             if not result.data:
@@ -252,6 +423,32 @@ class JobCardManager:
             logger.error(f"Error fetching job card: {e}")
             return False, {"error": str(e)}
     
+    def find_by_approval_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Raw job_cards row for an unexpired approval token, or None
+        
+        One probe of the unique approval_token_hash index with expiry
+        filtered by the same query; misses are negatively cached.
+        """
+        if not token or not APPROVAL_TOKEN_PATTERN.match(token):
+            return None
+        
+        token_hash = hash_approval_token(token)
+        if _invalid_tokens.get(token_hash):
+            return None
+        
+        result = self.supabase.table(self.table)\
+            .select("*")\
+            .eq("approval_token_hash", token_hash)\
+            .gt("approval_expires_at", datetime.now(timezone.utc).isoformat())\
+            .limit(1)\
+            .execute()
+        
+        if not result.data:
+            _invalid_tokens.set(token_hash, True, INVALID_TOKEN_TTL)
+            return None
+        return result.data[0]
+    
     def get_job_card_by_token(
         self,
         token: str
@@ -263,20 +460,11 @@ class JobCardManager:
             (success: bool, result: dict with job_card or error)
         """
         try:
-            result = self.supabase.table(self.table)\
-                .select("*")\
-                .eq("approval_token", token)\
-                .execute()
-            
-            if not result.data:
-                return False, {"error": "Invalid token"}
-            
-            job_card = self._dict_to_job_card(result.data[0])
-            
-            # Check if token expired
-            if job_card.approval_expires_at and job_card.approval_expires_at < datetime.now(timezone.utc):
-                return False, {"error": "Token expired"}
+            row = self.find_by_approval_token(token)
+            if row is None:
+                return False, {"error": "Invalid or expired token"}
             
+            job_card = self._dict_to_job_card(row)
             return True, {"job_card": job_card.to_dict()}
             
         except Exception as e:
@@ -290,18 +478,27 @@ class JobCardManager:
         technician_id: Optional[str] = None,
         priority: Optional[JobPriority] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        full: bool = False,
+        count_mode: Optional[str] = "planned"
     ) -> Tuple[bool, Dict[str, Any]]:
         """
-        List job cards with filters
+        List job cards with filters, newest first
+        
+        Pages by keyset on (created_at, id): pass the returned next_cursor
+        to get the next page. `offset` is only used without a cursor.
+        count_mode: "planned"/"estimated" (from planner statistics),
+        "exact" (full count, slow on large workshops) or None (no total).
         
         Returns:
             (success: bool, result: dict with job_cards, count, pagination)
         """
         try:
-            query = self.supabase.table(self.table)\
-                .select("*", count="exact")\
-                .eq("workshop_id", workshop_id)
+            columns = "*" if full else LIST_COLUMNS
+            table = self.supabase.table(self.table)
+            query = table.select(columns, count=count_mode) if count_mode else table.select(columns)
+            query = query.eq("workshop_id", workshop_id)
             
             if status:
                 query = query.eq("status", status.value)
@@ -310,19 +507,35 @@ class JobCardManager:
             if priority:
                 query = query.eq("priority", priority.value)
             
-            query = query.order("created_at", desc=True)
-            query = query.range(offset, offset + limit - 1)
+            if cursor:
+                created_at, last_id = decode_cursor(cursor)
+                # Quoted: timestamps contain PostgREST reserved characters
+                query = query.or_(
+                    f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id})'
+                )
+            
+            query = query.order("created_at", desc=True).order("id", desc=True)
+            if cursor or not offset:
+                query = query.limit(limit + 1)
+            else:
+                query = query.range(offset, offset + limit)
             
             result = query.execute()
             
-            job_cards = [self._dict_to_job_card(row).to_dict() for row in result.data]
-            count = result.count if result.count else len(job_cards)
+            rows = result.data[:limit]
+            next_page = None
+            if len(result.data) > limit:
+                next_page = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+            
+            job_cards = [job_card_row_to_dict(row) for row in rows] if full else rows
             
             return True, {
                 "job_cards": job_cards,
-                "count": count,
+                "count": result.count if count_mode and result.count is not None else len(job_cards),
                 "limit": limit,
-                "offset": offset
+                "offset": offset,
+                "next_cursor": next_page,
+                "has_more": next_page is not None
             }
             
         except Exception as e:
@@ -402,6 +615,10 @@ class JobCardManager:
         """
         Transition job card to new state with FSM validation
         
+        The update, state history and audit entry are written by one
+        transition_job_cards RPC, conditional on the card still being in
+        the state it was validated in.
+        
         Returns:
             (success: bool, result: dict with transition details or error)
         """
@@ -414,86 +631,152 @@ class JobCardManager:
             job_card = self._dict_to_job_card(result["job_card"])
             current_state = job_card.status
             
-            # Validate transition
-            allowed_states = VALID_TRANSITIONS.get(current_state, [])
-            if target_state not in allowed_states:
-                return False, {
-                    "error": "Invalid state transition",
-                    "code": "INVALID_TRANSITION",
-                    "current": current_state.value,
-                    "requested": target_state.value,
-                    "allowed": [s.value for s in allowed_states]
-                }
-            
-            # Check state-specific requirements
-            requirement_check = self._check_state_requirements(job_card, target_state)
-            if not requirement_check["valid"]:
-                return False, {
-                    "error": f"State requirements not met: {requirement_check['message']}",
-                    "code": "REQUIREMENTS_NOT_MET",
-                    "requirements": requirement_check["requirements"]
-                }
+            error = self._validate_transition(job_card, target_state)
+            if error:
+                return False, error
             
-            # Build update data
-            now = datetime.now(timezone.utc)
-            update_data = {
-                "status": target_state.value,
-                "updated_at": now.isoformat(),
-                "updated_by": updated_by,
-                "status_notes": notes
-            }
-            
-            # Add state-specific timestamps
-            if target_state == JobStatus.CUSTOMER_APPROVAL:
-                update_data["sent_for_approval_at"] = now.isoformat()
-            elif target_state == JobStatus.IN_PROGRESS:
-                update_data["started_at"] = now.isoformat()
-            elif target_state == JobStatus.CLOSED:
-                update_data["closed_at"] = now.isoformat()
-            
-            # Execute update
-            result = self.supabase.table(self.table)\
-                .update(update_data)\
-                .eq("id", job_id)\
-                .eq("workshop_id", workshop_id)\
-                .execute()
-            
-            if not result.data:
-                return False, {"error": "Job card not found or access denied"}
-            
-            # Log state change in history table
-            self._log_state_change(
-                job_id=job_id,
-                previous_state=current_state,
-                new_state=target_state,
-                changed_by=updated_by,
+            rows = self._apply_transitions(
+                workshop_id=workshop_id,
+                items=[{"id": job_id, "expected": current_state.value}],
+                target_state=target_state,
+                updated_by=updated_by,
                 notes=notes
             )
             
-            # Log audit
-            self._log_audit(
-                workshop_id=workshop_id,
-                user_id=updated_by,
-                action="STATE_TRANSITION",
-                entity_type="JOB_CARD",
-                entity_id=job_id,
-                old_values={"status": current_state.value},
-                new_values={"status": target_state.value, "notes": notes}
-            )
+            if not rows:
+                return False, {
+                    "error": "Job card state changed concurrently, reload and retry",
+                    "code": "STATE_CONFLICT",
+                    "expected": current_state.value
+                }
             
-            job_card = self._dict_to_job_card(result.data[0])
+            job_card = self._dict_to_job_card(rows[0])
             return True, {
                 "success": True,
                 "job_card": job_card.to_dict(),
                 "previous_state": current_state.value,
                 "new_state": target_state.value,
-                "allowed_transitions": [t.value for t in VALID_TRANSITIONS.get(target_state, [])]
+                "allowed_transitions": ALLOWED_TRANSITIONS[target_state.value]
             }
             
         except Exception as e:
             logger.error(f"Error transitioning job card state: {e}")
             return False, {"error": str(e)}
     
+    def transition_many(
+        self,
+        job_ids: List[str],
+        target_state: JobStatus,
+        workshop_id: str,
+        updated_by: Optional[str] = None,
+        notes: Optional[str] = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Move many job cards to one state (e.g. close all INVOICED cards)
+        
+        Cards are read and validated in batches of TRANSITION_BATCH_SIZE and
+        each batch is applied by a single RPC. Cards that fail validation or
+        changed state meanwhile are reported in "failed"; the rest move.
+        
+        Returns:
+            (success: bool, result: dict with transitioned cards and failures)
+        """
+        try:
+            transitioned = []
+            failed = []
+            
+            for start in range(0, len(job_ids), TRANSITION_BATCH_SIZE):
+                batch = list(dict.fromkeys(job_ids[start:start + TRANSITION_BATCH_SIZE]))
+                result = self.supabase.table(self.table)\
+                    .select("*")\
+                    .eq("workshop_id", workshop_id)\
+                    .in_("id", batch)\
+                    .execute()
+                found = {row["id"]: self._dict_to_job_card(row) for row in result.data}
+                
+                items = []
+                for job_id in batch:
+                    job_card = found.get(job_id)
+                    if job_card is None:
+                        failed.append({"id": job_id, "error": "Job card not found", "code": "NOT_FOUND"})
+                        continue
+                    error = self._validate_transition(job_card, target_state)
+                    if error:
+                        failed.append({"id": job_id, **error})
+                        continue
+                    items.append({"id": job_id, "expected": job_card.status.value})
+                
+                if not items:
+                    continue
+                
+                rows = self._apply_transitions(workshop_id, items, target_state, updated_by, notes)
+                moved = {row["id"] for row in rows}
+                transitioned.extend(job_card_row_to_dict(row) for row in rows)
+                failed.extend(
+                    {"id": item["id"], "error": "Job card state changed concurrently", "code": "STATE_CONFLICT"}
+                    for item in items if item["id"] not in moved
+                )
+            
+            return True, {
+                "success": True,
+                "new_state": target_state.value,
+                "transitioned": transitioned,
+                "failed": failed
+            }
+            
+        except Exception as e:
+            logger.error(f"Error transitioning job cards: {e}")
+            return False, {"error": str(e)}
+    
+    def _validate_transition(
+        self,
+        job_card: JobCard,
+        target_state: JobStatus
+    ) -> Optional[Dict[str, Any]]:
+        """Error dict if the FSM or state requirements forbid the transition"""
+        allowed_states = VALID_TRANSITIONS.get(job_card.status, [])
+        if target_state not in allowed_states:
+            return {
+                "error": "Invalid state transition",
+                "code": "INVALID_TRANSITION",
+                "current": job_card.status.value,
+                "requested": target_state.value,
+                "allowed": [s.value for s in allowed_states]
+            }
+        
+        requirement_check = self._check_state_requirements(job_card, target_state)
+        if not requirement_check["valid"]:
+            return {
+                "error": f"State requirements not met: {requirement_check['message']}",
+                "code": "REQUIREMENTS_NOT_MET",
+                "requirements": requirement_check["requirements"]
+            }
+        return None
+    
+    def _apply_transitions(
+        self,
+        workshop_id: str,
+        items: List[Dict[str, str]],
+        target_state: JobStatus,
+        updated_by: Optional[str] = None,
+        notes: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Run transition_job_cards; returns the rows that actually moved"""
+        result = self.supabase.rpc("transition_job_cards", {
+            "p_workshop_id": workshop_id,
+            "p_items": items,
+            "p_target_status": target_state.value,
+            "p_updated_by": updated_by,
+            "p_notes": notes
+        }).execute()
+        rows = result.data or []
+        
+        if target_state == JobStatus.CLOSED:
+            # Final job card report is rendered off the request path
+            for row in rows:
+                enqueue_pdf_task("workers.tasks.generate_job_card_pdf", row["id"], workshop_id)
+        return rows
+    
     def get_valid_transitions(
         self,
         job_id: str,
@@ -511,12 +794,11 @@ class JobCardManager:
                 return False, result
             
             current_state = JobStatus(result["job_card"]["status"])
-            allowed = VALID_TRANSITIONS.get(current_state, [])
             
             return True, {
                 "job_id": job_id,
                 "current_state": current_state.value,
-                "allowed_transitions": [t.value for t in allowed],
+                "allowed_transitions": ALLOWED_TRANSITIONS[current_state.value],
                 "all_states": [s.value for s in JobStatus]
             }
             
@@ -539,12 +821,17 @@ class JobCardManager:
         """
         Set approval token for customer approval
         
+        Only the token's digest is stored; the caller keeps the token for
+        the approval link.
+        
         Returns:
             (success: bool, result: dict)
         """
         try:
+            token_hash = hash_approval_token(token)
             update_data = {
-                "approval_token": token,
+                "approval_token": None,
+                "approval_token_hash": token_hash,
                 "approval_expires_at": expires_at.isoformat(),
                 "updated_at": datetime.now(timezone.utc).isoformat(),
                 "updated_by": updated_by
@@ -559,6 +846,8 @@ class JobCardManager:
             if not result.data:
                 return False, {"error": "Job card not found or access denied"}
             
+            _invalid_tokens.delete(token_hash)
+            
             self._log_audit(
                 workshop_id=workshop_id,
                 user_id=updated_by,
@@ -651,22 +940,21 @@ class JobCardManager:
         """
         Get job card statistics for a workshop
         
+        Reads the materialized job_card_counters rows (one per status,
+        maintained by a trigger on job_cards) instead of scanning cards.
+        
         Returns:
             (success: bool, result: dict with stats)
         """
         try:
-            # Get counts by status
-            result = self.supabase.table(self.table)\
-                .select("status")\
+            result = self.supabase.table(self.counters_table)\
+                .select("status,count")\
                 .eq("workshop_id", workshop_id)\
                 .execute()
             
-            status_counts = {}
-            for row in result.data:
-                status = row["status"]
-                status_counts[status] = status_counts.get(status, 0) + 1
+            status_counts = {row["status"]: row["count"] for row in result.data if row["count"]}
             
-            total = len(result.data)
+            total = sum(status_counts.values())
             active = sum(count for status, count in status_counts.items() 
                         if status not in [JobStatus.CLOSED.value, JobStatus.CANCELLED.value])
             
@@ -681,6 +969,31 @@ class JobCardManager:
             logger.error(f"Error getting workshop stats: {e}")
             return False, {"error": str(e)}
     
+    def reconcile_counters(
+        self,
+        workshop_id: Optional[str] = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Rebuild materialized status counters from job_cards
+        
+        Args:
+            workshop_id: Limit to one workshop (all workshops if None)
+        
+        Returns:
+            (success: bool, result: dict with rows rebuilt)
+        """
+        try:
+            result = self.supabase.rpc(
+                "reconcile_job_card_counters",
+                {"p_workshop_id": workshop_id}
+            ).execute()
+            
+            return True, {"rows": result.data, "workshop_id": workshop_id}
+            
+        except Exception as e:
+            logger.error(f"Error reconciling job card counters: {e}")
+            return False, {"error": str(e)}
+    
     def get_state_history(
         self,
         job_id: str,
@@ -728,7 +1041,7 @@ class JobCardManager:
     # ═══════════════════════════════════════════════════════════════
     
     def _dict_to_job_card(self, data: Dict[str, Any]) -> JobCard:
-        """Convert dictionary to JobCard dataclass"""
+        """Convert dictionary to JobCard (timestamps stay strings until read)"""
         return JobCard(
             id=data["id"],
             vehicle_id=data.get("vehicle_id"),
@@ -744,13 +1057,13 @@ class JobCardManager:
             technician_id=data.get("technician_id"),
             notes=data.get("notes"),
             approval_token=data.get("approval_token"),
-            approval_expires_at=datetime.fromisoformat(data["approval_expires_at"].replace("Z", "+00:00")) if data.get("approval_expires_at") else None,
-            customer_approved_at=datetime.fromisoformat(data["customer_approved_at"].replace("Z", "+00:00")) if data.get("customer_approved_at") else None,
-            sent_for_approval_at=datetime.fromisoformat(data["sent_for_approval_at"].replace("Z", "+00:00")) if data.get("sent_for_approval_at") else None,
-            started_at=datetime.fromisoformat(data["started_at"].replace("Z", "+00:00")) if data.get("started_at") else None,
-            closed_at=datetime.fromisoformat(data["closed_at"].replace("Z", "+00:00")) if data.get("closed_at") else None,
-            created_at=datetime.fromisoformat(data["created_at"].replace("Z", "+00:00")),
-            updated_at=datetime.fromisoformat(data["updated_at"].replace("Z", "+00:00")),
+            approval_expires_at=data.get("approval_expires_at"),
+            customer_approved_at=data.get("customer_approved_at"),
+            sent_for_approval_at=data.get("sent_for_approval_at"),
+            started_at=data.get("started_at"),
+            closed_at=data.get("closed_at"),
+            created_at=data["created_at"],
+            updated_at=data["updated_at"],
             updated_by=data.get("updated_by"),
             status_notes=data.get("status_notes"),
             metadata=data.get("metadata", {})
@@ -837,19 +1150,16 @@ class JobCardManager:
         old_values: Optional[Dict] = None,
         new_values: Optional[Dict] = None
     ):
-        """Log audit entry"""
-        try:
-            self.supabase.table(self.audit_table).insert({
-                "workshop_id": workshop_id,
-                "user_id": user_id,
-                "action": action,
-                "entity_type": entity_type,
-                "entity_id": entity_id,
-                "old_values": old_values,
-                "new_values": new_values
-            }).execute()
-        except Exception as e:
-            logger.error(f"Error logging audit: {e}")
+        """Queue audit entry for the shared batched writer"""
+        self.audit.record({
+            "workshop_id": workshop_id,
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "old_values": old_values,
+            "new_values": new_values
+        })
     
     # ═══════════════════════════════════════════════════════════════
     # PDF REPORT GENERATION
@@ -887,9 +1197,8 @@ class JobCardManager:
             # Generate HTML
             html_content = self._generate_job_card_html(job_card, state_history, workshop_details)
             
-            # Generate PDF
-            html = HTML(string=html_content)
-            pdf_bytes = html.write_pdf()
+            # Render in the shared renderer pool (cached by content hash)
+            pdf_bytes = get_pdf_renderer().render(html_content, JOB_CARD_PDF_CSS)
             
             return True, pdf_bytes
             
@@ -954,25 +1263,6 @@ class JobCardManager:
         <head>
             <meta charset="utf-8">
             <title>Job Card {job_card.get('id', 'N/A')[:8]}</title>
-            <style>
-                @page {{ size: A4; margin: 2cm; }}
-                body {{ font-family: Arial, sans-serif; font-size: 10pt; line-height: 1.4; color: #333; }}
-                .header {{ text-align: center; border-bottom: 3px solid #f18a22; padding-bottom: 10px; margin-bottom: 20px; }}
-                .header h1 {{ margin: 0; color: #333; font-size: 24pt; }}
-                .workshop-info {{ text-align: center; margin-bottom: 20px; }}
-                .section {{ margin-bottom: 15px; border: 1px solid #ddd; padding: 10px; border-radius: 5px; }}
-                .section h3 {{ margin: 0 0 10px 0; color: #f18a22; border-bottom: 1px solid #eee; padding-bottom: 5px; }}
-                .two-col {{ display: flex; justify-content: space-between; }}
-                .col {{ width: 48%; }}
-                table {{ width: 100%; border-collapse: collapse; margin: 10px 0; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f5f5f5; font-weight: bold; }}
-                .status-badge {{ background: #f18a22; color: white; padding: 3px 10px; border-radius: 3px; font-weight: bold; }}
-                .footer {{ margin-top: 30px; padding-top: 10px; border-top: 2px solid #f18a22; text-align: center; font-size: 9pt; color: #666; }}
-                .vehicle-info {{ background: #f9f9f9; padding: 10px; border-radius: 5px; margin-bottom: 15px; }}
-                .vehicle-info p {{ margin: 5px 0; }}
-                ul {{ margin: 5px 0; padding-left: 20px; }}
-            </style>
         </head>
         <body>
             <div class="header">
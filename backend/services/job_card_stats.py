@@ -0,0 +1,107 @@
+"""
+Job Card Statistics - Single-aggregation status counts for EKA-AI
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- One $group over job_cards instead of a count_documents per bucket
+- Legacy status spellings ("Pending", "pending", "In-Progress", ...)
+  normalized inside the pipeline
+- Results cached briefly per workshop (JOB_STATS_TTL seconds)
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+from utils.database import job_cards_collection, invoices_collection
+from utils.ttl_cache import TTLCache
+
+JOB_STATS_TTL = int(os.getenv("JOB_STATS_TTL", "15"))
+
+# Normalized status (upper case, "-" -> "_") aliases for legacy values
+STATUS_ALIASES = {
+    "PENDING": "CREATED",
+    "COMPLETED": "CLOSED",
+}
+
+# Summary buckets over normalized statuses
+PENDING_STATUSES = ("CREATED",)
+IN_PROGRESS_STATUSES = ("IN_PROGRESS", "DIAGNOSED", "ESTIMATED")
+COMPLETED_STATUSES = ("CLOSED", "INVOICED")
+CANCELLED_STATUSES = ("CANCELLED",)
+
+_stats_cache = TTLCache(max_entries=1000)
+
+
+def _normalized_status_pipeline(match: Dict[str, Any]) -> list:
+    normalized = {"$replaceAll": {
+        "input": {"$toUpper": {"$ifNull": ["$status", "UNKNOWN"]}},
+        "find": "-",
+        "replacement": "_"
+    }}
+    return [
+        {"$match": match},
+        {"$project": {"_id": 0, "status": normalized}},
+        {"$group": {
+            "_id": {"$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$status", legacy]}, "then": canonical}
+                    for legacy, canonical in STATUS_ALIASES.items()
+                ],
+                "default": "$status"
+            }},
+            "count": {"$sum": 1}
+        }}
+    ]
+
+
+def get_status_counts(workshop_id: Optional[str] = None) -> Dict[str, int]:
+    """Job card count per normalized status, cached per workshop"""
+    key = workshop_id or "*"
+    counts = _stats_cache.get(key)
+    if counts is None:
+        match = {"workshop_id": workshop_id} if workshop_id else {}
+        counts = {
+            row["_id"]: row["count"]
+            for row in job_cards_collection.aggregate(_normalized_status_pipeline(match))
+        }
+        _stats_cache.set(key, counts, JOB_STATS_TTL)
+    return counts
+
+
+def get_job_card_stats(workshop_id: Optional[str] = None) -> Dict[str, Any]:
+    """Summary buckets used by the job card stats and dashboard endpoints"""
+    counts = get_status_counts(workshop_id)
+
+    def total(statuses) -> int:
+        return sum(counts.get(status, 0) for status in statuses)
+
+    pending = total(PENDING_STATUSES)
+    in_progress = total(IN_PROGRESS_STATUSES)
+    return {
+        "total": sum(counts.values()),
+        "pending": pending,
+        "in_progress": in_progress,
+        "completed": total(COMPLETED_STATUSES),
+        "cancelled": total(CANCELLED_STATUSES),
+        "active": pending + in_progress,
+        "by_status": {
+            "CUSTOMER_APPROVAL": counts.get("CUSTOMER_APPROVAL", 0),
+            "PDI": counts.get("PDI", 0),
+            "PDI_COMPLETED": counts.get("PDI_COMPLETED", 0),
+            "CREATED": counts.get("CREATED", 0),
+            "IN_PROGRESS": counts.get("IN_PROGRESS", 0),
+            "COMPLETED": counts.get("CLOSED", 0),
+        },
+    }
+
+
+def get_paid_revenue(workshop_id: Optional[str] = None) -> float:
+    """Sum of paid invoice totals computed in the database"""
+    match: Dict[str, Any] = {"status": "Paid"}
+    if workshop_id:
+        match["workshop_id"] = workshop_id
+    rows = list(invoices_collection.aggregate([
+        {"$match": match},
+        {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$total_amount", 0]}}}}
+    ]))
+    return rows[0]["total"] if rows else 0
@@ -0,0 +1,154 @@
+"""
+Job Card Views - Denormalized read model for the job card detail view
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- One job_card_views document per card holding the assembled detail view,
+  so reads are a single _id fetch
+- Writers mark the view stale (bumping its generation) and schedule a
+  rebuild; reads never serve a stale view, they rebuild inline instead
+- A rebuild only lands if no write happened while it was assembling
+  (generation check), so a slow rebuild cannot overwrite newer data
+- Optional change-stream watcher (JOB_CARD_VIEWS_CHANGE_STREAM=true,
+  replica set required) for writes made outside the routers
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from fastapi import BackgroundTasks
+from pymongo.errors import DuplicateKeyError
+
+from utils.database import async_db, job_card_views_collection
+from services.job_card_detail import build_job_card_detail
+
+logger = logging.getLogger(__name__)
+
+# Bump when build_job_card_detail output changes; older views are rebuilt on read
+VIEW_SCHEMA = 1
+
+CHANGE_STREAM_ENABLED = os.getenv("JOB_CARD_VIEWS_CHANGE_STREAM", "false").lower() == "true"
+
+# Collections whose documents carry job_card_id and feed the view
+SOURCE_COLLECTIONS = (
+    "vehicles", "customers", "services", "parts", "job_card_notes",
+    "job_card_timeline", "files", "signatures",
+)
+
+
+# ═══════════════════════════════════════════════════════════════
+# WRITE SIDE
+# ═══════════════════════════════════════════════════════════════
+
+def mark_stale(job_card_id: str):
+    """Invalidate a card's view; the next read or scheduled rebuild refreshes it"""
+    job_card_views_collection.update_one(
+        {"_id": job_card_id},
+        {"$set": {"stale": True}, "$inc": {"generation": 1}},
+        upsert=True
+    )
+
+
+def mark_vehicle_stale(registration: Optional[str]):
+    """Invalidate every view listing cards for a vehicle (related cards changed)"""
+    if registration:
+        job_card_views_collection.update_many(
+            {"registration": registration},
+            {"$set": {"stale": True}, "$inc": {"generation": 1}}
+        )
+
+
+def schedule_refresh(background_tasks: BackgroundTasks, job_card_id: str):
+    """Mark a card's view stale now and rebuild it after the response is sent"""
+    mark_stale(job_card_id)
+    background_tasks.add_task(rebuild_view, job_card_id)
+
+
+def drop_view(job_card_id: str):
+    job_card_views_collection.delete_one({"_id": job_card_id})
+
+
+async def rebuild_view(job_card_id: str) -> Optional[Dict[str, Any]]:
+    """Reassemble and store a card's view; None if the card does not exist"""
+    views = async_db["job_card_views"]
+    current = await views.find_one({"_id": job_card_id}, {"generation": 1})
+    generation = current.get("generation", 0) if current else 0
+
+    try:
+        job_card = await async_db["job_cards"].find_one({"_id": ObjectId(job_card_id)})
+    except Exception:
+        job_card = None
+    if not job_card:
+        await views.delete_one({"_id": job_card_id})
+        return None
+
+    view = await build_job_card_detail(job_card)
+    try:
+        await views.replace_one(
+            {"_id": job_card_id, "generation": generation},
+            {
+                "view": view,
+                "registration": view["vehicle"].get("registration_number"),
+                "schema": VIEW_SCHEMA,
+                "stale": False,
+                "generation": generation,
+                "refreshed_at": datetime.now(timezone.utc),
+            },
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A write bumped the generation meanwhile; its refresh stores the newer view
+        pass
+    return view
+
+
+# ═══════════════════════════════════════════════════════════════
+# READ SIDE
+# ═══════════════════════════════════════════════════════════════
+
+async def get_job_card_view(job_card_id: str) -> Optional[Dict[str, Any]]:
+    """Detail view for a card, rebuilt inline if missing, stale or outdated"""
+    doc = await async_db["job_card_views"].find_one({"_id": job_card_id})
+    if doc and not doc.get("stale") and doc.get("schema") == VIEW_SCHEMA and "view" in doc:
+        return doc["view"]
+    return await rebuild_view(job_card_id)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CHANGE STREAM
+# ═══════════════════════════════════════════════════════════════
+
+async def watch_changes():
+    """Refresh views for writes seen on the change stream (runs until cancelled)"""
+    pipeline = [{"$match": {"ns.coll": {"$in": ["job_cards", *SOURCE_COLLECTIONS]}}}]
+    while True:
+        try:
+            async with async_db.watch(pipeline, full_document="updateLookup") as stream:
+                async for change in stream:
+                    if change["ns"]["coll"] == "job_cards":
+                        job_card_id = str(change["documentKey"]["_id"])
+                    else:
+                        job_card_id = (change.get("fullDocument") or {}).get("job_card_id")
+                    if job_card_id:
+                        await async_db["job_card_views"].update_one(
+                            {"_id": job_card_id},
+                            {"$set": {"stale": True}, "$inc": {"generation": 1}},
+                            upsert=True
+                        )
+                        await rebuild_view(job_card_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job card view change stream error: {e}")
+            await asyncio.sleep(5)
+
+
+def start_change_stream() -> Optional[asyncio.Task]:
+    """Start the watcher when enabled; returns the task to cancel on shutdown"""
+    if not CHANGE_STREAM_ENABLED:
+        return None
+    return asyncio.ensure_future(watch_changes())
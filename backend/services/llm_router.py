@@ -0,0 +1,400 @@
+"""
+LLM Router - Latency-aware multi-provider routing for EKA-AI
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- Rolling p50/p95 latency and error rate per provider/model
+- Routes each request to the fastest healthy provider
+- Automatic fallback to the next provider on errors/timeouts
+- Optional hedged requests (second request fired after the p95 deadline,
+  loser cancelled)
+"""
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Routing configuration
+STATS_WINDOW = int(os.getenv("LLM_STATS_WINDOW", "100"))
+MIN_SAMPLES = int(os.getenv("LLM_MIN_SAMPLES", "5"))
+MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))
+MAX_CONSECUTIVE_FAILURES = int(os.getenv("LLM_MAX_CONSECUTIVE_FAILURES", "3"))
+COOLDOWN_SECONDS = float(os.getenv("LLM_COOLDOWN_SECONDS", "30"))
+REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+DEFAULT_HEDGE_DELAY = float(os.getenv("LLM_DEFAULT_HEDGE_DELAY", "2.5"))
+HEDGE_ENABLED = os.getenv("LLM_HEDGE_REQUESTS", "false").lower() == "true"
+
+
+class LLMUnavailableError(Exception):
+    """Raised when no provider could serve a request"""
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class ProviderStats:
+    """Rolling latency/error window for a single provider"""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.total_requests = 0
+
+    def record(self, latency: float, ok: bool):
+        """Record one request outcome (latency in seconds)"""
+        with self._lock:
+            self._samples.append((latency, ok))
+            self.total_requests += 1
+            if ok:
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                    self.cooldown_until = time.monotonic() + COOLDOWN_SECONDS
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._samples)
+
+    def _success_latencies(self) -> List[float]:
+        with self._lock:
+            return sorted(latency for latency, ok in self._samples if ok)
+
+    def p50(self) -> float:
+        return _percentile(self._success_latencies(), 50)
+
+    def p95(self) -> float:
+        return _percentile(self._success_latencies(), 95)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def is_healthy(self) -> bool:
+        """Healthy unless cooling down or erroring above the threshold"""
+        if time.monotonic() < self.cooldown_until:
+            return False
+        if self.sample_count >= MIN_SAMPLES and self.error_rate() >= MAX_ERROR_RATE:
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.sample_count,
+            "total_requests": self.total_requests,
+            "p50_ms": round(self.p50() * 1000, 1),
+            "p95_ms": round(self.p95() * 1000, 1),
+            "error_rate": round(self.error_rate(), 3),
+            "consecutive_failures": self.consecutive_failures,
+            "healthy": self.is_healthy(),
+        }
+
+
+@dataclass
+class LLMProvider:
+    """A routable provider/model pair"""
+    name: str
+    model: str
+    # async (system_prompt, user_text) -> response text
+    complete: Callable[[str, str], Awaitable[str]]
+    # Optional LangChain chat model factory: (temperature) -> BaseChatModel
+    chat_model_factory: Optional[Callable[[float], Any]] = None
+    stats: ProviderStats = field(default_factory=ProviderStats)
+    _chat_models: Dict[float, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}:{self.model}"
+
+    def chat_model(self, temperature: float) -> Any:
+        """LangChain chat model for this provider, built once per temperature"""
+        if temperature not in self._chat_models:
+            self._chat_models[temperature] = self.chat_model_factory(temperature)
+        return self._chat_models[temperature]
+
+
+@dataclass
+class LLMResult:
+    """Routed completion result"""
+    text: str
+    provider: str
+    model: str
+    latency_ms: float
+    hedged: bool = False
+    attempts: int = 1
+
+
+class LLMRouter:
+    """
+    Routes LLM calls to the fastest healthy provider
+
+    Providers are ranked by rolling p50 latency. Providers without enough
+    samples keep their registration order, so the static preference
+    (OpenAI, then Gemini, then Emergent) still applies on a cold start.
+    """
+
+    def __init__(self, hedge: bool = HEDGE_ENABLED, timeout: float = REQUEST_TIMEOUT):
+        self.providers: List[LLMProvider] = []
+        self.hedge = hedge
+        self.timeout = timeout
+
+    def register(self, provider: LLMProvider):
+        self.providers.append(provider)
+
+    def has_providers(self) -> bool:
+        return bool(self.providers)
+
+    def ranked_providers(self, require_chat_model: bool = False) -> List[LLMProvider]:
+        """Healthy providers first, fastest first"""
+        candidates = [
+            p for p in self.providers
+            if not require_chat_model or p.chat_model_factory is not None
+        ]
+
+        def sort_key(item: Tuple[int, LLMProvider]):
+            index, provider = item
+            stats = provider.stats
+            latency = stats.p50() if stats.sample_count >= MIN_SAMPLES else float("inf")
+            return (not stats.is_healthy(), latency, index)
+
+        return [p for _, p in sorted(enumerate(candidates), key=sort_key)]
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """Deadline after which a hedged request is fired"""
+        if provider.stats.sample_count >= MIN_SAMPLES:
+            return provider.stats.p95()
+        return DEFAULT_HEDGE_DELAY
+
+    # ═══════════════════════════════════════════════════════════════
+    # ASYNC COMPLETION (chat)
+    # ═══════════════════════════════════════════════════════════════
+
+    async def _timed_call(self, provider: LLMProvider, system_prompt: str, text: str) -> str:
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(provider.complete(system_prompt, text), timeout=self.timeout)
+        except asyncio.CancelledError:
+            # Hedge loser - not a provider failure
+            raise
+        except Exception:
+            provider.stats.record(time.monotonic() - start, ok=False)
+            raise
+        provider.stats.record(time.monotonic() - start, ok=True)
+        return result
+
+    async def complete(
+        self,
+        system_prompt: str,
+        text: str,
+        hedge: Optional[bool] = None
+    ) -> LLMResult:
+        """
+        Complete a prompt on the fastest healthy provider
+
+        Falls back through the ranked list on failure. When hedging is
+        enabled and the primary has not answered by its p95 latency, the
+        next provider is raced against it and the loser is cancelled.
+
+        Raises:
+            LLMUnavailableError: every provider failed
+        """
+        use_hedge = self.hedge if hedge is None else hedge
+        ranked = self.ranked_providers()
+        if not ranked:
+            raise LLMUnavailableError("No LLM providers configured")
+
+        start = time.monotonic()
+        attempts = 0
+        hedged = False
+        last_error: Optional[BaseException] = None
+        queue = list(ranked)
+
+        while queue:
+            primary = queue.pop(0)
+            attempts += 1
+            primary_task = asyncio.ensure_future(self._timed_call(primary, system_prompt, text))
+            pending = {primary_task: primary}
+
+            if use_hedge and queue:
+                done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay(primary))
+                if not done:
+                    backup = queue.pop(0)
+                    attempts += 1
+                    hedged = True
+                    logger.info(f"Hedging LLM request: {primary.key} slow, racing {backup.key}")
+                    backup_task = asyncio.ensure_future(self._timed_call(backup, system_prompt, text))
+                    pending[backup_task] = backup
+
+            while pending:
+                done, _ = await asyncio.wait(set(pending), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        for loser in pending:
+                            loser.cancel()
+                        return LLMResult(
+                            text=task.result(),
+                            provider=provider.name,
+                            model=provider.model,
+                            latency_ms=round((time.monotonic() - start) * 1000, 1),
+                            hedged=hedged,
+                            attempts=attempts
+                        )
+                    last_error = task.exception()
+                    logger.warning(f"LLM provider {provider.key} failed: {last_error!r}")
+
+        raise LLMUnavailableError(f"All LLM providers failed: {last_error!r}")
+
+    # ═══════════════════════════════════════════════════════════════
+    # SYNC INVOCATION (LangChain services)
+    # ═══════════════════════════════════════════════════════════════
+
+    def best_chat_model(self, temperature: float = 0.1) -> Tuple[Optional[LLMProvider], Any]:
+        """Build a LangChain chat model for the best-ranked provider"""
+        for provider in self.ranked_providers(require_chat_model=True):
+            try:
+                return provider, provider.chat_model(temperature)
+            except Exception as e:
+                logger.error(f"❌ Could not build chat model for {provider.key}: {e}")
+        return None, None
+
+    def invoke(self, prompt: Any, temperature: float = 0.1) -> Tuple[Any, LLMProvider]:
+        """
+        Invoke a LangChain chat model with latency tracking and fallback
+
+        Returns:
+            (response, provider that served it)
+        """
+        last_error: Optional[Exception] = None
+        for provider in self.ranked_providers(require_chat_model=True):
+            start = time.monotonic()
+            try:
+                response = provider.chat_model(temperature).invoke(prompt)
+            except Exception as e:
+                provider.stats.record(time.monotonic() - start, ok=False)
+                last_error = e
+                logger.warning(f"LLM provider {provider.key} failed: {e!r}")
+                continue
+            provider.stats.record(time.monotonic() - start, ok=True)
+            return response, provider
+        raise LLMUnavailableError(f"All LLM providers failed: {last_error!r}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-provider routing stats for monitoring"""
+        return {
+            "hedging": self.hedge,
+            "ranking": [p.key for p in self.ranked_providers()],
+            "providers": {p.key: p.stats.to_dict() for p in self.providers},
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROVIDER FACTORIES
+# ═══════════════════════════════════════════════════════════════
+
+def _openai_provider(api_key: str, model: str = "gpt-4o-mini") -> LLMProvider:
+    client_holder: Dict[str, Any] = {}
+
+    async def complete(system_prompt: str, text: str) -> str:
+        if "client" not in client_holder:
+            from openai import AsyncOpenAI
+            client_holder["client"] = AsyncOpenAI(api_key=api_key)
+        response = await client_holder["client"].chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": text},
+            ],
+        )
+        return response.choices[0].message.content or ""
+
+    def chat_model(temperature: float):
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model, temperature=temperature, api_key=api_key)
+
+    return LLMProvider(name="openai", model=model, complete=complete, chat_model_factory=chat_model)
+
+
+def _gemini_provider(api_key: str, model: str = "gemini-2.0-flash") -> LLMProvider:
+    client_holder: Dict[str, Any] = {}
+
+    async def complete(system_prompt: str, text: str) -> str:
+        from google.genai import types
+        if "client" not in client_holder:
+            from google import genai
+            client_holder["client"] = genai.Client(api_key=api_key)
+        response = await client_holder["client"].aio.models.generate_content(
+            model=model,
+            contents=text,
+            config=types.GenerateContentConfig(system_instruction=system_prompt),
+        )
+        return response.text or ""
+
+    def chat_model(temperature: float):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=model, temperature=temperature, api_key=api_key)
+
+    return LLMProvider(name="gemini", model=model, complete=complete, chat_model_factory=chat_model)
+
+
+def _emergent_provider(api_key: str, model: str = "gemini-1.5-flash") -> LLMProvider:
+    async def complete(system_prompt: str, text: str) -> str:
+        import uuid
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+        chat = LlmChat(
+            api_key=api_key,
+            session_id=f"eka-chat-{uuid.uuid4().hex[:8]}",
+            system_message=system_prompt
+        ).with_model("gemini", model)
+        return await chat.send_message(UserMessage(text=text))
+
+    return LLMProvider(name="emergent", model=model, complete=complete)
+
+
+def build_default_router() -> LLMRouter:
+    """Register every provider that has credentials configured"""
+    router = LLMRouter()
+    if os.getenv("OPENAI_API_KEY"):
+        router.register(_openai_provider(os.getenv("OPENAI_API_KEY")))
+    if os.getenv("GEMINI_API_KEY"):
+        router.register(_gemini_provider(os.getenv("GEMINI_API_KEY")))
+    if os.getenv("EMERGENT_LLM_KEY"):
+        router.register(_emergent_provider(os.getenv("EMERGENT_LLM_KEY")))
+
+    if router.providers:
+        logger.info(f"✅ LLM router initialized with {[p.key for p in router.providers]}")
+    else:
+        logger.warning("⚠️ No LLM API key available for router")
+    return router
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_llm_router: Optional[LLMRouter] = None
+
+
+def get_llm_router() -> LLMRouter:
+    """Get or create the shared LLMRouter singleton"""
+    global _llm_router
+    if _llm_router is None:
+        _llm_router = build_default_router()
+    return _llm_router
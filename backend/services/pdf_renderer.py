@@ -0,0 +1,360 @@
+"""
+PDF Renderer - Shared WeasyPrint rendering service for EKA-AI documents
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- Renders in a process pool (PDF_RENDER_WORKERS) so request workers only
+  wait on a future instead of running layout under the GIL
+- Each renderer process parses a stylesheet once and reuses it, together
+  with one shared FontConfiguration
+- Content-hash cache: a document whose HTML and CSS are unchanged is read
+  back from storage instead of being rendered again. PDF_CACHE_URI may be
+  s3://bucket/prefix so API containers and Celery workers share it
+- render() for sync callers, render_async() for async routes
+- enqueue_pdf_task() hands rendering to Celery: interactive requests go to
+  PDF_QUEUE, event-driven pre-rendering (invoice finalize, job card close)
+  to PDF_BATCH_QUEUE so bulk runs never delay interactive renders
+- enqueue_render() uses the document key as the task id and queues each
+  document at most once while a render is in flight
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Try to import WeasyPrint for PDF generation
+try:
+    from weasyprint import HTML, CSS
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError:
+        from weasyprint.fonts import FontConfiguration
+    WEASYPRINT_AVAILABLE = True
+except ImportError:
+    WEASYPRINT_AVAILABLE = False
+    logger.warning("WeasyPrint not available. PDF generation will be disabled.")
+
+# Try to import boto3 for a shared S3 cache
+try:
+    import boto3
+    from botocore.exceptions import BotoCoreError, ClientError
+    S3_ERRORS = (BotoCoreError, ClientError)
+    BOTO3_AVAILABLE = True
+except ImportError:
+    S3_ERRORS = ()
+    BOTO3_AVAILABLE = False
+
+# Cache failures are logged and treated as a miss / skipped store
+CACHE_WRITE_ERRORS = (OSError,) + S3_ERRORS
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_CACHE_DIR = os.getenv(
+    "PDF_CACHE_DIR",
+    str(Path(__file__).resolve().parent.parent / "data" / "pdf_cache")
+)
+# Must be shared storage (s3://) when Celery workers run in other containers
+PDF_CACHE_URI = os.getenv("PDF_CACHE_URI", PDF_CACHE_DIR)
+PDF_CACHE_MAX_AGE_DAYS = int(os.getenv("PDF_CACHE_MAX_AGE_DAYS", "30"))
+# How long a queued render suppresses re-queueing the same document
+PDF_RENDER_DEDUPE_SECONDS = int(os.getenv("PDF_RENDER_DEDUPE_SECONDS", "300"))
+PDF_QUEUE = os.getenv("PDF_QUEUE", "pdf")
+PDF_BATCH_QUEUE = os.getenv("PDF_BATCH_QUEUE", "pdf_batch")
+
+# Bump when rendering changes in a way that should invalidate cached files
+RENDERER_VERSION = "1"
+
+
+def document_key(html: str, css: str = "") -> str:
+    """Content hash identifying a rendered document"""
+    digest = hashlib.sha256()
+    for part in (RENDERER_VERSION, css, html):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════
+# RENDERER PROCESS
+# ═══════════════════════════════════════════════════════════════
+
+_font_config = None
+
+
+def _get_font_config():
+    global _font_config
+    if _font_config is None:
+        _font_config = FontConfiguration()
+    return _font_config
+
+
+@lru_cache(maxsize=16)
+def _stylesheet(css: str):
+    # Parsed once per process; the PDF stylesheets are module constants
+    return CSS(string=css, font_config=_get_font_config())
+
+
+def _render(html: str, css: str) -> bytes:
+    """Render one document (runs inside a pool process or inline)"""
+    stylesheets = [_stylesheet(css)] if css else None
+    return HTML(string=html).write_pdf(stylesheets=stylesheets, font_config=_get_font_config())
+
+
+# ═══════════════════════════════════════════════════════════════
+# PDF CACHE
+# ═══════════════════════════════════════════════════════════════
+
+class PDFCache:
+    """Rendered PDFs stored by content hash in S3 or a local directory"""
+
+    def __init__(self, uri: str = PDF_CACHE_URI):
+        self.uri = uri
+        if uri.startswith("s3://"):
+            if not BOTO3_AVAILABLE:
+                raise RuntimeError("boto3 is required for s3:// PDF caches")
+            self.bucket, _, prefix = uri[len("s3://"):].partition("/")
+            self.key_root = prefix.strip("/") + "/" if prefix.strip("/") else ""
+            self.s3 = boto3.client("s3")
+            self.root = None
+        else:
+            self.root = Path(uri)
+            self.s3 = None
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pdf"
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.key_root}{key[:2]}/{key}.pdf"
+
+    def get(self, key: str) -> Optional[bytes]:
+        if self.s3:
+            try:
+                return self.s3.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"].read()
+            except self.s3.exceptions.NoSuchKey:
+                return None
+            except S3_ERRORS as e:
+                logger.warning(f"PDF cache read failed, rendering instead: {e}")
+                return None
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Hits refresh the age used by prune()
+        os.utime(path)
+        return data
+
+    def put(self, key: str, data: bytes):
+        if self.s3:
+            self.s3.put_object(Bucket=self.bucket, Key=self._object_key(key), Body=data,
+                               ContentType="application/pdf")
+            return
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def prune(self, max_age_days: int = PDF_CACHE_MAX_AGE_DAYS) -> int:
+        """Delete files not read or written for max_age_days; returns count"""
+        cutoff = time.time() - max_age_days * 86400
+        if self.s3:
+            return self._prune_s3(cutoff)
+        if not self.root.exists():
+            return 0
+        removed = 0
+        for path in self.root.glob("*/*.pdf"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def _prune_s3(self, cutoff: float) -> int:
+        # S3 objects age from their upload; reads do not refresh them
+        removed = 0
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.key_root):
+            stale = [{"Key": obj["Key"]} for obj in page.get("Contents", [])
+                     if obj["Key"].endswith(".pdf") and obj["LastModified"].timestamp() < cutoff]
+            if stale:
+                self.s3.delete_objects(Bucket=self.bucket, Delete={"Objects": stale})
+                removed += len(stale)
+        return removed
+
+
+# ═══════════════════════════════════════════════════════════════
+# RENDERER
+# ═══════════════════════════════════════════════════════════════
+
+class PDFRenderer:
+    """Process-pool PDF rendering with a content-hash cache"""
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS, cache: Optional[PDFCache] = None):
+        # Daemonic processes (Celery prefork children) cannot start a pool;
+        # they are already dedicated renderers, so render inline there
+        if multiprocessing.current_process().daemon:
+            workers = 0
+        self.workers = max(0, workers)
+        self.cache = cache or PDFCache()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.rendered = 0
+        self.cache_hits = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: never fork a parent that runs background threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _submit(self, html: str, css: str) -> Future:
+        if self.workers == 0:
+            future: Future = Future()
+            try:
+                future.set_result(_render(html, css))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        try:
+            return self._get_pool().submit(_render, html, css)
+        except BrokenProcessPool:
+            # A renderer process died; start a fresh pool once
+            with self._pool_lock:
+                self._pool = None
+            return self._get_pool().submit(_render, html, css)
+
+    def cached(self, html: str, css: str = "") -> Optional[bytes]:
+        """Stored PDF for this exact document, if any"""
+        data = self.cache.get(document_key(html, css))
+        if data is not None:
+            self.cache_hits += 1
+        return data
+
+    def _store(self, html: str, css: str, data: bytes) -> bytes:
+        self.rendered += 1
+        try:
+            self.cache.put(document_key(html, css), data)
+        except CACHE_WRITE_ERRORS as e:
+            logger.warning(f"Could not cache rendered PDF: {e}")
+        return data
+
+    def render(self, html: str, css: str = "") -> bytes:
+        """Render (or fetch from cache) and block until the PDF is ready"""
+        data = self.cached(html, css)
+        if data is not None:
+            return data
+        if not WEASYPRINT_AVAILABLE:
+            raise RuntimeError("PDF generation not available")
+        return self._store(html, css, self._submit(html, css).result())
+
+    async def render_async(self, html: str, css: str = "") -> bytes:
+        """render() for async routes: the event loop is free while rendering"""
+        # Cache reads and writes may be network calls (S3)
+        data = await asyncio.to_thread(self.cached, html, css)
+        if data is not None:
+            return data
+        if not WEASYPRINT_AVAILABLE:
+            raise RuntimeError("PDF generation not available")
+        if self.workers == 0:
+            data = await asyncio.to_thread(_render, html, css)
+        else:
+            data = await asyncio.wrap_future(self._submit(html, css))
+        return await asyncio.to_thread(self._store, html, css, data)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def get_stats(self):
+        return {
+            "workers": self.workers,
+            "rendered": self.rendered,
+            "cache_hits": self.cache_hits,
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_pdf_renderer: Optional[PDFRenderer] = None
+_pdf_renderer_lock = threading.Lock()
+
+
+def get_pdf_renderer() -> PDFRenderer:
+    """Get or create PDFRenderer singleton"""
+    global _pdf_renderer
+    with _pdf_renderer_lock:
+        if _pdf_renderer is None:
+            _pdf_renderer = PDFRenderer()
+    return _pdf_renderer
+
+
+def enqueue_pdf_task(task: str, *args, queue: str = PDF_BATCH_QUEUE,
+                     task_id: Optional[str] = None) -> Optional[str]:
+    """Send a PDF task to Celery by name; returns the task id, None if not queued"""
+    options = {"task_id": task_id} if task_id else {}
+    try:
+        from workers.celery_config import celery_app
+        return celery_app.send_task(task, args=list(args), queue=queue, retry=False, **options).id
+    except Exception as e:
+        logger.warning(f"Could not enqueue {task}: {e}")
+        return None
+
+
+def _render_claim(key: str, claim: bool) -> bool:
+    """Take (or release) the in-flight marker for a document; True if taken"""
+    try:
+        from config.redis_client import redis_client
+        if redis_client is None:
+            return True
+        if not claim:
+            redis_client.delete(f"pdf:render:{key}")
+            return True
+        return bool(redis_client.set(f"pdf:render:{key}", "1", nx=True, ex=PDF_RENDER_DEDUPE_SECONDS))
+    except Exception:
+        # Without Redis a repeat request may queue a duplicate; the task id still matches
+        return True
+
+
+def enqueue_render(html: str, css: str, pdf_url: Optional[str] = None,
+                   queue: str = PDF_QUEUE) -> Optional[str]:
+    """
+    Queue workers.tasks.render_pdf once per document; returns the task id
+
+    The task id is the document key, so repeated requests (e.g. clients
+    polling pdf_url) share one render and one status URL. None if the
+    task could not be queued.
+    """
+    key = document_key(html, css)
+    if not _render_claim(key, claim=True):
+        return key
+    task_id = enqueue_pdf_task("workers.tasks.render_pdf", html, css, pdf_url, queue=queue, task_id=key)
+    if task_id is None:
+        _render_claim(key, claim=False)
+    return task_id
+
+
+def shutdown_pdf_renderer():
+    """Stop renderer processes (application shutdown)"""
+    if _pdf_renderer is not None:
+        _pdf_renderer.shutdown()
@@ -17,15 +17,28 @@ from enum import Enum
 import uuid
 import logging
 
+from services.audit_pipeline import get_audit_pipeline
+from services.pdf_renderer import get_pdf_renderer, WEASYPRINT_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
-# Try to import WeasyPrint for PDF generation
-try:
-    from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
-    logger.warning("WeasyPrint not available. PDF generation will be disabled.")
+# PDI report stylesheet, parsed once per renderer process
+PDI_REPORT_PDF_CSS = """
+@page { size: A4; margin: 2cm; }
+body { font-family: Arial, sans-serif; font-size: 10pt; line-height: 1.4; color: #333; }
+.header { text-align: center; border-bottom: 3px solid #f18a22; padding-bottom: 10px; margin-bottom: 20px; }
+.header h1 { margin: 0; color: #333; font-size: 24pt; }
+.workshop-info { text-align: center; margin-bottom: 20px; }
+.section { margin-bottom: 15px; border: 1px solid #ddd; padding: 10px; border-radius: 5px; }
+.section h3 { margin: 0 0 10px 0; color: #f18a22; border-bottom: 1px solid #eee; padding-bottom: 5px; }
+table { width: 100%; border-collapse: collapse; margin: 10px 0; }
+th, td { border: 1px solid #ddd; padding: 8px; text-align: left; font-size: 9pt; }
+th { background-color: #f5f5f5; font-weight: bold; }
+.footer { margin-top: 30px; padding-top: 10px; border-top: 2px solid #f18a22; text-align: center; font-size: 9pt; color: #666; }
+.declaration { background: #f0f8ff; padding: 15px; border-left: 4px solid #f18a22; margin: 20px 0; }
+.signature-section { margin-top: 40px; }
+.signature-line { border-top: 1px solid #333; width: 200px; margin-top: 50px; padding-top: 5px; text-align: center; }
+"""
 
 
 class PDIStatus(str, Enum):
@@ -303,6 +316,7 @@ class PDIManager:
         self.checklists_table = "pdi_checklists"
         self.evidence_table = "pdi_evidence"
         self.audit_table = "audit_logs"
+        self.audit = get_audit_pipeline(supabase_client, self.audit_table)
     
     # ═══════════════════════════════════════════════════════════════
     # CHECKLIST MANAGEMENT
@@ -861,19 +875,16 @@ class PDIManager:
         old_values: Optional[Dict] = None,
         new_values: Optional[Dict] = None
     ):
-        """Log audit entry"""
-        try:
-            self.supabase.table(self.audit_table).insert({
-                "workshop_id": workshop_id,
-                "user_id": user_id,
-                "action": action,
-                "entity_type": entity_type,
-                "entity_id": entity_id,
-                "old_values": old_values,
-                "new_values": new_values
-            }).execute()
-        except Exception as e:
-            logger.error(f"Error logging audit: {e}")
+        """Queue audit entry for the shared batched writer"""
+        self.audit.record({
+            "workshop_id": workshop_id,
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "old_values": old_values,
+            "new_values": new_values
+        })
     
     # ═══════════════════════════════════════════════════════════════
     # PDF REPORT GENERATION
@@ -921,9 +932,8 @@ class PDIManager:
                 checklist, evidence_list, workshop_details, vehicle_details
             )
             
-            # Generate PDF
-            html = HTML(string=html_content)
-            pdf_bytes = html.write_pdf()
+            # Render in the shared renderer pool (cached by content hash)
+            pdf_bytes = get_pdf_renderer().render(html_content, PDI_REPORT_PDF_CSS)
             
             return True, pdf_bytes
             
@@ -1019,22 +1029,6 @@ class PDIManager:
         <head>
             <meta charset="utf-8">
             <title>PDI Report {checklist.get('id', 'N/A')[:8]}</title>
-            <style>
-                @page {{ size: A4; margin: 2cm; }}
-                body {{ font-family: Arial, sans-serif; font-size: 10pt; line-height: 1.4; color: #333; }}
-                .header {{ text-align: center; border-bottom: 3px solid #f18a22; padding-bottom: 10px; margin-bottom: 20px; }}
-                .header h1 {{ margin: 0; color: #333; font-size: 24pt; }}
-                .workshop-info {{ text-align: center; margin-bottom: 20px; }}
-                .section {{ margin-bottom: 15px; border: 1px solid #ddd; padding: 10px; border-radius: 5px; }}
-                .section h3 {{ margin: 0 0 10px 0; color: #f18a22; border-bottom: 1px solid #eee; padding-bottom: 5px; }}
-                table {{ width: 100%; border-collapse: collapse; margin: 10px 0; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; font-size: 9pt; }}
-                th {{ background-color: #f5f5f5; font-weight: bold; }}
-                .footer {{ margin-top: 30px; padding-top: 10px; border-top: 2px solid #f18a22; text-align: center; font-size: 9pt; color: #666; }}
-                .declaration {{ background: #f0f8ff; padding: 15px; border-left: 4px solid #f18a22; margin: 20px 0; }}
-                .signature-section {{ margin-top: 40px; }}
-                .signature-line {{ border-top: 1px solid #333; width: 200px; margin-top: 50px; padding-top: 5px; text-align: center; }}
-            </style>
         </head>
         <body>
             <div class="header">
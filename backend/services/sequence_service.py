@@ -0,0 +1,102 @@
+"""
+Sequence Service - Atomic document number sequences for EKA-AI
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- One counter document per sequence key (e.g. job_card:{tenant}:{year})
+  advanced with a single findOneAndUpdate $inc: no counts, no duplicates
+- New counters are seeded once from the highest number already issued
+- Optional block pre-allocation (SEQUENCE_BLOCK_SIZE) reserves N numbers
+  per round trip; numbers stay unique but may interleave across workers
+  and leave gaps when a worker exits with part of a block unused
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils.database import counters_collection
+
+SEQUENCE_BLOCK_SIZE = int(os.getenv("SEQUENCE_BLOCK_SIZE", "1"))
+
+
+class SequenceService:
+    """Hands out increasing integers per key from Mongo counter documents"""
+
+    def __init__(self, collection, block_size: int = SEQUENCE_BLOCK_SIZE):
+        self.collection = collection
+        self.block_size = max(1, block_size)
+        self._blocks: Dict[str, Tuple[int, int]] = {}  # key -> (next, last)
+        self._lock = threading.Lock()
+
+    def next_value(self, key: str, seed: Optional[Callable[[], int]] = None,
+                   block_size: Optional[int] = None) -> int:
+        """
+        Next number for `key`
+
+        `seed` returns the highest number already issued under the key; it
+        runs only when the counter document does not exist yet.
+        """
+        size = max(1, block_size or self.block_size)
+        if size == 1:
+            return self._reserve(key, 1, seed)
+
+        with self._lock:
+            current, last = self._blocks.get(key, (1, 0))
+            if current > last:
+                last = self._reserve(key, size, seed)
+                current = last - size + 1
+            self._blocks[key] = (current + 1, last)
+            return current
+
+    def _reserve(self, key: str, count: int, seed: Optional[Callable[[], int]]) -> int:
+        """Advance the counter by `count` and return its new value"""
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"value": count}},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            self._seed(key, seed() if seed else 0)
+            doc = self.collection.find_one_and_update(
+                {"_id": key},
+                {"$inc": {"value": count}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        return doc["value"]
+
+    def _seed(self, key: str, value: int):
+        # $max keeps a concurrently created counter that is already ahead
+        try:
+            self.collection.update_one({"_id": key}, {"$max": {"value": value}}, upsert=True)
+        except DuplicateKeyError:
+            self.collection.update_one({"_id": key}, {"$max": {"value": value}})
+
+
+def max_issued_number(collection, field: str, prefix: str, query: Optional[dict] = None) -> int:
+    """Highest numeric suffix among `field` values starting with `prefix` (0 if none)"""
+    filter_query = {**(query or {}), field: {"$regex": f"^{prefix}\\d+$"}}
+    highest = 0
+    for doc in collection.find(filter_query, {field: 1, "_id": 0}):
+        suffix = doc[field][len(prefix):]
+        highest = max(highest, int(suffix))
+    return highest
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_sequence_service: Optional[SequenceService] = None
+
+
+def get_sequence_service() -> SequenceService:
+    """Get or create SequenceService singleton"""
+    global _sequence_service
+    if _sequence_service is None:
+        _sequence_service = SequenceService(counters_collection)
+    return _sequence_service
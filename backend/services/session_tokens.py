@@ -0,0 +1,209 @@
+"""
+Session Tokens - Opaque or signed (stateless) login sessions for EKA-AI
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+SESSION_MODE=opaque (default): random tokens stored in Mongo user_sessions.
+SESSION_MODE=signed: short-lived HS256 tokens carrying user id, jti and
+expiry. Validation needs no database read; logout adds the jti to a
+revocation list kept in Redis (sorted set scored by token expiry) and
+mirrored in each worker as a Bloom filter. Only Bloom filter hits are
+confirmed against Redis.
+
+Both token kinds are always accepted, so switching modes does not log
+anyone out.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+
+from utils.bloom_filter import BloomFilter
+
+try:
+    from config.redis_client import redis_client
+    REDIS_AVAILABLE = redis_client is not None
+except Exception:
+    redis_client = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SESSION_MODE = os.getenv("SESSION_MODE", "opaque").lower()
+SIGNED_SESSION_TTL_MINUTES = int(os.getenv("SIGNED_SESSION_TTL_MINUTES", "60"))
+OPAQUE_SESSION_DAYS = 7
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+
+REVOKED_KEY = "auth:revoked"
+REVOKED_VERSION_KEY = "auth:revoked:version"
+OPAQUE_PREFIXES = ("email_session_", "google_session_")
+ALGORITHM = "HS256"
+
+
+def _secret() -> str:
+    secret = os.getenv("SESSION_SECRET") or os.getenv("JWT_SECRET")
+    if not secret:
+        raise ValueError("SESSION_SECRET or JWT_SECRET must be set for signed sessions")
+    return secret
+
+
+# ═══════════════════════════════════════════════════════════════
+# REVOCATION LIST
+# ═══════════════════════════════════════════════════════════════
+
+class RevocationList:
+    """
+    Revoked token ids (jti) until their token would have expired anyway
+
+    Redis holds the authoritative sorted set plus a version counter; each
+    worker re-reads the set into a Bloom filter only when the version
+    changes (checked at most every REVOCATION_REFRESH_SECONDS).
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis
+        self.bloom = BloomFilter()
+        self._local: Dict[str, float] = {}
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: float):
+        with self._lock:
+            self.bloom.add(jti)
+            self._local[jti] = expires_at
+        if self.redis:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.zadd(REVOKED_KEY, {jti: expires_at})
+                pipe.incr(REVOKED_VERSION_KEY)
+                pipe.execute()
+            except Exception as e:
+                logger.error(f"Token revocation write failed: {e}")
+
+    def is_revoked(self, jti: str) -> bool:
+        self._refresh_if_stale()
+        if jti not in self.bloom:
+            return False
+        if self.redis:
+            try:
+                return self.redis.zscore(REVOKED_KEY, jti) is not None
+            except Exception as e:
+                # Fail closed on a Bloom hit when Redis cannot confirm
+                logger.error(f"Token revocation check failed: {e}")
+                return True
+        return jti in self._local
+
+    def _refresh_if_stale(self):
+        now = time.monotonic()
+        if not self.redis or now - self._checked_at < REVOCATION_REFRESH_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            version = self.redis.get(REVOKED_VERSION_KEY)
+            if version == self._version:
+                return
+            wall_now = time.time()
+            self.redis.zremrangebyscore(REVOKED_KEY, "-inf", wall_now)
+            jtis = self.redis.zrangebyscore(REVOKED_KEY, wall_now, "+inf")
+            bloom = BloomFilter.from_items(jtis)
+            with self._lock:
+                self.bloom = bloom
+                self._local = {jti: exp for jti, exp in self._local.items() if exp > wall_now}
+                for jti in self._local:
+                    self.bloom.add(jti)
+                self._version = version
+        except Exception as e:
+            logger.error(f"Revocation list refresh failed: {e}")
+
+
+_revocation_list: Optional[RevocationList] = None
+
+
+def get_revocation_list() -> RevocationList:
+    """Get or create RevocationList singleton"""
+    global _revocation_list
+    if _revocation_list is None:
+        _revocation_list = RevocationList(redis_client if REDIS_AVAILABLE else None)
+    return _revocation_list
+
+
+# ═══════════════════════════════════════════════════════════════
+# SIGNED TOKENS
+# ═══════════════════════════════════════════════════════════════
+
+def is_signed_token(token: str) -> bool:
+    return bool(token) and not token.startswith(OPAQUE_PREFIXES) and token.count(".") == 2
+
+
+def issue_signed_token(user_id: str) -> Tuple[str, datetime]:
+    """Create a signed session token; returns (token, expires_at)"""
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(minutes=SIGNED_SESSION_TTL_MINUTES)
+    payload = {
+        "sub": user_id,
+        "jti": uuid.uuid4().hex,
+        "typ": "session",
+        "iat": int(now.timestamp()),
+        "exp": int(expires_at.timestamp()),
+    }
+    return jwt.encode(payload, _secret(), algorithm=ALGORITHM), expires_at
+
+
+def decode_session_token(token: str, verify_exp: bool = True) -> Optional[Dict[str, Any]]:
+    """Verified claims of a signed session token, or None if invalid/expired/revoked"""
+    try:
+        claims = jwt.decode(
+            token,
+            _secret(),
+            algorithms=[ALGORITHM],
+            options={"require": ["sub", "jti", "exp"], "verify_exp": verify_exp}
+        )
+    except (jwt.InvalidTokenError, ValueError):
+        return None
+    if claims.get("typ") != "session":
+        return None
+    if get_revocation_list().is_revoked(claims["jti"]):
+        return None
+    return claims
+
+
+def revoke_signed_token(token: str) -> bool:
+    """Revoke a signed token (logout); returns False if it was not valid"""
+    claims = decode_session_token(token, verify_exp=False)
+    if not claims:
+        return False
+    get_revocation_list().revoke(claims["jti"], float(claims["exp"]))
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════
+# SESSION ISSUANCE
+# ═══════════════════════════════════════════════════════════════
+
+def issue_session(user_id: str, provider: str = "email") -> Tuple[str, datetime]:
+    """Create a login session in the configured SESSION_MODE; returns (token, expires_at)"""
+    if SESSION_MODE == "signed":
+        return issue_signed_token(user_id)
+
+    from utils.database import user_sessions_collection
+
+    session_token = f"{provider}_session_{uuid.uuid4().hex}"
+    expires_at = datetime.now(timezone.utc) + timedelta(days=OPAQUE_SESSION_DAYS)
+    user_sessions_collection.insert_one({
+        "user_id": user_id,
+        "session_token": session_token,
+        "expires_at": expires_at,
+        "created_at": datetime.now(timezone.utc)
+    })
+    return session_token, expires_at
+
+
+def cookie_max_age(expires_at: datetime) -> int:
+    """Cookie lifetime in seconds matching the session expiry"""
+    return max(0, int((expires_at - datetime.now(timezone.utc)).total_seconds()))
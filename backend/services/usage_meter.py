@@ -0,0 +1,202 @@
+"""
+Usage Meter - Redis-backed daily quota counters for EKA-AI
+Governed Automobile Intelligence System for Go4Garage Private Limited
+
+Features:
+- One counter per user/usage type/UTC day: usage:{type}:{user_id}:{YYYYMMDD}
+- Atomic check-and-increment against the tier limit in a single Lua call
+- Counters expire a day after their UTC day ends (EXPIREAT)
+- Touched counters are tracked in a dirty set and flushed to the Mongo
+  `usage_daily` collection by a periodic Celery task
+- Cold counters are seeded from Mongo once per user per day; if Redis is
+  unavailable the meter falls back to Mongo directly
+"""
+
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Optional, Tuple
+
+from pymongo import UpdateOne
+
+from utils.database import usage_daily_collection, usage_tracking_collection
+
+try:
+    from config.redis_client import redis_client
+    REDIS_AVAILABLE = redis_client is not None
+except Exception:
+    redis_client = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DIRTY_SET_KEY = "usage:dirty"
+KEY_PREFIX = "usage"
+
+# KEYS[1] = counter, KEYS[2] = dirty set
+# ARGV[1] = limit (-1 = unlimited), ARGV[2] = expire-at unix timestamp
+# Returns {allowed (1/0), used before this call}, or {-1, 0} if the counter is cold
+CHECK_AND_INCREMENT_LUA = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return {-1, 0}
+end
+local used = tonumber(current)
+local limit = tonumber(ARGV[1])
+if limit >= 0 and used >= limit then
+    return {0, used}
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIREAT', KEYS[1], ARGV[2])
+redis.call('SADD', KEYS[2], KEYS[1])
+return {1, used}
+"""
+
+
+def _day_bounds(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    now = now or datetime.now(timezone.utc)
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=1)
+
+
+class UsageMeter:
+    """Daily usage counters with Redis fast path and Mongo durability"""
+
+    def __init__(self, redis=None):
+        self.redis = redis
+        self._script = redis.register_script(CHECK_AND_INCREMENT_LUA) if redis else None
+
+    # ═══════════════════════════════════════════════════════════════
+    # KEYS
+    # ═══════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def counter_key(user_id: str, usage_type: str, day: datetime) -> str:
+        return f"{KEY_PREFIX}:{usage_type}:{user_id}:{day.strftime('%Y%m%d')}"
+
+    @staticmethod
+    def parse_key(key: str) -> Tuple[str, str, str]:
+        """Returns (usage_type, user_id, YYYY-MM-DD)"""
+        _, usage_type, rest = key.split(":", 2)
+        user_id, day = rest.rsplit(":", 1)
+        return usage_type, user_id, f"{day[:4]}-{day[4:6]}-{day[6:]}"
+
+    @staticmethod
+    def _expire_at(day_start: datetime) -> int:
+        # Keep one extra day so the flush after midnight sees the final value
+        return int((day_start + timedelta(days=2)).timestamp())
+
+    # ═══════════════════════════════════════════════════════════════
+    # PUBLIC API
+    # ═══════════════════════════════════════════════════════════════
+
+    def check_and_increment(self, user_id: str, limit: int, usage_type: str = "chat_query") -> Tuple[bool, int]:
+        """
+        Atomically check the daily limit and count one use if allowed
+
+        Returns (allowed, used_before_this_call). limit -1 means unlimited
+        (still metered).
+        """
+        day_start, _ = _day_bounds()
+        if self._script:
+            key = self.counter_key(user_id, usage_type, day_start)
+            try:
+                args = [limit, self._expire_at(day_start)]
+                allowed, used = self._script(keys=[key, DIRTY_SET_KEY], args=args)
+                if allowed == -1:
+                    self._seed(key, user_id, usage_type, day_start)
+                    allowed, used = self._script(keys=[key, DIRTY_SET_KEY], args=args)
+                return allowed == 1, int(used)
+            except Exception as e:
+                logger.error(f"Usage meter Redis error, falling back to Mongo: {e}")
+
+        used = self._mongo_usage(user_id, usage_type, day_start)
+        if limit >= 0 and used >= limit:
+            return False, used
+        usage_daily_collection.update_one(
+            {"user_id": user_id, "type": usage_type, "date": day_start.strftime("%Y-%m-%d")},
+            {"$inc": {"count": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        return True, used
+
+    def get_usage(self, user_id: str, usage_type: str = "chat_query") -> int:
+        """Today's usage count"""
+        day_start, _ = _day_bounds()
+        if self.redis:
+            try:
+                value = self.redis.get(self.counter_key(user_id, usage_type, day_start))
+                if value is not None:
+                    return int(value)
+            except Exception as e:
+                logger.error(f"Usage meter GET error: {e}")
+        return self._mongo_usage(user_id, usage_type, day_start)
+
+    def flush(self, batch_size: int = 500) -> int:
+        """Write dirty Redis counters to Mongo usage_daily; returns counters flushed"""
+        if not self.redis:
+            return 0
+
+        flushed = 0
+        while True:
+            keys = self.redis.spop(DIRTY_SET_KEY, batch_size)
+            if not keys:
+                break
+            values = self.redis.mget(keys)
+            now = datetime.now(timezone.utc)
+            operations = []
+            for key, value in zip(keys, values):
+                if value is None:
+                    continue
+                usage_type, user_id, day = self.parse_key(key)
+                operations.append(UpdateOne(
+                    {"user_id": user_id, "type": usage_type, "date": day},
+                    {"$max": {"count": int(value)}, "$set": {"updated_at": now}},
+                    upsert=True
+                ))
+            if operations:
+                try:
+                    usage_daily_collection.bulk_write(operations, ordered=False)
+                except Exception as e:
+                    # Put the keys back so the next flush retries them
+                    self.redis.sadd(DIRTY_SET_KEY, *keys)
+                    logger.error(f"Usage flush to Mongo failed: {e}")
+                    raise
+                flushed += len(operations)
+        return flushed
+
+    # ═══════════════════════════════════════════════════════════════
+    # MONGO
+    # ═══════════════════════════════════════════════════════════════
+
+    def _seed(self, key: str, user_id: str, usage_type: str, day_start: datetime):
+        """Initialise a cold counter from Mongo (first use per user per day)"""
+        used = self._mongo_usage(user_id, usage_type, day_start)
+        self.redis.set(key, used, nx=True, exat=self._expire_at(day_start))
+
+    def _mongo_usage(self, user_id: str, usage_type: str, day_start: datetime) -> int:
+        """Durable count: flushed daily counter, or per-event rows recorded before metering"""
+        daily = usage_daily_collection.find_one(
+            {"user_id": user_id, "type": usage_type, "date": day_start.strftime("%Y-%m-%d")},
+            {"_id": 0, "count": 1}
+        )
+        legacy = usage_tracking_collection.count_documents({
+            "user_id": user_id,
+            "type": usage_type,
+            "timestamp": {"$gte": day_start, "$lt": day_start + timedelta(days=1)}
+        })
+        return max((daily or {}).get("count", 0), legacy)
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_usage_meter: Optional[UsageMeter] = None
+
+
+def get_usage_meter() -> UsageMeter:
+    """Get or create UsageMeter singleton"""
+    global _usage_meter
+    if _usage_meter is None:
+        _usage_meter = UsageMeter(redis_client if REDIS_AVAILABLE else None)
+    return _usage_meter
@@ -0,0 +1,102 @@
+"""
+Unit tests for approval token lookups
+Run with: python -m unittest backend.tests.test_approval_token
+"""
+
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.job_card_manager import JobCardManager, hash_approval_token, _invalid_tokens
+
+
+ROW = {
+    "id": "6f1c2d1e-0000-4000-8000-000000000001",
+    "vehicle_id": None,
+    "workshop_id": "6f1c2d1e-0000-4000-8000-0000000000aa",
+    "registration_number": "KA01AB1234",
+    "status": "CUSTOMER_APPROVAL",
+    "priority": "HIGH",
+    "symptoms": ["noise"],
+    "approval_expires_at": "2026-01-02T10:00:00Z",
+    "sent_for_approval_at": "2026-01-01T10:00:00+00:00",
+    "created_at": "2026-01-01T09:00:00+00:00",
+    "updated_at": "2026-01-01T10:00:00+00:00",
+}
+
+
+class TokenTable:
+    """Stand-in for supabase.table(...) that counts approval token probes."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def table(self, _name):
+        return self
+
+    def select(self, _columns):
+        self.filters = []
+        return self
+
+    def eq(self, field, value):
+        self.filters.append(lambda row: row.get(field) == value)
+        return self
+
+    def gt(self, field, value):
+        self.filters.append(lambda row: row.get(field) > value)
+        return self
+
+    def limit(self, _count):
+        return self
+
+    def execute(self):
+        self.queries += 1
+
+        class Result:
+            pass
+        result = Result()
+        result.data = [row for row in self.rows if all(f(row) for f in self.filters)]
+        return result
+
+
+class TestApprovalTokens(unittest.TestCase):
+    """Token lookups go by digest and cache misses."""
+
+    TOKEN = "k3J9x_Qm2vT8wPz4LrN6yB1cD5fG7hA0"
+
+    def setUp(self):
+        _invalid_tokens.clear()
+        self.db = TokenTable([dict(
+            ROW,
+            approval_token_hash=hash_approval_token(self.TOKEN),
+            approval_expires_at="2999-01-01T00:00:00+00:00",
+        )])
+        self.manager = JobCardManager(supabase_client=self.db)
+
+    def test_lookup_by_digest(self):
+        self.assertEqual(self.manager.find_by_approval_token(self.TOKEN)["id"], ROW["id"])
+        success, result = self.manager.get_job_card_by_token(self.TOKEN)
+        self.assertTrue(success)
+        self.assertEqual(result["job_card"]["id"], ROW["id"])
+
+    def test_expired_token_rejected(self):
+        self.db.rows[0]["approval_expires_at"] = "2000-01-01T00:00:00+00:00"
+        self.assertIsNone(self.manager.find_by_approval_token(self.TOKEN))
+
+    def test_invalid_tokens_negatively_cached(self):
+        bogus = "A" * 32
+        self.assertIsNone(self.manager.find_by_approval_token(bogus))
+        self.assertIsNone(self.manager.find_by_approval_token(bogus))
+        self.assertEqual(self.db.queries, 1)
+
+    def test_malformed_token_skips_database(self):
+        self.assertIsNone(self.manager.find_by_approval_token("short"))
+        self.assertIsNone(self.manager.find_by_approval_token("x' OR 1=1 --" * 3))
+        self.assertEqual(self.db.queries, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Unit tests for the audit log archive
+Run with: python -m unittest backend.tests.test_audit_archive
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.audit_archive import AuditArchive, query_audit_logs
+
+
+def _row(created_at, **fields):
+    return {
+        "id": f"row-{created_at}",
+        "workshop_id": "ws-1",
+        "user_id": "user-1",
+        "action": "UPDATE",
+        "entity_type": "JOB_CARD",
+        "entity_id": "jc-1",
+        "old_values": {"status": "CREATED"},
+        "new_values": {"status": "CONTEXT_VERIFIED"},
+        "created_at": created_at,
+        **fields,
+    }
+
+
+class FakeQuery:
+    """Minimal stand-in for the supabase query builder over a list of rows."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self._limit = None
+
+    def select(self, _columns):
+        return self
+
+    def eq(self, field, value):
+        self.rows = [row for row in self.rows if row.get(field) == value]
+        return self
+
+    def gte(self, field, value):
+        self.rows = [row for row in self.rows if row[field] >= value]
+        return self
+
+    def lt(self, field, value):
+        self.rows = [row for row in self.rows if row[field] < value]
+        return self
+
+    def order(self, field, desc=False):
+        self.rows.sort(key=lambda row: row[field], reverse=desc)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def execute(self):
+        class Result:
+            pass
+        result = Result()
+        result.data = self.rows[:self._limit] if self._limit else self.rows
+        return result
+
+
+class FakeSupabase:
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, _name):
+        return FakeQuery(self.rows)
+
+
+class TestAuditArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = AuditArchive(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_month_round_trip(self):
+        rows = [_row("2025-01-05T10:00:00+00:00"), _row("2025-01-20T10:00:00+00:00", user_id="user-2")]
+        key = self.archive.write_month(date(2025, 1, 1), rows)
+
+        self.assertEqual(self.archive.archived_months(), {date(2025, 1, 1): key})
+        self.assertEqual(self.archive.read_month(key), rows)
+        self.assertEqual(self.archive.read_month(key, {"user_id": "user-2"}), rows[1:])
+
+    def test_query_spans_hot_table_and_archive(self):
+        self.archive.write_month(date(2025, 1, 1), [_row("2025-01-05T10:00:00+00:00")])
+        self.archive.write_month(date(2025, 2, 1), [
+            _row("2025-02-03T10:00:00+00:00"),
+            _row("2025-02-10T10:00:00+00:00", user_id="user-2"),
+        ])
+        supabase = FakeSupabase([_row("2025-06-01T10:00:00+00:00")])
+
+        rows = query_audit_logs(supabase, archive=self.archive, user_id="user-1", limit=None)
+        self.assertEqual(
+            [row["created_at"] for row in rows],
+            ["2025-06-01T10:00:00+00:00", "2025-02-03T10:00:00+00:00", "2025-01-05T10:00:00+00:00"],
+        )
+
+        limited = query_audit_logs(supabase, archive=self.archive, limit=2)
+        self.assertEqual(len(limited), 2)
+
+        windowed = query_audit_logs(
+            supabase, archive=self.archive, limit=None,
+            start=datetime(2025, 2, 1), end=datetime(2025, 3, 1)
+        )
+        self.assertEqual(len(windowed), 2)
+
+    def test_unknown_filter_rejected(self):
+        with self.assertRaises(ValueError):
+            query_audit_logs(FakeSupabase([]), archive=self.archive, ip_address="1.2.3.4")
+
+
+if __name__ == "__main__":
+    unittest.main()
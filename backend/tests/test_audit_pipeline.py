@@ -0,0 +1,178 @@
+"""
+Unit tests for the buffered audit log pipeline
+Run with: python -m unittest backend.tests.test_audit_pipeline
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.audit_pipeline import AuditPipeline
+
+
+class RecordingWriter:
+    """Collects batches; raises while `fail` is set."""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+        self.lock = threading.Lock()
+
+    def __call__(self, rows):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        with self.lock:
+            self.batches.append(list(rows))
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+class ConstraintError(Exception):
+    """Mimics postgrest's APIError for a foreign key violation."""
+    code = "23503"
+
+
+class SchemaError(Exception):
+    """Mimics postgrest's APIError for a column missing from the schema cache."""
+    code = "PGRST204"
+
+
+class WorkerKilled(BaseException):
+    """Stands in for the process dying in the middle of a replay."""
+
+
+class TestAuditPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.tmp.name, "spill.jsonl")
+        self.dead_letter_path = os.path.join(self.tmp.name, "dead_letter.jsonl")
+        self.writer = RecordingWriter()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_pipeline(self, **kwargs):
+        kwargs.setdefault("batch_size", 10)
+        kwargs.setdefault("flush_interval", 0.05)
+        kwargs.setdefault("dead_letter_path", self.dead_letter_path)
+        return AuditPipeline(self.writer, spill_path=self.spill_path, **kwargs)
+
+    def test_rows_written_in_batches_and_drained(self):
+        pipeline = self.make_pipeline()
+        for i in range(25):
+            pipeline.record({"action": "A", "entity_id": str(i)})
+        pipeline.drain()
+        self.assertEqual([row["entity_id"] for row in self.writer.rows], [str(i) for i in range(25)])
+        self.assertTrue(all(len(batch) <= 10 for batch in self.writer.batches))
+        self.assertIn("created_at", self.writer.rows[0])
+
+    def test_failed_batch_is_spilled_and_replayed(self):
+        pipeline = self.make_pipeline()
+        self.writer.fail = True
+        pipeline.record({"action": "A", "entity_id": "1"})
+        pipeline.drain()
+        with open(self.spill_path) as f:
+            self.assertEqual(json.loads(f.readline())["entity_id"], "1")
+
+        self.writer.fail = False
+        replayer = self.make_pipeline()
+        self.assertEqual(replayer.replay_spill(), 1)
+        self.assertEqual(self.writer.rows[0]["entity_id"], "1")
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_rejected_row_is_dead_lettered_alone(self):
+        def writer(rows):
+            if any(row["entity_id"] == "bad" for row in rows):
+                raise ConstraintError("violates foreign key constraint")
+            self.writer(rows)
+
+        pipeline = self.make_pipeline()
+        pipeline.writer = writer
+        for entity_id in ["1", "bad", "2"]:
+            pipeline.record({"action": "A", "entity_id": entity_id})
+        pipeline.drain()
+
+        self.assertEqual([row["entity_id"] for row in self.writer.rows], ["1", "2"])
+        self.assertFalse(os.path.exists(self.spill_path))
+        with open(self.dead_letter_path) as f:
+            self.assertEqual(json.loads(f.readline())["row"]["entity_id"], "bad")
+        self.assertEqual(pipeline.get_stats()["dead_lettered"], 1)
+
+    def test_schema_error_is_dead_lettered(self):
+        def writer(rows):
+            if any("bogus_column" in row for row in rows):
+                raise SchemaError("Could not find the 'bogus_column' column of 'audit_logs'")
+            self.writer(rows)
+
+        pipeline = self.make_pipeline()
+        pipeline.writer = writer
+        pipeline.record({"action": "A", "entity_id": "1"})
+        pipeline.record({"action": "A", "entity_id": "2", "bogus_column": True})
+        pipeline.drain()
+
+        self.assertEqual([row["entity_id"] for row in self.writer.rows], ["1"])
+        self.assertFalse(os.path.exists(self.spill_path))
+        self.assertEqual(pipeline.get_stats()["dead_lettered"], 1)
+
+    def test_interrupted_replay_is_resumed(self):
+        pipeline = self.make_pipeline(batch_size=2)
+        pipeline._spill([{"action": "A", "entity_id": str(i)} for i in range(5)])
+
+        def dies_on_second_batch(rows):
+            if self.writer.batches:
+                raise WorkerKilled()
+            self.writer(rows)
+
+        pipeline.writer = dies_on_second_batch
+        with self.assertRaises(WorkerKilled):
+            pipeline.replay_spill()
+        replaying = os.path.join(self.tmp.name, "spill.replaying")
+        self.assertTrue(os.path.exists(replaying))
+        self.assertTrue(pipeline.get_stats()["spill_pending"])
+
+        # A restarted writer picks the leftover file up on startup
+        restarted = self.make_pipeline(batch_size=2)
+        restarted.record({"action": "B", "entity_id": "new"})
+        restarted.drain()
+        self.assertEqual(
+            [row["entity_id"] for row in self.writer.rows],
+            ["0", "1", "0", "1", "2", "3", "4", "new"]
+        )
+        self.assertFalse(os.path.exists(replaying))
+
+    def test_replay_failure_keeps_unwritten_rows(self):
+        pipeline = self.make_pipeline(batch_size=2)
+        pipeline._spill([{"action": "A", "entity_id": str(i)} for i in range(5)])
+        self.writer.fail = True
+        self.assertEqual(pipeline.replay_spill(), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "spill.replaying")))
+
+        self.writer.fail = False
+        self.assertEqual(pipeline.replay_spill(), 5)
+        self.assertEqual([row["entity_id"] for row in self.writer.rows], ["0", "1", "2", "3", "4"])
+
+    def test_full_queue_spills_instead_of_blocking(self):
+        pipeline = self.make_pipeline(max_queue=1, flush_interval=5)
+        self.writer.fail = True
+        for i in range(5):
+            pipeline.record({"entity_id": str(i)})
+        self.assertGreater(pipeline.spilled, 0)
+
+    def test_record_after_drain_spills(self):
+        pipeline = self.make_pipeline()
+        pipeline.drain()
+        pipeline.record({"entity_id": "late"})
+        self.assertEqual(self.writer.rows, [])
+        self.assertEqual(pipeline.get_stats()["spilled"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Unit tests for the session/tier auth cache
+Run with: python -m unittest backend.tests.test_auth_cache
+"""
+
+import json
+import time
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.auth_cache import AuthCache, _token_key
+from utils.ttl_cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """In-process LRU with expiry."""
+
+    def test_expired_entry_is_dropped(self):
+        cache = TTLCache()
+        cache.set("k", {"v": 1}, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("k"))
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_entries=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+
+class TestAuthCache(unittest.TestCase):
+    """Lookups go to the loader once; invalidation forces a reload."""
+
+    def setUp(self):
+        self.cache = AuthCache()
+        self.loads = 0
+
+    def loader(self, value):
+        def load():
+            self.loads += 1
+            return value
+        return load
+
+    def test_session_loaded_once(self):
+        session = {"user_id": "u1", "expires_at": time.time() + 3600}
+        for _ in range(3):
+            self.assertEqual(self.cache.get_session("tok", self.loader(session))["user_id"], "u1")
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_unknown_token_is_negative_cached(self):
+        self.assertIsNone(self.cache.get_session("bad", self.loader(None)))
+        self.assertIsNone(self.cache.get_session("bad", self.loader(None)))
+        self.assertEqual(self.loads, 1)
+
+    def test_logout_invalidation_reloads(self):
+        session = {"user_id": "u1", "expires_at": time.time() + 3600}
+        self.cache.get_session("tok", self.loader(session))
+        self.cache.invalidate_sessions(["tok"])
+        self.assertIsNone(self.cache.get_session("tok", self.loader(None)))
+        self.assertEqual(self.loads, 2)
+
+    def test_entry_never_outlives_subscription(self):
+        self.cache.get_tier("u1", self.loader({"tier": "pro_ai", "expires": time.time() + 0.01}))
+        time.sleep(0.02)
+        self.cache.get_tier("u1", self.loader({"tier": "free", "expires": None}))
+        self.assertEqual(self.loads, 2)
+
+    def test_pubsub_message_evicts_local_entry(self):
+        session = {"user_id": "u1", "expires_at": time.time() + 3600}
+        self.cache.get_session("tok", self.loader(session))
+        self.cache.handle_invalidation(json.dumps([_token_key("tok")]))
+        self.cache.get_session("tok", self.loader(session))
+        self.assertEqual(self.loads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
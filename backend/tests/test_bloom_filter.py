@@ -0,0 +1,35 @@
+"""
+Unit tests for the Bloom filter used by the session revocation list
+Run with: python -m unittest backend.tests.test_bloom_filter
+"""
+
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bloom_filter import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    """Membership guarantees."""
+
+    def test_no_false_negatives(self):
+        items = [f"jti-{i}" for i in range(5000)]
+        bloom = BloomFilter.from_items(items)
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate_is_bounded(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        for i in range(2000):
+            bloom.add(f"revoked-{i}")
+        false_positives = sum(f"active-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+    def test_empty_filter_contains_nothing(self):
+        self.assertNotIn("anything", BloomFilter())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
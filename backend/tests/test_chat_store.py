@@ -0,0 +1,224 @@
+"""
+Unit tests for bucketed chat message storage
+Run with: python -m unittest backend.tests.test_chat_store
+
+The Mongo collections are in-memory stand-ins that evaluate the few
+aggregation expressions chat_store uses ($add, $ifNull, $size, $cond,
+$eq, $literal and "$field" paths).
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import chat_store
+from services.chat_store import DEFAULT_TITLE, append_message, delete_session_messages, get_messages, get_session_meta
+
+
+def evaluate(expr, doc):
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, list):
+        return [evaluate(e, doc) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    (op, arg), = expr.items()
+    if op == "$literal":
+        return arg
+    if op == "$add":
+        return sum(evaluate(arg, doc))
+    if op == "$ifNull":
+        value, default = evaluate(arg, doc)
+        return default if value is None else value
+    if op == "$size":
+        return len(evaluate(arg, doc))
+    if op == "$eq":
+        left, right = evaluate(arg, doc)
+        return left == right
+    if op == "$cond":
+        condition, then, otherwise = arg
+        return evaluate(then, doc) if evaluate(condition, doc) else evaluate(otherwise, doc)
+    raise NotImplementedError(op)
+
+
+def matches(doc, query):
+    for field, cond in query.items():
+        value = doc.get(field)
+        if isinstance(cond, dict):
+            if "$gte" in cond and not value >= cond["$gte"]:
+                return False
+            if "$lte" in cond and not value <= cond["$lte"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    """Sorts on the stored documents, then projects, like a Mongo cursor."""
+
+    def __init__(self, docs, project):
+        self.docs, self.project = docs, project
+
+    def sort(self, field, direction):
+        return FakeCursor(sorted(self.docs, key=lambda d: d[field], reverse=direction < 0), self.project)
+
+    def __iter__(self):
+        return (self.project(doc) for doc in self.docs)
+
+
+class FakeResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+
+class FakeCollection:
+
+    def __init__(self, docs=None):
+        self.docs = docs or []
+
+    def _project(self, doc, projection):
+        if projection is None:
+            return dict(doc)
+        result = {}
+        for field, spec in projection.items():
+            if field == "_id" or not spec:
+                continue
+            if isinstance(spec, dict) and "$slice" in spec:
+                start, count = spec["$slice"]
+                result[field] = doc.get(field, [])[start:start + count]
+            elif spec == 1:
+                if field in doc:
+                    result[field] = doc[field]
+            else:
+                result[field] = evaluate(spec, doc)
+        return result
+
+    def find_one(self, query, projection=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                return self._project(doc, projection)
+        return None
+
+    def find(self, query, projection=None):
+        docs = [doc for doc in self.docs if matches(doc, query)]
+        return FakeCursor(docs, lambda doc: self._project(doc, projection))
+
+    def find_one_and_update(self, query, pipeline, projection=None, return_document=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                for stage in pipeline:
+                    doc.update({field: evaluate(expr, doc) for field, expr in stage["$set"].items()})
+                return self._project(doc, projection)
+        return None
+
+    def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if matches(d, query)), None)
+        if doc is None:
+            doc = dict(query)
+            doc.update(update.get("$setOnInsert", {}))
+            self.docs.append(doc)
+        for field, value in update.get("$push", {}).items():
+            doc.setdefault(field, []).append(value)
+        for field, amount in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + amount
+        doc.update(update.get("$set", {}))
+
+    def aggregate(self, pipeline):
+        docs = self.docs
+        for stage in pipeline:
+            if "$match" in stage:
+                docs = [d for d in docs if matches(d, stage["$match"])]
+            elif "$limit" in stage:
+                docs = docs[:stage["$limit"]]
+            elif "$project" in stage:
+                docs = [self._project(d, stage["$project"]) for d in docs]
+        return iter(docs)
+
+    def delete_many(self, query):
+        kept = [d for d in self.docs if not matches(d, query)]
+        deleted = len(self.docs) - len(kept)
+        self.docs = kept
+        return FakeResult(deleted)
+
+
+class TestChatStore(unittest.TestCase):
+
+    def setUp(self):
+        self.sessions = FakeCollection([{"session_id": "s1", "user_id": "u1", "title": DEFAULT_TITLE}])
+        self.buckets = FakeCollection()
+        patches = [
+            mock.patch.object(chat_store, "chat_sessions_collection", self.sessions),
+            mock.patch.object(chat_store, "chat_message_buckets_collection", self.buckets),
+            mock.patch.object(chat_store, "BUCKET_SIZE", 3),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def append(self, count, session_id="s1"):
+        for i in range(count):
+            append_message(session_id, "user" if i % 2 == 0 else "assistant", f"m{i + 1}")
+
+    def contents(self, page):
+        return [m["content"] for m in page["messages"]]
+
+    def test_buckets_roll_over(self):
+        self.append(7)
+        self.assertEqual([(b["bucket"], b["count"]) for b in self.buckets.docs], [(0, 3), (1, 3), (2, 1)])
+        self.assertEqual([m["seq"] for m in self.buckets.docs[1]["messages"]], [4, 5, 6])
+        self.assertEqual(get_session_meta("s1")["message_count"], 7)
+
+    def test_missing_session_is_not_written(self):
+        self.assertIsNone(append_message("nope", "user", "hi"))
+        self.assertEqual(self.buckets.docs, [])
+
+    def test_title_from_first_user_message(self):
+        append_message("s1", "user", "$user_id {\"$literal\": 1}")
+        append_message("s1", "user", "second question")
+        self.assertEqual(self.sessions.docs[0]["title"], "$user_id {\"$literal\": 1}")
+
+    def test_seq_cursor_pagination(self):
+        self.append(8)
+        page = get_messages("s1", limit=3)
+        self.assertEqual(self.contents(page), ["m6", "m7", "m8"])
+        self.assertEqual(page["next_cursor"], 6)
+
+        page = get_messages("s1", limit=3, before=page["next_cursor"])
+        self.assertEqual(self.contents(page), ["m3", "m4", "m5"])
+
+        page = get_messages("s1", limit=3, before=page["next_cursor"])
+        self.assertEqual(self.contents(page), ["m1", "m2"])
+        self.assertFalse(page["has_more"])
+        self.assertIsNone(page["next_cursor"])
+
+    def test_legacy_embedded_messages_are_read_first(self):
+        self.sessions.docs.append({
+            "session_id": "old",
+            "title": "Old chat",
+            "messages": [{"role": "user", "content": f"legacy{i}"} for i in range(1, 5)],
+        })
+        meta = get_session_meta("old")
+        self.assertEqual((meta["message_count"], meta["legacy_count"]), (4, 4))
+
+        message = append_message("old", "assistant", "new1")
+        self.assertEqual(message["seq"], 5)
+        self.assertEqual(self.buckets.docs[0]["bucket"], 1)
+
+        page = get_messages("old", limit=3)
+        self.assertEqual(self.contents(page), ["legacy3", "legacy4", "new1"])
+        self.assertEqual([m["seq"] for m in page["messages"]], [3, 4, 5])
+        page = get_messages("old", limit=3, before=page["next_cursor"])
+        self.assertEqual(self.contents(page), ["legacy1", "legacy2"])
+
+    def test_delete_removes_all_buckets(self):
+        self.append(5)
+        self.assertEqual(delete_session_messages("s1"), 2)
+        self.assertEqual(get_messages("s1")["messages"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
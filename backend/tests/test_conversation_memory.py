@@ -0,0 +1,84 @@
+"""
+Unit tests for server-side conversation memory
+Run with: python -m unittest backend.tests.test_conversation_memory
+"""
+
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.conversation_memory import ConversationMemory, estimate_tokens
+
+
+class TestConversationWindow(unittest.TestCase):
+    """Rolling window, summary folding and token budget."""
+
+    def test_new_session_is_empty(self):
+        memory = ConversationMemory()
+        window = memory.load("chat-new")
+        self.assertEqual(window.turns, [])
+        self.assertEqual(window.render(), "")
+
+    def test_exchange_is_persisted(self):
+        memory = ConversationMemory()
+        memory.append_exchange("chat-1", "Brakes squeal", "Check the pads")
+        window = memory.load("chat-1")
+        self.assertEqual([t["role"] for t in window.turns], ["user", "assistant"])
+        self.assertIn("User: Brakes squeal", window.render())
+
+    def test_max_turns_folds_oldest_into_summary(self):
+        memory = ConversationMemory(max_turns=4)
+        for i in range(3):
+            memory.append_exchange("chat-2", f"question {i}", f"answer {i}")
+        window = memory.load("chat-2")
+        self.assertEqual(len(window.turns), 4)
+        self.assertEqual(window.total_turns, 6)
+        self.assertIn("question 0", window.summary)
+        self.assertNotIn("question 0", window.turns[0]["content"])
+
+    def test_token_budget_is_respected(self):
+        memory = ConversationMemory(token_budget=200, summary_budget=50, max_turns=100)
+        for i in range(20):
+            memory.append("chat-3", "user", f"long symptom description {i} " * 10)
+        window = memory.load("chat-3")
+        self.assertLessEqual(window.token_count(), 200)
+        self.assertLessEqual(estimate_tokens(window.summary), 50)
+        self.assertIn("description 19", window.turns[-1]["content"])
+
+    def test_cache_miss_rebuilds_from_loader(self):
+        stored = [
+            {"role": "user", "content": "Engine overheating"},
+            {"role": "assistant", "content": "Check coolant level"},
+        ]
+        memory = ConversationMemory(session_loader=lambda session_id, limit, user_id: stored[-limit:])
+        window = memory.load("chat-4")
+        self.assertEqual(len(window.turns), 2)
+        self.assertIn("Engine overheating", window.render())
+
+    def test_clear_forgets_session(self):
+        memory = ConversationMemory()
+        memory.append("chat-5", "user", "hello")
+        memory.clear("chat-5")
+        self.assertEqual(memory.load("chat-5").turns, [])
+
+    def test_other_user_cannot_read_session_memory(self):
+        owners = {"chat-6": "user-a"}
+        stored = [{"role": "user", "content": "My car is KA01AB1234"}]
+        memory = ConversationMemory(
+            session_loader=lambda session_id, limit, user_id:
+                stored if owners.get(session_id) == user_id else []
+        )
+        memory.append_exchange("chat-6", "Brakes squeal", "Check the pads", user_id="user-a")
+
+        # User B sends user A's session id: neither the cache nor a rebuild leaks
+        window = memory.load("chat-6", "user-b")
+        self.assertEqual(window.render(), "")
+        memory.append_exchange("chat-6", "hello", "hi", window)
+        self.assertIn("Brakes squeal", memory.load("chat-6", "user-a").render())
+        self.assertNotIn("hello", memory.load("chat-6", "user-a").render())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
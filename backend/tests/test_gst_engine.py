@@ -0,0 +1,129 @@
+"""
+Unit tests for the vectorized GST engine
+Run with: python -m unittest backend.tests.test_gst_engine
+
+The equivalence tests generate seeded random invoices and require the bulk
+engine to reproduce the Decimal implementations exactly.
+"""
+
+import os
+import random
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.billing import calculate_invoice_totals
+from services.gst_engine import (
+    NUMPY_AVAILABLE, GSTLines, bulk_invoice_totals, compute_gst_bulk, gst_rate_summary, to_fixed
+)
+from services.invoice_manager import InvoiceItem
+
+GST_RATES = ["0", "0.25", "3", "5", "12", "18", "28"]
+STATES = ["27", "29", "07"]
+
+
+def random_amount(rng, decimals, upper):
+    """Fixed-precision amount as a float, string or Decimal, like real payloads"""
+    value = Decimal(rng.randint(0, upper * 10 ** decimals)).scaleb(-decimals)
+    return rng.choice([float(value), str(value), value])
+
+
+def random_item(rng):
+    return {
+        "description": "Part",
+        "quantity": random_amount(rng, rng.choice([0, 1, 3]), 50),
+        # Mostly small prices so half-paise ties come up often
+        "unit_price": random_amount(rng, 2, rng.choice([1, 100, 250000])),
+        "gst_rate": rng.choice(GST_RATES),
+    }
+
+
+def random_invoices(rng, count):
+    return [
+        {"customer_state": rng.choice(STATES), "items": [random_item(rng) for _ in range(rng.randint(0, 8))]}
+        for _ in range(count)
+    ]
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy not installed")
+class TestDecimalEquivalence(unittest.TestCase):
+    """Bulk engine output must equal the Decimal path for every input"""
+
+    def test_matches_calculate_invoice_totals(self):
+        for seed in range(20):
+            rng = random.Random(seed)
+            invoices = random_invoices(rng, 50)
+            bulk = bulk_invoice_totals(invoices, "27")
+            for invoice, result in zip(invoices, bulk):
+                expected = calculate_invoice_totals(invoice["items"], "27", invoice["customer_state"])
+                self.assertEqual(result, expected, f"seed {seed}: {invoice}")
+
+    def test_matches_invoice_item_with_discount(self):
+        rng = random.Random(7)
+        items = []
+        for _ in range(2000):
+            item = random_item(rng)
+            item["discount_amount"] = random_amount(rng, 2, 500)
+            items.append(item)
+        lines = GSTLines.from_invoices([{"customer_state": "27", "items": items}], "27", apply_discount=True)
+        computed = compute_gst_bulk(lines)
+
+        for i, item in enumerate(items):
+            expected = InvoiceItem(
+                quantity=Decimal(str(item["quantity"])),
+                unit_price=Decimal(str(item["unit_price"])),
+                discount_amount=Decimal(str(item["discount_amount"])),
+                gst_rate=Decimal(str(item["gst_rate"]))
+            )
+            for key in ("taxable_value", "tax_amount", "cgst_amount", "sgst_amount"):
+                self.assertEqual(int(computed[key][i]), int(getattr(expected, key) * 100), f"{key}: {item}")
+
+    def test_half_paise_rounds_up(self):
+        # 0.5 x 0.01 = 0.005 -> 0.01; tax 0.01 splits into 0.01 CGST + 0.01 SGST
+        invoice = {"customer_state": "27", "items": [{"quantity": 0.5, "unit_price": 0.01, "gst_rate": 100}]}
+        result = bulk_invoice_totals([invoice], "27")[0]
+        self.assertEqual(result, calculate_invoice_totals(invoice["items"], "27", "27"))
+        self.assertEqual(result["items"][0]["cgst_amount"], 0.01)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy not installed")
+class TestBulkEngine(unittest.TestCase):
+    """Fixed-point conversion and aggregation"""
+
+    def test_to_fixed_rejects_excess_precision(self):
+        self.assertEqual(to_fixed([0.1, "12.34", Decimal("5")], 100).tolist(), [10, 1234, 500])
+        with self.assertRaises(ValueError):
+            to_fixed([0.125], 100)
+
+    def test_empty_invoices(self):
+        invoices = [{"customer_state": "29", "items": []}, {"customer_state": "27", "items": []}]
+        self.assertEqual(
+            bulk_invoice_totals(invoices, "27"),
+            [calculate_invoice_totals([], "27", invoice["customer_state"]) for invoice in invoices]
+        )
+
+    def test_rate_summary_matches_line_sums(self):
+        rng = random.Random(11)
+        invoices = random_invoices(rng, 200)
+        summary = gst_rate_summary(invoices, "27")
+
+        expected = {}
+        for invoice in invoices:
+            result = calculate_invoice_totals(invoice["items"], "27", invoice["customer_state"])
+            for item in result["items"]:
+                row = expected.setdefault(float(item["gst_rate"]), {"taxable_value": 0, "igst_amount": 0, "line_count": 0})
+                row["taxable_value"] += round(item["taxable_value"] * 100)
+                row["igst_amount"] += round(item["igst_amount"] * 100)
+                row["line_count"] += 1
+
+        self.assertEqual([row["gst_rate"] for row in summary], sorted(expected))
+        for row in summary:
+            self.assertEqual(round(row["taxable_value"] * 100), expected[row["gst_rate"]]["taxable_value"])
+            self.assertEqual(round(row["igst_amount"] * 100), expected[row["gst_rate"]]["igst_amount"])
+            self.assertEqual(row["line_count"], expected[row["gst_rate"]]["line_count"])
+
+
+if __name__ == '__main__':
+    unittest.main()
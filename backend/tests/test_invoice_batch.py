@@ -0,0 +1,134 @@
+"""
+Unit tests for batch invoice creation
+Run with: python -m unittest backend.tests.test_invoice_batch
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import invoice_manager as invoice_module
+from services.invoice_manager import InvoiceManager
+
+
+class BatchRPC:
+    """Stand-in for supabase.rpc('create_invoices_batch', ...) numbering like the SQL function."""
+
+    def __init__(self):
+        self.calls = []
+        self.last_number = 0
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        self._name, self._params = name, params
+        return self
+
+    def execute(self):
+        params = self._params
+
+        class Result:
+            pass
+        result = Result()
+
+        if self._name == "allocate_invoice_numbers":
+            self.last_number += params["p_count"]
+            result.data = self.last_number - params["p_count"] + 1
+            return result
+
+        rows = []
+        for invoice in params["p_invoices"]:
+            self.last_number += 1
+            rows.append({
+                "id": invoice["id"],
+                "invoice_number": f"{params['p_prefix']}-{params['p_fiscal_year']}-{self.last_number:05d}"
+            })
+        result.data = rows
+        return result
+
+
+def _entry(n, customer_state="27"):
+    return {
+        "job_card_id": f"job-{n}",
+        "customer_details": {"customer_name": f"Fleet vehicle {n}"},
+        "customer_state": customer_state,
+        "items": [
+            {"type": "PART", "description": "Brake pads", "quantity": 2, "unit_price": 1500, "gst_rate": 28},
+            {"type": "LABOR", "description": "Fitting", "quantity": 1, "unit_price": 500, "gst_rate": 18},
+        ],
+    }
+
+
+class TestCreateInvoicesBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.db = BatchRPC()
+        self.manager = InvoiceManager(self.db)
+
+    def test_numbers_assigned_in_input_order(self):
+        success, result = self.manager.create_invoices_batch(
+            "ws-1", [_entry(n) for n in range(3)], workshop_state="27", prefix="G4G"
+        )
+        self.assertTrue(success)
+        self.assertEqual(result["count"], 3)
+        numbers = [invoice["invoice_number"] for invoice in result["invoices"]]
+        self.assertEqual([number.rsplit("-", 1)[1] for number in numbers], ["00001", "00002", "00003"])
+        self.assertEqual([invoice["job_card_id"] for invoice in result["invoices"]], ["job-0", "job-1", "job-2"])
+
+    def test_one_rpc_per_chunk_with_items(self):
+        with mock.patch.object(invoice_module, "INVOICE_BATCH_SIZE", 2):
+            success, result = self.manager.create_invoices_batch(
+                "ws-1", [_entry(n) for n in range(5)], workshop_state="27"
+            )
+        self.assertTrue(success)
+        self.assertEqual([len(params["p_invoices"]) for _, params in self.db.calls], [2, 2, 1])
+        payload = self.db.calls[0][1]["p_invoices"][0]
+        self.assertEqual(len(payload["items"]), 2)
+        self.assertTrue(all(item["invoice_id"] == payload["id"] for item in payload["items"]))
+        # 2 x 1500 @ 28% + 500 @ 18%
+        self.assertAlmostEqual(payload["grand_total"], 3840.0 + 590.0)
+
+    def test_tax_type_follows_customer_state(self):
+        success, result = self.manager.create_invoices_batch(
+            "ws-1", [_entry(0, customer_state="27"), _entry(1, customer_state="29")], workshop_state="27"
+        )
+        self.assertTrue(success)
+        self.assertEqual([invoice["tax_type"] for invoice in result["invoices"]], ["CGST_SGST", "IGST"])
+
+    def test_short_result_reports_failure(self):
+        self.db.execute = lambda: type("Result", (), {"data": []})()
+        success, result = self.manager.create_invoices_batch("ws-1", [_entry(0)], workshop_state="27")
+        self.assertFalse(success)
+        self.assertEqual(result["count"], 0)
+
+
+class TestInvoiceNumbers(unittest.TestCase):
+
+    def setUp(self):
+        self.db = BatchRPC()
+        self.manager = InvoiceManager(self.db)
+
+    def test_create_invoice_is_one_transactional_rpc(self):
+        entry = _entry(0)
+        success, result = self.manager.create_invoice(
+            job_card_id=entry["job_card_id"],
+            workshop_id="ws-1",
+            customer_details=entry["customer_details"],
+            items=entry["items"],
+            workshop_state="27",
+            customer_state="27",
+        )
+        self.assertTrue(success)
+        self.assertEqual([name for name, _ in self.db.calls], ["create_invoices_batch"])
+        self.assertTrue(result["invoice"]["invoice_number"].endswith("-00001"))
+
+    def test_generate_invoice_number_single_round_trip(self):
+        numbers = [self.manager.generate_invoice_number("ws-1", prefix="G4G")[1] for _ in range(2)]
+        self.assertEqual([number.rsplit("-", 1)[1] for number in numbers], ["00001", "00002"])
+        self.assertEqual([params["p_count"] for _, params in self.db.calls], [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
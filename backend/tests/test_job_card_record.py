@@ -0,0 +1,79 @@
+"""
+Unit tests for the compact JobCard record and list serializer
+Run with: python -m unittest backend.tests.test_job_card_record
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.job_card_manager import (
+    JobCard, JobCardManager, JobStatus, ALLOWED_TRANSITIONS, VALID_TRANSITIONS, job_card_row_to_dict
+)
+
+
+ROW = {
+    "id": "6f1c2d1e-0000-4000-8000-000000000001",
+    "vehicle_id": None,
+    "workshop_id": "6f1c2d1e-0000-4000-8000-0000000000aa",
+    "registration_number": "KA01AB1234",
+    "status": "CUSTOMER_APPROVAL",
+    "priority": "HIGH",
+    "symptoms": ["noise"],
+    "approval_expires_at": "2026-01-02T10:00:00Z",
+    "sent_for_approval_at": "2026-01-01T10:00:00+00:00",
+    "created_at": "2026-01-01T09:00:00+00:00",
+    "updated_at": "2026-01-01T10:00:00+00:00",
+}
+
+
+class TestJobCardRecord(unittest.TestCase):
+    """Slotted record with lazily parsed timestamps."""
+
+    def setUp(self):
+        self.job_card = JobCardManager(supabase_client=None)._dict_to_job_card(ROW)
+
+    def test_slotted(self):
+        with self.assertRaises(AttributeError):
+            self.job_card.unexpected = 1
+
+    def test_timestamps_parse_on_access(self):
+        self.assertIsInstance(self.job_card._created_at, str)
+        self.assertEqual(self.job_card.created_at, datetime(2026, 1, 1, 9, tzinfo=timezone.utc))
+        self.assertIsInstance(self.job_card._created_at, datetime)
+        self.assertEqual(self.job_card.approval_expires_at, datetime(2026, 1, 2, 10, tzinfo=timezone.utc))
+        self.assertIsNone(self.job_card.closed_at)
+
+    def test_defaults(self):
+        job_card = JobCard(id="1", vehicle_id=None, workshop_id="w", registration_number="X")
+        self.assertEqual(job_card.status, JobStatus.CREATED)
+        self.assertEqual(job_card.symptoms, [])
+        self.assertIsInstance(job_card.created_at, datetime)
+        self.assertEqual(job_card.to_dict()["created_at"], job_card.created_at.isoformat())
+
+
+class TestSerialization(unittest.TestCase):
+    """Fast row serializer matches JobCard.to_dict()."""
+
+    def test_row_serializer_matches_to_dict(self):
+        job_card = JobCardManager(supabase_client=None)._dict_to_job_card(ROW)
+        self.assertEqual(job_card_row_to_dict(ROW), job_card.to_dict())
+
+    def test_allowed_transitions_precomputed(self):
+        for state, targets in VALID_TRANSITIONS.items():
+            self.assertEqual(ALLOWED_TRANSITIONS[state.value], tuple(t.value for t in targets))
+        first = job_card_row_to_dict(ROW)["allowed_transitions"]
+        second = job_card_row_to_dict(dict(ROW, id="other"))["allowed_transitions"]
+        self.assertIs(first, second)
+
+    def test_unknown_status_serializes(self):
+        data = job_card_row_to_dict(dict(ROW, status="LEGACY_PENDING"))
+        self.assertEqual(data["status"], "LEGACY_PENDING")
+        self.assertEqual(data["allowed_transitions"], ())
+
+
+if __name__ == "__main__":
+    unittest.main()
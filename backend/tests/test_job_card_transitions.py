@@ -0,0 +1,134 @@
+"""
+Unit tests for batched job card state transitions
+Run with: python -m unittest backend.tests.test_job_card_transitions
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import job_card_manager as job_card_module
+from services.job_card_manager import JobCardManager, JobStatus
+
+WORKSHOP = "6f1c2d1e-0000-4000-8000-0000000000aa"
+
+
+class Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class StubSupabase:
+    """job_cards select by id plus a transition_job_cards RPC that moves rows still in `expected`."""
+
+    def __init__(self, rows):
+        self.rows = {row["id"]: row for row in rows}
+        self.rpc_calls = []
+        self.changed_concurrently = set()
+
+    def table(self, _name):
+        return self
+
+    def select(self, _columns):
+        self.filters = []
+        return self
+
+    def eq(self, field, value):
+        self.filters.append(lambda row: row.get(field) == value)
+        return self
+
+    def in_(self, field, values):
+        self.filters.append(lambda row: row.get(field) in values)
+        return self
+
+    def execute(self):
+        return Result([dict(row) for row in self.rows.values() if all(f(row) for f in self.filters)])
+
+    def rpc(self, name, params):
+        self.rpc_calls.append((name, params))
+        moved = []
+        for item in params["p_items"]:
+            row = self.rows[item["id"]]
+            if item["id"] in self.changed_concurrently or row["status"] != item["expected"]:
+                continue
+            row["status"] = params["p_target_status"]
+            moved.append(dict(row))
+        return mock.Mock(execute=lambda: Result(moved))
+
+
+def card(job_id, status):
+    return {
+        "id": job_id,
+        "workshop_id": WORKSHOP,
+        "registration_number": "KA01AB1234",
+        "status": status,
+        "created_at": "2026-01-01T09:00:00+00:00",
+        "updated_at": "2026-01-01T10:00:00+00:00",
+    }
+
+
+class TestTransitionMany(unittest.TestCase):
+
+    def setUp(self):
+        self.db = StubSupabase([
+            card("c1", "INVOICED"),
+            card("c2", "INVOICED"),
+            card("c3", "INVOICED"),
+            card("c4", "IN_PROGRESS"),
+        ])
+        self.manager = JobCardManager(supabase_client=self.db)
+        patch = mock.patch.object(job_card_module, "enqueue_pdf_task")
+        self.enqueue = patch.start()
+        self.addCleanup(patch.stop)
+
+    def close(self, job_ids):
+        success, result = self.manager.transition_many(job_ids, JobStatus.CLOSED, WORKSHOP, updated_by="u1")
+        self.assertTrue(success)
+        return result
+
+    def test_applied_and_rejected_ids(self):
+        self.db.changed_concurrently.add("c3")
+        result = self.close(["c1", "c2", "c3", "c4", "missing", "c1"])
+
+        self.assertEqual([row["id"] for row in result["transitioned"]], ["c1", "c2"])
+        self.assertTrue(all(row["status"] == "CLOSED" for row in result["transitioned"]))
+        self.assertEqual(
+            {failure["id"]: failure["code"] for failure in result["failed"]},
+            {"c3": "STATE_CONFLICT", "c4": "INVALID_TRANSITION", "missing": "NOT_FOUND"}
+        )
+
+    def test_illegal_transitions_rejected_before_rpc(self):
+        self.close(["c1", "c4"])
+        (name, params), = self.db.rpc_calls
+        self.assertEqual(name, "transition_job_cards")
+        self.assertEqual(params["p_items"], [{"id": "c1", "expected": "INVOICED"}])
+        self.assertEqual(params["p_target_status"], "CLOSED")
+
+        self.db.rpc_calls.clear()
+        result = self.close(["c4"])
+        self.assertEqual(self.db.rpc_calls, [])
+        self.assertEqual(result["failed"][0]["code"], "INVALID_TRANSITION")
+
+    def test_pdf_enqueued_only_for_closed(self):
+        self.db.changed_concurrently.add("c2")
+        self.close(["c1", "c2"])
+        self.enqueue.assert_called_once_with("workers.tasks.generate_job_card_pdf", "c1", WORKSHOP)
+
+        self.enqueue.reset_mock()
+        success, result = self.manager.transition_many(["c4"], JobStatus.PDI, WORKSHOP)
+        self.assertTrue(success)
+        self.assertEqual([row["id"] for row in result["transitioned"]], ["c4"])
+        self.enqueue.assert_not_called()
+
+    def test_one_rpc_per_batch(self):
+        with mock.patch.object(job_card_module, "TRANSITION_BATCH_SIZE", 2):
+            result = self.close(["c1", "c2", "c3"])
+        self.assertEqual(len(self.db.rpc_calls), 2)
+        self.assertEqual(len(result["transitioned"]), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Unit tests for the latency-aware LLM router
+Run with: python -m unittest backend.tests.test_llm_router
+"""
+
+import asyncio
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.llm_router import LLMRouter, LLMProvider, LLMUnavailableError, MIN_SAMPLES
+
+
+def make_provider(name, delay=0.0, fail=False, calls=None):
+    """Fake provider that sleeps `delay` seconds then answers or raises."""
+    async def complete(system_prompt, text):
+        if calls is not None:
+            calls.append(name)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} down")
+        return f"{name}: {text}"
+    return LLMProvider(name=name, model="test", complete=complete)
+
+
+class TestProviderRanking(unittest.TestCase):
+    """Ranking by rolling latency and health."""
+
+    def test_cold_start_keeps_registration_order(self):
+        router = LLMRouter()
+        router.register(make_provider("openai"))
+        router.register(make_provider("gemini"))
+        self.assertEqual([p.name for p in router.ranked_providers()], ["openai", "gemini"])
+
+    def test_fastest_provider_ranked_first(self):
+        router = LLMRouter()
+        slow, fast = make_provider("slow"), make_provider("fast")
+        router.register(slow)
+        router.register(fast)
+        for _ in range(MIN_SAMPLES):
+            slow.stats.record(2.0, ok=True)
+            fast.stats.record(0.3, ok=True)
+        self.assertEqual(router.ranked_providers()[0].name, "fast")
+
+    def test_unhealthy_provider_ranked_last(self):
+        router = LLMRouter()
+        flaky, steady = make_provider("flaky"), make_provider("steady")
+        router.register(flaky)
+        router.register(steady)
+        for _ in range(MIN_SAMPLES):
+            flaky.stats.record(0.1, ok=False)
+            steady.stats.record(1.0, ok=True)
+        self.assertFalse(flaky.stats.is_healthy())
+        self.assertEqual(router.ranked_providers()[0].name, "steady")
+
+    def test_percentiles(self):
+        provider = make_provider("p")
+        for latency in [0.1, 0.2, 0.3, 0.4, 1.0]:
+            provider.stats.record(latency, ok=True)
+        self.assertEqual(provider.stats.p50(), 0.3)
+        self.assertEqual(provider.stats.p95(), 1.0)
+        self.assertEqual(provider.stats.error_rate(), 0.0)
+
+
+class TestRoutedCompletion(unittest.TestCase):
+    """Fallback and hedging behaviour."""
+
+    def test_falls_back_on_error(self):
+        router = LLMRouter(hedge=False)
+        router.register(make_provider("primary", fail=True))
+        router.register(make_provider("backup"))
+
+        result = asyncio.run(router.complete("sys", "hello"))
+
+        self.assertEqual(result.provider, "backup")
+        self.assertEqual(result.text, "backup: hello")
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(router.providers[0].stats.error_rate(), 1.0)
+
+    def test_all_providers_failing_raises(self):
+        router = LLMRouter(hedge=False)
+        router.register(make_provider("a", fail=True))
+        router.register(make_provider("b", fail=True))
+
+        with self.assertRaises(LLMUnavailableError):
+            asyncio.run(router.complete("sys", "hello"))
+
+    def test_no_providers_raises(self):
+        with self.assertRaises(LLMUnavailableError):
+            asyncio.run(LLMRouter().complete("sys", "hello"))
+
+    def test_hedged_request_returns_faster_backup(self):
+        router = LLMRouter(hedge=True)
+        slow = make_provider("slow", delay=0.5)
+        router.register(slow)
+        router.register(make_provider("fast", delay=0.01))
+        # Establish a p95 well below the slow call
+        for _ in range(MIN_SAMPLES):
+            slow.stats.record(0.05, ok=True)
+
+        result = asyncio.run(router.complete("sys", "hello"))
+
+        self.assertEqual(result.provider, "fast")
+        self.assertTrue(result.hedged)
+        self.assertLess(result.latency_ms, 500)
+
+    def test_no_hedge_when_primary_answers_in_time(self):
+        calls = []
+        router = LLMRouter(hedge=True)
+        primary = make_provider("primary", delay=0.01, calls=calls)
+        router.register(primary)
+        router.register(make_provider("backup", calls=calls))
+        for _ in range(MIN_SAMPLES):
+            primary.stats.record(0.5, ok=True)
+
+        result = asyncio.run(router.complete("sys", "hello"))
+
+        self.assertEqual(result.provider, "primary")
+        self.assertFalse(result.hedged)
+        self.assertEqual(calls, ["primary"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
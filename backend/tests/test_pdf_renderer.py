@@ -0,0 +1,177 @@
+"""
+Unit tests for the shared PDF renderer and its content-hash cache
+Run with: python -m unittest backend.tests.test_pdf_renderer
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import pdf_renderer
+from services.pdf_renderer import PDFCache, PDFRenderer, document_key, enqueue_pdf_task, enqueue_render
+
+HTML = "<html><body><h1>TAX INVOICE</h1></body></html>"
+CSS = "body { font-size: 10pt; }"
+
+
+class TestDocumentKey(unittest.TestCase):
+
+    def test_key_depends_on_html_and_css(self):
+        self.assertEqual(document_key(HTML, CSS), document_key(HTML, CSS))
+        self.assertNotEqual(document_key(HTML, CSS), document_key(HTML + " ", CSS))
+        self.assertNotEqual(document_key(HTML, CSS), document_key(HTML, CSS + " "))
+        # Parts are delimited, so moving text between them changes the key
+        self.assertNotEqual(document_key("ab", "c"), document_key("a", "bc"))
+
+
+class TestPDFCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PDFCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        key = document_key(HTML, CSS)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, b"%PDF-1.7")
+        self.assertEqual(self.cache.get(key), b"%PDF-1.7")
+
+    def test_prune_removes_stale_files(self):
+        fresh, stale = document_key("fresh"), document_key("stale")
+        self.cache.put(fresh, b"1")
+        self.cache.put(stale, b"2")
+        old = time.time() - 40 * 86400
+        os.utime(self.cache.path(stale), (old, old))
+
+        self.assertEqual(self.cache.prune(max_age_days=30), 1)
+        self.assertIsNotNone(self.cache.get(fresh))
+        self.assertIsNone(self.cache.get(stale))
+
+
+class S3Error(Exception):
+    """Stands in for botocore's ClientError / BotoCoreError."""
+
+
+class FailingS3:
+    """S3 client whose calls all fail (throttling, credentials, network)."""
+
+    class exceptions:
+        class NoSuchKey(S3Error):
+            pass
+
+    def get_object(self, **kwargs):
+        raise S3Error("SlowDown")
+
+    def put_object(self, **kwargs):
+        raise S3Error("AccessDenied")
+
+
+class TestS3CacheErrors(unittest.TestCase):
+
+    def setUp(self):
+        patch = mock.patch.object(pdf_renderer, "S3_ERRORS", (S3Error,))
+        patch.start()
+        self.addCleanup(patch.stop)
+        # An s3:// cache without building a real boto3 client
+        cache = PDFCache(tempfile.gettempdir())
+        cache.bucket, cache.key_root, cache.s3 = "bucket", "pdfs/", FailingS3()
+        self.renderer = PDFRenderer(workers=0, cache=cache)
+
+    def test_s3_errors_are_cache_misses(self):
+        self.assertIsNone(self.renderer.cached(HTML, CSS))
+        with mock.patch.object(pdf_renderer, "WEASYPRINT_AVAILABLE", True), \
+                mock.patch.object(pdf_renderer, "CACHE_WRITE_ERRORS", (OSError, S3Error)), \
+                mock.patch.object(pdf_renderer, "_render", return_value=b"%PDF"):
+            self.assertEqual(self.renderer.render(HTML, CSS), b"%PDF")
+        self.assertEqual(self.renderer.get_stats()["rendered"], 1)
+
+
+class TestPDFRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.renderer = PDFRenderer(workers=0, cache=PDFCache(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_renders_once_per_document(self):
+        with mock.patch.object(pdf_renderer, "WEASYPRINT_AVAILABLE", True), \
+                mock.patch.object(pdf_renderer, "_render", return_value=b"%PDF") as render:
+            self.assertEqual(self.renderer.render(HTML, CSS), b"%PDF")
+            self.assertEqual(self.renderer.render(HTML, CSS), b"%PDF")
+            self.assertEqual(asyncio.run(self.renderer.render_async(HTML, CSS)), b"%PDF")
+        render.assert_called_once_with(HTML, CSS)
+        self.assertEqual(self.renderer.get_stats()["cache_hits"], 2)
+
+    def test_cache_served_without_weasyprint(self):
+        self.renderer.cache.put(document_key(HTML, CSS), b"%PDF")
+        with mock.patch.object(pdf_renderer, "WEASYPRINT_AVAILABLE", False):
+            self.assertEqual(self.renderer.render(HTML, CSS), b"%PDF")
+            with self.assertRaises(RuntimeError):
+                self.renderer.render(HTML + "<p>changed</p>", CSS)
+
+
+class TestEnqueue(unittest.TestCase):
+
+    def test_sends_task_by_name(self):
+        celery_config = mock.Mock()
+        celery_config.celery_app.send_task.return_value.id = "task-1"
+        with mock.patch.dict(sys.modules, {"workers.celery_config": celery_config}):
+            task_id = enqueue_pdf_task("workers.tasks.render_pdf", HTML, CSS, queue="pdf")
+        self.assertEqual(task_id, "task-1")
+        celery_config.celery_app.send_task.assert_called_once_with(
+            "workers.tasks.render_pdf", args=[HTML, CSS], queue="pdf", retry=False
+        )
+
+    def test_unreachable_broker_returns_none(self):
+        celery_config = mock.Mock()
+        celery_config.celery_app.send_task.side_effect = ConnectionError("broker down")
+        with mock.patch.dict(sys.modules, {"workers.celery_config": celery_config}):
+            self.assertIsNone(enqueue_pdf_task("workers.tasks.generate_invoice_pdf", "inv-1", "ws-1"))
+
+    def test_render_queued_once_per_document(self):
+        claims = set()
+
+        class FakeRedis:
+            def set(self, key, value, nx=False, ex=None):
+                if key in claims:
+                    return None
+                claims.add(key)
+                return True
+
+            def delete(self, key):
+                claims.discard(key)
+
+        celery_config = mock.Mock()
+        celery_config.celery_app.send_task.side_effect = lambda *a, **kw: mock.Mock(id=kw["task_id"])
+        modules = {"workers.celery_config": celery_config, "config.redis_client": mock.Mock(redis_client=FakeRedis())}
+        with mock.patch.dict(sys.modules, modules):
+            first = enqueue_render(HTML, CSS, "/api/invoices/1/pdf-gst")
+            second = enqueue_render(HTML, CSS, "/api/invoices/1/pdf-gst")
+        self.assertEqual(first, document_key(HTML, CSS))
+        self.assertEqual(second, first)
+        celery_config.celery_app.send_task.assert_called_once()
+
+    def test_failed_enqueue_releases_claim(self):
+        redis = mock.Mock()
+        redis.set.return_value = True
+        celery_config = mock.Mock()
+        celery_config.celery_app.send_task.side_effect = ConnectionError("broker down")
+        modules = {"workers.celery_config": celery_config, "config.redis_client": mock.Mock(redis_client=redis)}
+        with mock.patch.dict(sys.modules, modules):
+            self.assertIsNone(enqueue_render(HTML, CSS))
+        redis.delete.assert_called_once_with(f"pdf:render:{document_key(HTML, CSS)}")
+
+
+if __name__ == "__main__":
+    unittest.main()
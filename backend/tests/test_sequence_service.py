@@ -0,0 +1,161 @@
+"""
+Unit tests for the Mongo-backed sequence service
+Run with: python -m unittest backend.tests.test_sequence_service
+
+StubCounters implements the counter operations the service uses with the
+same atomicity as Mongo: each call is applied under one lock.
+"""
+
+import re
+import threading
+import unittest
+import sys
+import os
+
+from pymongo.errors import DuplicateKeyError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.sequence_service import SequenceService, max_issued_number
+
+
+class StubCounters:
+    """Counter documents {_id, value}; `upsert_conflicts` makes that many upserts lose a race."""
+
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+        self.round_trips = 0
+        self.upsert_conflicts = 0
+
+    def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        with self.lock:
+            self.round_trips += 1
+            key = query["_id"]
+            if key not in self.docs:
+                if not upsert:
+                    return None
+                self.docs[key] = {"_id": key, "value": 0}
+            self.docs[key]["value"] += update["$inc"]["value"]
+            return dict(self.docs[key])
+
+    def update_one(self, query, update, upsert=False):
+        with self.lock:
+            key = query["_id"]
+            if key not in self.docs:
+                if not upsert:
+                    return
+                if self.upsert_conflicts:
+                    # Another worker inserted the document first
+                    self.upsert_conflicts -= 1
+                    self.docs[key] = {"_id": key, "value": 3}
+                    raise DuplicateKeyError("E11000 duplicate key error")
+                self.docs[key] = {"_id": key, "value": 0}
+            self.docs[key]["value"] = max(self.docs[key]["value"], update["$max"]["value"])
+
+
+class StubNumbers:
+    """find() with the anchored $regex filter max_issued_number builds."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        for doc in self.docs:
+            matched = True
+            for field, cond in query.items():
+                value = doc.get(field)
+                if isinstance(cond, dict):
+                    matched = matched and isinstance(value, str) and re.search(cond["$regex"], value) is not None
+                else:
+                    matched = matched and value == cond
+            if matched:
+                yield doc
+
+
+class TestSequenceService(unittest.TestCase):
+
+    def setUp(self):
+        self.counters = StubCounters()
+
+    def test_missing_counter_is_seeded_once(self):
+        seeds = []
+
+        def seed():
+            seeds.append(1)
+            return 41
+
+        service = SequenceService(self.counters)
+        self.assertEqual([service.next_value("jc:t1:2026", seed) for _ in range(3)], [42, 43, 44])
+        self.assertEqual(len(seeds), 1)
+
+    def test_missing_counter_without_seed_starts_at_one(self):
+        self.assertEqual(SequenceService(self.counters).next_value("jc:t1:2026"), 1)
+
+    def test_seed_keeps_counter_created_concurrently(self):
+        service = SequenceService(self.counters)
+
+        def seed():
+            # Another worker creates and advances the counter meanwhile
+            self.counters.docs["k"] = {"_id": "k", "value": 10}
+            return 4
+
+        self.assertEqual(service.next_value("k", seed), 11)
+
+    def test_seed_upsert_losing_the_race_still_applies_max(self):
+        self.counters.upsert_conflicts = 1
+        service = SequenceService(self.counters)
+        self.assertEqual(service.next_value("k", lambda: 7), 8)
+
+    def test_block_preallocation(self):
+        worker_a = SequenceService(self.counters, block_size=5)
+        worker_b = SequenceService(self.counters, block_size=5)
+        self.assertEqual(worker_a.next_value("k"), 1)
+        self.assertEqual(worker_b.next_value("k"), 6)
+        self.assertEqual([worker_a.next_value("k") for _ in range(5)], [2, 3, 4, 5, 11])
+        self.assertEqual(self.counters.docs["k"]["value"], 15)
+        # Missing-counter probe plus upsert for the first block, then one call per block
+        self.assertEqual(self.counters.round_trips, 4)
+
+    def test_block_size_override(self):
+        service = SequenceService(self.counters, block_size=5)
+        self.assertEqual([service.next_value("k", block_size=1) for _ in range(2)], [1, 2])
+        self.assertEqual(self.counters.docs["k"]["value"], 2)
+
+    def test_threads_racing_on_cold_key(self):
+        service = SequenceService(self.counters)
+        both_cold = threading.Barrier(2)
+        results = []
+
+        def seed():
+            # Both threads have seen the counter missing before either seeds it
+            both_cold.wait(timeout=5)
+            return 100
+
+        def worker():
+            results.append(service.next_value("k", seed))
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), [101, 102])
+
+
+class TestMaxIssuedNumber(unittest.TestCase):
+
+    def test_highest_numeric_suffix(self):
+        numbers = StubNumbers([
+            {"contract_number": "MG-2026-00007", "workshop_id": "w1"},
+            {"contract_number": "MG-2026-00012", "workshop_id": "w1"},
+            {"contract_number": "MG-2026-00099", "workshop_id": "w2"},
+            {"contract_number": "MG-2026-DRAFT", "workshop_id": "w1"},
+            {"contract_number": "MG-2025-00500", "workshop_id": "w1"},
+        ])
+        self.assertEqual(max_issued_number(numbers, "contract_number", "MG-2026-", {"workshop_id": "w1"}), 12)
+        self.assertEqual(max_issued_number(numbers, "contract_number", "MG-2027-"), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Unit tests for signed session tokens and the revocation list
+Run with: python -m unittest backend.tests.test_session_tokens
+"""
+
+import time
+import unittest
+import sys
+import os
+from datetime import datetime, timezone
+from unittest import mock
+
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import session_tokens
+from services.session_tokens import (
+    ALGORITHM, REVOKED_KEY, RevocationList, cookie_max_age, decode_session_token,
+    is_signed_token, issue_signed_token, revoke_signed_token
+)
+
+SECRET = "test-session-secret-0123456789abcdef"
+
+
+class FakeRedis:
+    """Sorted set, version counter and pipeline as used by RevocationList."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.values = {}
+        self.zscore_calls = 0
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def zscore(self, key, member):
+        self.zscore_calls += 1
+        return self.zsets.get(key, {}).get(member)
+
+    def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for member in [m for m, score in zset.items() if score <= high]:
+            del zset[member]
+
+    def zrangebyscore(self, key, low, high):
+        return [m for m, score in self.zsets.get(key, {}).items() if score >= low]
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        for name, args in self.calls:
+            getattr(self.redis, name)(*args)
+
+
+class SessionTokenTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patches = [
+            mock.patch.dict(os.environ, {"SESSION_SECRET": SECRET}),
+            mock.patch.object(session_tokens, "_revocation_list", RevocationList()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+class TestSignedTokens(SessionTokenTestCase):
+
+    def test_issue_and_decode(self):
+        token, expires_at = issue_signed_token("u1")
+        self.assertTrue(is_signed_token(token))
+        claims = decode_session_token(token)
+        self.assertEqual(claims["sub"], "u1")
+        self.assertEqual(claims["exp"], int(expires_at.timestamp()))
+        self.assertGreater(cookie_max_age(expires_at), 0)
+
+    def test_opaque_tokens_are_not_signed(self):
+        self.assertFalse(is_signed_token("email_session_a.b.c"))
+        self.assertFalse(is_signed_token("google_session_abc"))
+        self.assertFalse(is_signed_token(""))
+
+    def test_wrong_secret_or_tampered_token_is_rejected(self):
+        token, _ = issue_signed_token("u1")
+        header, payload, signature = token.split(".")
+        self.assertIsNone(decode_session_token(f"{header}.{payload}.{signature[::-1]}"))
+        with mock.patch.dict(os.environ, {"SESSION_SECRET": "other-session-secret-0123456789abcdef"}):
+            self.assertIsNone(decode_session_token(token))
+
+    def test_other_token_types_are_rejected(self):
+        now = int(time.time())
+        token = jwt.encode(
+            {"sub": "u1", "jti": "j1", "typ": "approval", "exp": now + 60}, SECRET, algorithm=ALGORITHM
+        )
+        self.assertIsNone(decode_session_token(token))
+
+    def test_expired_token_is_rejected(self):
+        now = int(time.time())
+        token = jwt.encode(
+            {"sub": "u1", "jti": "j1", "typ": "session", "iat": now - 120, "exp": now - 60},
+            SECRET, algorithm=ALGORITHM
+        )
+        self.assertIsNone(decode_session_token(token))
+        self.assertEqual(decode_session_token(token, verify_exp=False)["sub"], "u1")
+        self.assertEqual(cookie_max_age(datetime.fromtimestamp(now - 60, timezone.utc)), 0)
+
+    def test_revoked_token_is_rejected(self):
+        token, _ = issue_signed_token("u1")
+        other, _ = issue_signed_token("u1")
+        self.assertTrue(revoke_signed_token(token))
+        self.assertIsNone(decode_session_token(token))
+        self.assertEqual(decode_session_token(other)["sub"], "u1")
+        self.assertFalse(revoke_signed_token("not.a.token"))
+
+
+class TestRevocationList(unittest.TestCase):
+    """Revocations reach other workers through Redis and their Bloom filters."""
+
+    def setUp(self):
+        patch = mock.patch.object(session_tokens, "REVOCATION_REFRESH_SECONDS", 0)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.redis = FakeRedis()
+
+    def test_revocation_is_seen_by_another_worker(self):
+        writer, reader = RevocationList(self.redis), RevocationList(self.redis)
+        self.assertFalse(reader.is_revoked("j1"))
+        writer.revoke("j1", time.time() + 60)
+        self.assertTrue(reader.is_revoked("j1"))
+
+    def test_bloom_miss_skips_redis(self):
+        revocations = RevocationList(self.redis)
+        revocations.revoke("j1", time.time() + 60)
+        calls = self.redis.zscore_calls
+        self.assertFalse(revocations.is_revoked("j2"))
+        self.assertEqual(self.redis.zscore_calls, calls)
+
+    def test_expired_revocations_are_pruned(self):
+        revocations = RevocationList(self.redis)
+        revocations.revoke("old", time.time() - 1)
+        revocations.revoke("new", time.time() + 60)
+        RevocationList(self.redis).is_revoked("new")
+        self.assertEqual(list(self.redis.zsets[REVOKED_KEY]), ["new"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Unit tests for per-stage request timing
+Run with: python -m unittest backend.tests.test_stage_timer
+"""
+
+import asyncio
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.stage_timer import (
+    StageHistogram, begin_request_timer, get_stage_metrics, reset_stage_metrics, stage, timed_stage
+)
+
+
+class TestStageHistogram(unittest.TestCase):
+    """Bucketed percentiles."""
+
+    def test_percentiles_within_bucket_bounds(self):
+        hist = StageHistogram()
+        for duration in [3, 4, 4, 4, 4, 4, 4, 4, 4, 800]:
+            hist.observe(duration)
+        self.assertTrue(2 <= hist.percentile(50) <= 5)
+        self.assertTrue(500 <= hist.percentile(99) <= 800)
+        self.assertEqual(hist.to_dict()["count"], 10)
+
+    def test_empty_histogram(self):
+        self.assertEqual(StageHistogram().percentile(95), 0.0)
+
+
+class TestStageTimer(unittest.TestCase):
+    """Stage recording and Server-Timing output."""
+
+    def setUp(self):
+        reset_stage_metrics()
+
+    def test_stage_recorded_in_histogram_and_header(self):
+        async def handler():
+            timer = begin_request_timer()
+            with stage("governance"):
+                pass
+            with stage("llm", desc="openai"):
+                await asyncio.sleep(0.01)
+            return timer
+
+        timer = asyncio.run(handler())
+        header = timer.server_timing_header()
+        self.assertIn("governance;dur=", header)
+        self.assertIn('llm;desc="openai";dur=', header)
+        self.assertIn("total;dur=", header)
+        self.assertEqual(get_stage_metrics()["llm"]["count"], 1)
+
+    def test_decorator_records_async_and_sync(self):
+        @timed_stage("sync_stage")
+        def sync_work():
+            return 1
+
+        @timed_stage("async_stage")
+        async def async_work():
+            return 2
+
+        self.assertEqual(sync_work(), 1)
+        self.assertEqual(asyncio.run(async_work()), 2)
+        metrics = get_stage_metrics()
+        self.assertEqual(metrics["sync_stage"]["count"], 1)
+        self.assertEqual(metrics["async_stage"]["count"], 1)
+
+    def test_stage_recorded_when_block_raises(self):
+        with self.assertRaises(ValueError):
+            with stage("failing"):
+                raise ValueError("boom")
+        self.assertEqual(get_stage_metrics()["failing"]["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
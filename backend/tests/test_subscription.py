@@ -0,0 +1,95 @@
+"""
+Unit tests for the subscription decorators
+Run with: python -m unittest backend.tests.test_subscription
+
+Requests are called the way FastAPI calls a route: every argument as a
+keyword, with the session cookie only in the request headers.
+"""
+
+import asyncio
+import unittest
+import sys
+import os
+from unittest import mock
+
+from fastapi import HTTPException, Request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import session_tokens
+from services.session_tokens import RevocationList, issue_signed_token
+from utils import subscription
+from utils.subscription import TIER_FREE, TIER_PRO_AI, check_chat_limit, require_subscription
+
+
+def make_request(session_token=None):
+    headers = [(b"cookie", f"session_token={session_token}".encode())] if session_token else []
+    return Request({"type": "http", "method": "POST", "path": "/api/chat", "headers": headers, "query_string": b""})
+
+
+class FakeMeter:
+    def __init__(self):
+        self.calls = []
+
+    def check_and_increment(self, user_id, limit, usage_type="chat_query"):
+        self.calls.append(user_id)
+        return True, len(self.calls) - 1
+
+
+class TestDecorators(unittest.TestCase):
+
+    def setUp(self):
+        self.meter = FakeMeter()
+        self.tiers = {"u1": TIER_PRO_AI}
+        patches = [
+            mock.patch.dict(os.environ, {"SESSION_SECRET": "test-session-secret-0123456789abcdef"}),
+            mock.patch.object(session_tokens, "_revocation_list", RevocationList()),
+            mock.patch.object(subscription, "get_usage_meter", return_value=self.meter),
+            mock.patch.object(subscription, "get_user_tier", side_effect=lambda user_id: self.tiers.get(user_id, TIER_FREE)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def chat_route(self):
+        @check_chat_limit
+        async def chat(chat_request, request: Request, session_token=None):
+            return request.state.user_id, request.state.tier, request.state.usage_info
+
+        return chat
+
+    def pro_route(self):
+        @require_subscription(TIER_PRO_AI)
+        async def pro_feature(request: Request, current_user_id=None, current_tier=None):
+            return current_user_id, current_tier
+
+        return pro_feature
+
+    def test_chat_limit_without_cookie(self):
+        result = asyncio.run(self.chat_route()(chat_request={}, request=make_request(), session_token=None))
+        self.assertEqual(result, (None, TIER_FREE, {"used": 0, "limit": 5}))
+        self.assertEqual(self.meter.calls, [])
+
+    def test_chat_limit_with_signed_cookie(self):
+        token, _ = issue_signed_token("u1")
+        result = asyncio.run(self.chat_route()(chat_request={}, request=make_request(token), session_token=token))
+        self.assertEqual(result[:2], ("u1", TIER_PRO_AI))
+        self.assertEqual(self.meter.calls, ["u1"])
+
+    def test_require_subscription_without_cookie(self):
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(self.pro_route()(request=make_request()))
+        self.assertEqual(ctx.exception.status_code, 403)
+
+    def test_require_subscription_with_signed_cookie(self):
+        token, _ = issue_signed_token("u1")
+        self.assertEqual(asyncio.run(self.pro_route()(request=make_request(token))), ("u1", TIER_PRO_AI))
+
+    def test_missing_request_is_an_error(self):
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(self.chat_route()(chat_request={}))
+        self.assertEqual(ctx.exception.status_code, 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+"""
+Unit tests for the Redis-backed usage meter
+Run with: python -m unittest backend.tests.test_usage_meter
+
+FakeRedis keeps counters in dicts and runs CHECK_AND_INCREMENT_LUA as its
+Python equivalent; the Mongo collections are in-memory stand-ins.
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import usage_meter as usage_meter_module
+from services.usage_meter import CHECK_AND_INCREMENT_LUA, DIRTY_SET_KEY, UsageMeter, _day_bounds
+
+
+class FakeRedis:
+    """The subset of redis-py the meter uses, with string values like decode_responses=True."""
+
+    def __init__(self):
+        self.values = {}
+        self.expire_at = {}
+        self.sets = {}
+
+    def register_script(self, script):
+        assert script == CHECK_AND_INCREMENT_LUA
+        return self._check_and_increment
+
+    def _check_and_increment(self, keys, args):
+        counter, dirty = keys
+        limit, expire_at = int(args[0]), int(args[1])
+        if counter not in self.values:
+            return [-1, 0]
+        used = int(self.values[counter])
+        if limit >= 0 and used >= limit:
+            return [0, used]
+        self.values[counter] = str(used + 1)
+        self.expire_at[counter] = expire_at
+        self.sets.setdefault(dirty, set()).add(counter)
+        return [1, used]
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, exat=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = str(value)
+        if exat is not None:
+            self.expire_at[key] = exat
+        return True
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def spop(self, key, count):
+        members = self.sets.get(key, set())
+        popped = [members.pop() for _ in range(min(count, len(members)))]
+        return popped or None
+
+
+class FakeUpdateOne:
+    def __init__(self, filter, update, upsert=False):
+        self.filter, self.update, self.upsert = filter, update, upsert
+
+
+class FakeDailyCollection:
+    """usage_daily with find_one / update_one ($inc) / bulk_write ($max)."""
+
+    def __init__(self):
+        self.docs = []
+        self.fail = False
+
+    def _match(self, query):
+        for doc in self.docs:
+            if all(doc.get(k) == v for k, v in query.items()):
+                return doc
+        return None
+
+    def _upsert(self, query):
+        doc = self._match(query)
+        if doc is None:
+            doc = dict(query)
+            self.docs.append(doc)
+        return doc
+
+    def find_one(self, query, projection=None):
+        doc = self._match(query)
+        return dict(doc) if doc else None
+
+    def update_one(self, query, update, upsert=False):
+        doc = self._upsert(query)
+        for field, amount in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + amount
+        doc.update(update.get("$set", {}))
+
+    def bulk_write(self, operations, ordered=True):
+        if self.fail:
+            raise ConnectionError("mongo unavailable")
+        for op in operations:
+            doc = self._upsert(op.filter)
+            for field, value in op.update.get("$max", {}).items():
+                doc[field] = max(doc.get(field, value), value)
+            doc.update(op.update.get("$set", {}))
+
+
+class FakeTrackingCollection:
+    def count_documents(self, query):
+        return 0
+
+
+class TestUsageMeter(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.daily = FakeDailyCollection()
+        patches = [
+            mock.patch.object(usage_meter_module, "usage_daily_collection", self.daily),
+            mock.patch.object(usage_meter_module, "usage_tracking_collection", FakeTrackingCollection()),
+            mock.patch.object(usage_meter_module, "UpdateOne", FakeUpdateOne),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.meter = UsageMeter(self.redis)
+        self.day_start, _ = _day_bounds()
+        self.key = UsageMeter.counter_key("u1", "chat_query", self.day_start)
+
+    def daily_count(self, user_id="u1"):
+        doc = self.daily.find_one({"user_id": user_id, "type": "chat_query", "date": self.day_start.strftime("%Y-%m-%d")})
+        return doc["count"] if doc else None
+
+    def test_limit_reached_is_refused_without_counting(self):
+        results = [self.meter.check_and_increment("u1", 2) for _ in range(3)]
+        self.assertEqual(results, [(True, 0), (True, 1), (False, 2)])
+        self.assertEqual(self.redis.get(self.key), "2")
+        self.assertEqual(self.meter.get_usage("u1"), 2)
+
+    def test_unlimited_tier_is_still_metered(self):
+        for _ in range(3):
+            self.assertTrue(self.meter.check_and_increment("u1", -1)[0])
+        self.assertEqual(self.redis.get(self.key), "3")
+        self.assertEqual(self.redis.sets[DIRTY_SET_KEY], {self.key})
+
+    def test_cold_key_is_seeded_from_usage_daily(self):
+        self.daily.update_one(
+            {"user_id": "u1", "type": "chat_query", "date": self.day_start.strftime("%Y-%m-%d")},
+            {"$inc": {"count": 4}}, upsert=True
+        )
+        self.assertEqual(self.meter.check_and_increment("u1", 5), (True, 4))
+        self.assertEqual(self.meter.check_and_increment("u1", 5), (False, 5))
+        self.assertEqual(self.redis.expire_at[self.key], UsageMeter._expire_at(self.day_start))
+
+    def test_seed_does_not_overwrite_concurrent_counter(self):
+        # Another worker seeded and counted between our cold read and SET NX
+        self.redis.set(self.key, 3)
+        self.meter._seed(self.key, "u1", "chat_query", self.day_start)
+        self.assertEqual(self.redis.get(self.key), "3")
+
+    def test_flush_writes_counters_and_is_idempotent(self):
+        for _ in range(3):
+            self.meter.check_and_increment("u1", -1)
+        self.meter.check_and_increment("u2", -1)
+        self.assertEqual(self.meter.flush(), 2)
+        self.assertEqual(self.daily_count(), 3)
+        self.assertEqual(self.daily_count("u2"), 1)
+        self.assertEqual(self.meter.flush(), 0)
+
+        # A replayed flush of the same keys leaves the totals unchanged
+        self.redis.sadd(DIRTY_SET_KEY, self.key)
+        self.assertEqual(self.meter.flush(), 1)
+        self.assertEqual(self.daily_count(), 3)
+
+    def test_flush_never_lowers_a_higher_durable_count(self):
+        self.meter.check_and_increment("u1", -1)
+        self.daily.update_one(
+            {"user_id": "u1", "type": "chat_query", "date": self.day_start.strftime("%Y-%m-%d")},
+            {"$inc": {"count": 7}}, upsert=True
+        )
+        self.meter.flush()
+        self.assertEqual(self.daily_count(), 7)
+
+    def test_failed_flush_requeues_keys(self):
+        self.meter.check_and_increment("u1", -1)
+        self.daily.fail = True
+        with self.assertRaises(ConnectionError):
+            self.meter.flush()
+        self.assertEqual(self.redis.sets[DIRTY_SET_KEY], {self.key})
+
+        self.daily.fail = False
+        self.assertEqual(self.meter.flush(), 1)
+        self.assertEqual(self.daily_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
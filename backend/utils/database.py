@@ -5,6 +5,8 @@ import os
 from datetime import datetime
 from bson import ObjectId
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
+from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -35,6 +37,7 @@ mg_contracts_collection = db["mg_contracts"]
 mg_vehicle_logs_collection = db["mg_vehicle_logs"]
 mg_calculation_logs_collection = db["mg_calculation_logs"]
 chat_sessions_collection = db["chat_sessions"]
+chat_message_buckets_collection = db["chat_message_buckets"]
 users_collection = db["users"]
 user_sessions_collection = db["user_sessions"]
 files_collection = db["files"]
@@ -45,8 +48,15 @@ parts_collection = db["parts"]
 job_card_notes_collection = db["job_card_notes"]
 job_card_timeline_collection = db["job_card_timeline"]
 signatures_collection = db["signatures"]
+job_card_views_collection = db["job_card_views"]
 notifications_collection = db["notifications"]
 usage_tracking_collection = db["usage_tracking"]
+usage_daily_collection = db["usage_daily"]
+counters_collection = db["counters"]
+
+# Async client (motor) for endpoints that fan out many independent queries
+async_client = AsyncIOMotorClient(MONGO_URL)
+async_db = async_client[DB_NAME]
 
 
 def serialize_doc(doc: dict) -> dict:
@@ -71,17 +81,48 @@ def serialize_docs(docs: list) -> list:
     return [serialize_doc(doc) for doc in docs]
 
 
+def _create_unique_index(collection, field: str):
+    """Create a unique index on `field`, replacing an older non-unique one."""
+    existing = collection.index_information().get(f"{field}_1")
+    if existing and not existing.get("unique"):
+        collection.drop_index(f"{field}_1")
+    try:
+        collection.create_index(field, unique=True)
+    except DuplicateKeyError:
+        # Keep the lookup index until the duplicates are cleaned up
+        collection.create_index(field)
+        print(f"Duplicate {collection.name}.{field} values found, unique index not created.")
+
+
 def create_indexes():
     """Create database indexes for better performance."""
     job_cards_collection.create_index("vehicle_registration")
     job_cards_collection.create_index("status")
+    job_cards_collection.create_index([("created_at", -1), ("_id", -1)])
+    job_cards_collection.create_index([("status", 1), ("created_at", -1), ("_id", -1)])
+    job_cards_collection.create_index([("workshop_id", 1), ("created_at", -1), ("_id", -1)])
+    job_cards_collection.create_index([("workshop_id", 1), ("status", 1), ("created_at", -1), ("_id", -1)])
+    for collection in (vehicles_collection, customers_collection, services_collection, parts_collection,
+                       signatures_collection):
+        collection.create_index("job_card_id")
+    job_card_notes_collection.create_index([("job_card_id", 1), ("timestamp", 1)])
+    job_card_timeline_collection.create_index([("job_card_id", 1), ("timestamp", 1)])
+    files_collection.create_index([("job_card_id", 1), ("category", 1)])
+    job_card_views_collection.create_index("registration")
+    job_cards_collection.create_index("job_card_number")
+    _create_unique_index(mg_contracts_collection, "contract_number")
     invoices_collection.create_index("job_card_id")
     chat_sessions_collection.create_index("user_id")
+    chat_sessions_collection.create_index("session_id")
+    chat_sessions_collection.create_index([("user_id", 1), ("updated_at", -1), ("_id", -1)])
+    chat_message_buckets_collection.create_index([("session_id", 1), ("bucket", 1)], unique=True)
     users_collection.create_index("email", unique=True)
+    usage_daily_collection.create_index([("user_id", 1), ("type", 1), ("date", 1)], unique=True)
     print("Database indexes created.")
 
 
 def close_connection():
     """Close the MongoDB connection."""
     client.close()
+    async_client.close()
     print("MongoDB connection closed.")
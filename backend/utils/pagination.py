@@ -0,0 +1,65 @@
+"""
+Keyset (cursor) pagination helpers for EKA-AI Backend.
+Cursors are opaque URL-safe strings encoding the sort key of the last row.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    """Encode the (sort value, _id) of the last returned row as a cursor."""
+    if isinstance(sort_value, datetime):
+        payload = {"t": "dt", "v": sort_value.isoformat()}
+    else:
+        payload = {"t": "raw", "v": sort_value}
+    payload["id"] = str(doc_id)
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Decode a cursor back into (sort value, _id). Raises 400 on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload["v"]
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+        doc_id = payload["id"]
+        if ObjectId.is_valid(doc_id):
+            doc_id = ObjectId(doc_id)
+        return value, doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_filter(sort_field: str, cursor: Optional[str], descending: bool = True) -> Dict[str, Any]:
+    """
+    Mongo filter selecting rows after the cursor for a sort on (sort_field, _id).
+    Requires a matching compound index to stay an index range scan.
+    """
+    if not cursor:
+        return {}
+    value, doc_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    return {"$or": [
+        {sort_field: {op: value}},
+        {sort_field: value, "_id": {op: doc_id}},
+    ]}
+
+
+def next_cursor(docs: list, limit: int, sort_field: str) -> Tuple[list, Optional[str]]:
+    """
+    Trim a page fetched with limit + 1 rows and build the cursor for the next page.
+    Returns (page, cursor or None when this is the last page).
+    """
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.get(sort_field), last["_id"])
@@ -1,12 +1,32 @@
 """
 Security utilities for password hashing and verification.
+
+Request handlers should use the async variants, which run bcrypt on a
+dedicated bounded thread pool (bcrypt releases the GIL) so hashing load
+cannot starve the request threadpool or the event loop.
 """
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
+from fastapi import HTTPException
+
+from utils.stage_timer import record_stage
+
+# bcrypt cost factor for new hashes
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Pool sizing: workers run hashes, the queue bounds requests waiting for one
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 2)))
+HASH_POOL_MAX_QUEUE = int(os.getenv("HASH_POOL_MAX_QUEUE", str(HASH_POOL_WORKERS * 16)))
 
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
-    salt = bcrypt.gensalt(rounds=12)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -21,3 +41,91 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         # If the stored password is not hashed (legacy), compare directly
         return plain_password == hashed_password
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if a stored hash is legacy plain text or uses a different cost factor."""
+    parts = (hashed_password or "").split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return True
+    return int(parts[2]) != BCRYPT_ROUNDS
+
+
+class HashPool:
+    """Bounded thread pool for password hashing with queue-depth metrics."""
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_queue: int = HASH_POOL_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.in_flight = 0
+        self.max_pending_seen = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _run(self, enqueued_at: float, func, *args):
+        with self._lock:
+            self.pending -= 1
+            self.in_flight += 1
+        record_stage("password_hash_wait", (time.perf_counter() - enqueued_at) * 1000)
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            record_stage("password_hash", (time.perf_counter() - started) * 1000)
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def submit(self, func, *args):
+        """Run func(*args) on the pool; 503 if the queue is full."""
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Authentication service busy, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            self.pending += 1
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        future = self._executor.submit(self._run, time.perf_counter(), func, *args)
+        future.add_done_callback(self._release_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_if_cancelled(self, future):
+        # A job cancelled before it started never reaches _run
+        if future.cancelled():
+            with self._lock:
+                self.pending -= 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "queue_depth": self.pending,
+                "in_flight": self.in_flight,
+                "max_queue": self.max_queue,
+                "max_queue_depth_seen": self.max_pending_seen,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+hash_pool = HashPool()
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bounded hashing pool."""
+    return await hash_pool.submit(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bounded hashing pool."""
+    return await hash_pool.submit(verify_password, plain_password, hashed_password)
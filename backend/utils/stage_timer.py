@@ -0,0 +1,157 @@
+"""
+Per-stage request timing for EKA-AI Backend.
+Stages are recorded into process-wide histograms and, when a request timer
+is active, into a Server-Timing header for that response.
+
+Usage:
+    with stage("governance"):
+        decision = governance.evaluate(...)
+"""
+import asyncio
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKET_BOUNDS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class StageHistogram:
+    """Fixed-bucket latency histogram with interpolated percentiles."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, duration_ms: float):
+        index = bisect.bisect_left(BUCKET_BOUNDS_MS, duration_ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += duration_ms
+            self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, pct: float) -> float:
+        """Estimate a percentile by linear interpolation inside its bucket."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = pct / 100.0 * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = BUCKET_BOUNDS_MS[index - 1] if index > 0 else 0.0
+                    upper = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+                    fraction = (rank - seen) / bucket_count
+                    return round(min(lower + (upper - lower) * fraction, self.max_ms), 2)
+                seen += bucket_count
+            return round(self.max_ms, 2)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+_histograms: Dict[str, StageHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def _histogram(name: str) -> StageHistogram:
+    hist = _histograms.get(name)
+    if hist is None:
+        with _histograms_lock:
+            hist = _histograms.setdefault(name, StageHistogram())
+    return hist
+
+
+class RequestTimer:
+    """Stage durations collected for a single request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float, Optional[str]]] = []
+
+    def record(self, name: str, duration_ms: float, desc: Optional[str] = None):
+        self.stages.append((name, duration_ms, desc))
+
+    def server_timing_header(self) -> str:
+        """Server-Timing header value, including a `total` entry."""
+        parts = []
+        for name, duration_ms, desc in self.stages:
+            entry = name
+            if desc:
+                entry += f';desc="{desc}"'
+            parts.append(f"{entry};dur={duration_ms:.1f}")
+        total_ms = (time.perf_counter() - self.started) * 1000
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+
+
+def begin_request_timer() -> RequestTimer:
+    """Start collecting stages for the current request (called by middleware)."""
+    timer = RequestTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+def record_stage(name: str, duration_ms: float, desc: Optional[str] = None):
+    """Record a measured stage into its histogram and the active request timer."""
+    _histogram(name).observe(duration_ms)
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.record(name, duration_ms, desc)
+
+
+@contextmanager
+def stage(name: str, desc: Optional[str] = None):
+    """Time the enclosed block as stage `name` (also usable around awaits)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, (time.perf_counter() - start) * 1000, desc)
+
+
+def timed_stage(name: str):
+    """Decorator form of `stage` for sync and async functions."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_stage_metrics() -> Dict[str, dict]:
+    """Aggregated percentiles for every recorded stage."""
+    return {name: hist.to_dict() for name, hist in sorted(_histograms.items())}
+
+
+def reset_stage_metrics():
+    """Clear all histograms."""
+    with _histograms_lock:
+        _histograms.clear()
@@ -3,11 +3,15 @@ Subscription and usage limit enforcement for EKA-AI.
 Handles free tier limits, Pro subscriptions, and usage tracking.
 """
 
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from functools import wraps
 from typing import Optional
 from fastapi import HTTPException, Request, Cookie
-from utils.database import users_collection, user_sessions_collection, usage_tracking_collection
+from utils.database import users_collection, user_sessions_collection
+from utils.stage_timer import stage
+from services.usage_meter import get_usage_meter
+from services.auth_cache import get_auth_cache
+from services.session_tokens import is_signed_token, decode_session_token
 
 # Free tier limits
 FREE_DAILY_QUERY_LIMIT = 5
@@ -29,9 +33,21 @@ TIER_LIMITS = {
 }
 
 
+def _as_utc(value) -> Optional[datetime]:
+    """Normalize a stored datetime/ISO string to an aware UTC datetime."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
 def get_current_user_id(request: Request, session_token: Optional[str] = Cookie(None)) -> Optional[str]:
-    """Get current user ID from session token."""
-    token = session_token
+    """Get current user ID from a signed token or a (cached) opaque session token."""
+    # Called outside a route the default is the Cookie() marker, not a token
+    token = session_token if isinstance(session_token, str) else None
     
     if not token:
         auth_header = request.headers.get("Authorization")
@@ -41,70 +57,113 @@ def get_current_user_id(request: Request, session_token: Optional[str] = Cookie(
     if not token:
         return None
     
-    session_doc = user_sessions_collection.find_one({"session_token": token}, {"_id": 0})
-    if not session_doc:
-        return None
+    # Signed sessions are verified locally: no cache or database lookup
+    if is_signed_token(token):
+        claims = decode_session_token(token)
+        return claims["sub"] if claims else None
+    
+    def load_session():
+        session_doc = user_sessions_collection.find_one(
+            {"session_token": token}, {"_id": 0, "user_id": 1, "expires_at": 1}
+        )
+        if not session_doc:
+            return None
+        expires_at = _as_utc(session_doc.get("expires_at"))
+        return {"user_id": session_doc.get("user_id"), "expires_at": expires_at.timestamp()}
     
-    expires_at = session_doc.get("expires_at")
-    if isinstance(expires_at, str):
-        expires_at = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    session = get_auth_cache().get_session(token, load_session)
+    if not session:
+        return None
     
-    if expires_at < datetime.now(timezone.utc):
+    if session["expires_at"] < datetime.now(timezone.utc).timestamp():
         user_sessions_collection.delete_one({"session_token": token})
+        get_auth_cache().invalidate_sessions([token])
         return None
     
-    return session_doc.get("user_id")
+    return session["user_id"]
+
+
+def require_admin(request: Request, session_token: Optional[str] = Cookie(None)) -> str:
+    """
+    Dependency for operational endpoints: the caller must be an admin user.
+    Usage: @router.get(..., dependencies=[Depends(require_admin)])
+    """
+    user_id = get_current_user_id(request, session_token)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    user = users_collection.find_one({"user_id": user_id}, {"_id": 0, "role": 1})
+    if not user or user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user_id
 
 
 def get_user_tier(user_id: str) -> str:
-    """Get user's subscription tier."""
+    """Get user's subscription tier (cached, see services.auth_cache)."""
     if not user_id:
         return TIER_FREE
     
-    user = users_collection.find_one({"user_id": user_id}, {"_id": 0, "subscription_tier": 1, "subscription_expires": 1})
-    if not user:
+    def load_tier():
+        user = users_collection.find_one({"user_id": user_id}, {"_id": 0, "subscription_tier": 1, "subscription_expires": 1})
+        if not user:
+            return None
+        expires = _as_utc(user.get("subscription_expires"))
+        return {
+            "tier": user.get("subscription_tier", TIER_FREE),
+            "expires": expires.timestamp() if expires else None
+        }
+    
+    cached = get_auth_cache().get_tier(user_id, load_tier)
+    if not cached:
         return TIER_FREE
     
-    tier = user.get("subscription_tier", TIER_FREE)
-    expires = user.get("subscription_expires")
+    tier = cached["tier"]
+    expires = cached.get("expires")
     
     # Check if subscription expired
-    if expires and tier != TIER_FREE:
-        if isinstance(expires, str):
-            expires = datetime.fromisoformat(expires.replace("Z", "+00:00"))
-        if expires.tzinfo is None:
-            expires = expires.replace(tzinfo=timezone.utc)
-        
-        if expires < datetime.now(timezone.utc):
-            # Subscription expired, downgrade to free
-            users_collection.update_one(
-                {"user_id": user_id},
-                {"$set": {"subscription_tier": TIER_FREE, "updated_at": datetime.now(timezone.utc)}}
-            )
-            return TIER_FREE
+    if expires and tier != TIER_FREE and expires < datetime.now(timezone.utc).timestamp():
+        # Subscription expired, downgrade to free
+        users_collection.update_one(
+            {"user_id": user_id},
+            {"$set": {"subscription_tier": TIER_FREE, "updated_at": datetime.now(timezone.utc)}}
+        )
+        get_auth_cache().invalidate_user(user_id)
+        return TIER_FREE
     
     return tier
 
 
+def set_user_tier(user_id: str, tier: str, expires: Optional[datetime] = None):
+    """Change a user's subscription and invalidate cached tiers on all workers."""
+    users_collection.update_one(
+        {"user_id": user_id},
+        {"$set": {
+            "subscription_tier": tier,
+            "subscription_expires": expires,
+            "updated_at": datetime.now(timezone.utc)
+        }}
+    )
+    get_auth_cache().invalidate_user(user_id)
+
+
+def revoke_user_sessions(user_id: str):
+    """Delete all sessions of a user and invalidate them in the auth cache."""
+    tokens = [
+        doc["session_token"]
+        for doc in user_sessions_collection.find({"user_id": user_id}, {"_id": 0, "session_token": 1})
+        if doc.get("session_token")
+    ]
+    user_sessions_collection.delete_many({"user_id": user_id})
+    get_auth_cache().invalidate_sessions(tokens)
+
+
 def get_daily_usage(user_id: str) -> int:
     """Get today's query usage for a user."""
     if not user_id:
         # For anonymous users, return 0 (they shouldn't be using chat without auth anyway)
         return 0
     
-    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    tomorrow = today + timedelta(days=1)
-    
-    # Count usage for today
-    count = usage_tracking_collection.count_documents({
-        "user_id": user_id,
-        "timestamp": {"$gte": today, "$lt": tomorrow},
-        "type": "chat_query"
-    })
-    
-    return count
+    # Redis counter, falling back to the durable daily count in Mongo
+    return get_usage_meter().get_usage(user_id, "chat_query")
 
 
 def check_usage_limit(user_id: str) -> tuple[bool, int, int]:
@@ -125,21 +184,17 @@ def check_usage_limit(user_id: str) -> tuple[bool, int, int]:
     return allowed, used, limit
 
 
-def increment_usage(user_id: str, query_type: str = "chat_query", metadata: dict = None):
-    """Record a usage event."""
-    if not user_id:
-        return
-    
-    doc = {
-        "user_id": user_id,
-        "type": query_type,
-        "timestamp": datetime.now(timezone.utc),
-    }
-    
-    if metadata:
-        doc["metadata"] = metadata
-    
-    usage_tracking_collection.insert_one(doc)
+def _find_request(args, kwargs) -> Optional[Request]:
+    """The Request among a route's arguments (FastAPI passes them as keywords)."""
+    for value in (*kwargs.values(), *args):
+        if isinstance(value, Request):
+            return value
+    return None
+
+
+def _request_user_id(request: Request) -> Optional[str]:
+    """User ID from the request's session cookie or bearer token."""
+    return get_current_user_id(request, request.cookies.get("session_token"))
 
 
 def require_subscription(min_tier: str = TIER_FREE):
@@ -150,18 +205,11 @@ def require_subscription(min_tier: str = TIER_FREE):
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Find request in args/kwargs
-            request = kwargs.get('request')
-            if not request and args:
-                for arg in args:
-                    if hasattr(arg, 'headers'):
-                        request = arg
-                        break
-            
+            request = _find_request(args, kwargs)
             if not request:
                 raise HTTPException(status_code=500, detail="Request object not found")
             
-            user_id = get_current_user_id(request)
+            user_id = _request_user_id(request)
             tier = get_user_tier(user_id)
             
             # Check tier hierarchy
@@ -195,21 +243,22 @@ def check_chat_limit(func):
     Records usage if allowed.
     """
     @wraps(func)
-    async def wrapper(request: Request, *args, **kwargs):
-        # Find request in args/kwargs
-        if not isinstance(request, Request) and args:
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
-        
+    async def wrapper(*args, **kwargs):
+        request = _find_request(args, kwargs)
         if not request:
             raise HTTPException(status_code=500, detail="Request object not found")
         
-        user_id = get_current_user_id(request)
+        with stage("auth"):
+            user_id = _request_user_id(request)
         
-        # Check limit
-        allowed, used, limit = check_usage_limit(user_id)
+        # Check limit and record usage in one atomic counter call
+        with stage("tier_lookup"):
+            tier = get_user_tier(user_id)
+        limit = TIER_LIMITS.get(tier, FREE_DAILY_QUERY_LIMIT)
+        allowed, used = True, 0
+        if user_id:
+            with stage("usage_check"):
+                allowed, used = get_usage_meter().check_and_increment(user_id, limit, "chat_query")
         
         if not allowed:
             raise HTTPException(
@@ -223,12 +272,9 @@ def check_chat_limit(func):
                 }
             )
         
-        # Record usage before processing
-        if user_id:
-            increment_usage(user_id, "chat_query")
-        
         # Add usage info to kwargs for response
         request.state.user_id = user_id
+        request.state.tier = tier
         request.state.usage_info = {"used": used, "limit": limit}
         
         return await func(*args, **kwargs)
@@ -39,6 +39,15 @@ celery_app.conf.update(
     # Result backend
     result_expires=3600,  # 1 hour
     
+    # PDF rendering has its own queues (run dedicated workers with
+    # `-Q pdf` and `-Q pdf_batch`): month-end batches never hold up
+    # renders a user is waiting for
+    task_routes={
+        'workers.tasks.render_pdf': {'queue': 'pdf'},
+        'workers.tasks.generate_invoice_pdf': {'queue': 'pdf_batch'},
+        'workers.tasks.generate_job_card_pdf': {'queue': 'pdf_batch'},
+    },
+    
     # Beat schedule (periodic tasks)
     beat_schedule={
         # RBI E-Mandate: Pre-debit notifications (runs daily at 9 AM)
@@ -59,6 +68,18 @@ celery_app.conf.update(
             'schedule': crontab(hour=0, minute=0),  # Midnight
         },
         
+        # Usage metering: Redis counters -> Mongo
+        'usage-counter-flush': {
+            'task': 'workers.tasks.flush_usage_counters',
+            'schedule': 60.0,  # Every minute
+        },
+        
+        # Job card counters: rebuild from job_cards
+        'job-card-counter-reconcile': {
+            'task': 'workers.tasks.reconcile_job_card_counters',
+            'schedule': crontab(hour=1, minute=30),
+        },
+        
         # Audit log rotation
         'audit-log-rotation': {
             'task': 'workers.tasks.rotate_audit_logs',
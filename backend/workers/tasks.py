@@ -21,18 +21,12 @@ def send_pre_debit_notifications(self):
     """
     try:
         from finance.rbi_compliance import run_pre_debit_notifications
-        import os
-        from supabase import create_client
         
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        
-        if not supabase_url or not supabase_key:
+        supabase = _supabase_client()
+        if supabase is None:
             logger.error("Supabase credentials not configured for RBI notifications")
             return {"status": "error", "reason": "credentials_missing"}
         
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Run pre-debit notifications
         results = run_pre_debit_notifications(supabase)
         
@@ -53,22 +47,68 @@ def send_pre_debit_notifications(self):
         raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
 
 
+def _supabase_client():
+    """Service-role Supabase client for tasks, or None if not configured"""
+    import os
+    from supabase import create_client
+    
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        return None
+    return create_client(supabase_url, supabase_key)
+
+
+@celery_app.task(bind=True, max_retries=2)
+def render_pdf(self, html: str, css: str, pdf_url: str = None):
+    """
+    Render a prepared document through the shared renderer.
+    Queued by API requests whose PDF is not cached yet; the result is
+    stored by content hash, so pdf_url serves it on the next request.
+    """
+    try:
+        from services.pdf_renderer import get_pdf_renderer, document_key
+        
+        pdf_bytes = get_pdf_renderer().render(html, css)
+        
+        return {
+            "status": "success",
+            "key": document_key(html, css),
+            "size": len(pdf_bytes),
+            "pdf_url": pdf_url,
+            "generated_at": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as exc:
+        logger.error(f"PDF render failed: {exc}")
+        raise self.retry(exc=exc, countdown=30)
+
+
 @celery_app.task(bind=True, max_retries=2)
-def generate_invoice_pdf(self, invoice_id: str):
+def generate_invoice_pdf(self, invoice_id: str, workshop_id: str):
     """
     Generate PDF for invoice asynchronously.
-    Called when invoice is finalized.
+    Called when invoice is finalized; the stored file is what later
+    download requests are served from.
     """
     try:
         logger.info(f"Generating PDF for invoice {invoice_id}")
         
-        # In production: Call PDF generation service
-        # For now, mark as complete
+        from services.invoice_manager import InvoiceManager
+        
+        supabase = _supabase_client()
+        if supabase is None:
+            logger.error("Supabase credentials not configured for invoice PDF generation")
+            return {"status": "error", "reason": "credentials_missing"}
+        
+        success, pdf_bytes = InvoiceManager(supabase).generate_pdf(invoice_id, workshop_id)
+        if not success:
+            raise RuntimeError(pdf_bytes.decode(errors="replace"))
         
         return {
             "status": "success",
             "invoice_id": invoice_id,
-            "pdf_url": f"/api/invoices/{invoice_id}/pdf",
+            "size": len(pdf_bytes),
             "generated_at": datetime.utcnow().isoformat()
         }
         
@@ -77,6 +117,37 @@ def generate_invoice_pdf(self, invoice_id: str):
         raise self.retry(exc=exc, countdown=30)
 
 
+@celery_app.task(bind=True, max_retries=2)
+def generate_job_card_pdf(self, job_card_id: str, workshop_id: str):
+    """
+    Generate the job card report PDF when a job card is closed.
+    """
+    try:
+        logger.info(f"Generating PDF for job card {job_card_id}")
+        
+        from services.job_card_manager import JobCardManager
+        
+        supabase = _supabase_client()
+        if supabase is None:
+            logger.error("Supabase credentials not configured for job card PDF generation")
+            return {"status": "error", "reason": "credentials_missing"}
+        
+        success, pdf_bytes = JobCardManager(supabase).generate_job_card_pdf(job_card_id, workshop_id)
+        if not success:
+            raise RuntimeError(pdf_bytes.decode(errors="replace"))
+        
+        return {
+            "status": "success",
+            "job_card_id": job_card_id,
+            "size": len(pdf_bytes),
+            "generated_at": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as exc:
+        logger.error(f"PDF generation failed for job card {job_card_id}: {exc}")
+        raise self.retry(exc=exc, countdown=30)
+
+
 @celery_app.task(bind=True)
 def send_whatsapp_notification(self, phone_number: str, template: str, data: dict):
     """
@@ -109,8 +180,6 @@ def process_dpdp_erasure(self, user_id: str, reason: str = "user_request"):
     Deletes user data from all systems.
     """
     try:
-        import os
-        from supabase import create_client
         from legal.erasure import execute_user_erasure
         
         logger.info(f"Starting DPDP erasure for user {user_id}", extra={
@@ -118,14 +187,10 @@ def process_dpdp_erasure(self, user_id: str, reason: str = "user_request"):
             "reason": reason
         })
         
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        
-        if not supabase_url or not supabase_key:
+        supabase = _supabase_client()
+        if supabase is None:
             raise ValueError("Supabase credentials not configured")
         
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Execute erasure
         result = execute_user_erasure(
             user_id=user_id,
@@ -206,18 +271,23 @@ def cleanup_old_cache(self):
         logger.info("Starting cache cleanup")
         
         from services.vector_engine import vector_engine
+        from services.pdf_renderer import PDFCache
         
         stats_before = vector_engine.get_cache_stats()
         # Cleanup logic here
         stats_after = vector_engine.get_cache_stats()
         
+        pdfs_removed = PDFCache().prune()
+        
         logger.info("Cache cleanup completed", extra={
             "entries_before": stats_before.get("count"),
-            "entries_after": stats_after.get("count")
+            "entries_after": stats_after.get("count"),
+            "pdfs_removed": pdfs_removed
         })
         
         return {
             "status": "success",
+            "pdfs_removed": pdfs_removed,
             "cleaned_at": datetime.utcnow().isoformat()
         }
         
@@ -229,22 +299,29 @@ def cleanup_old_cache(self):
 @celery_app.task(bind=True)
 def rotate_audit_logs(self):
     """
-    Rotate and archive old audit logs.
+    Archive cold audit_logs partitions and create upcoming ones.
     Runs weekly on Sunday at 3 AM.
     """
     try:
+        from services.audit_archive import archive_cold_partitions
+        
         logger.info("Starting audit log rotation")
         
-        # Archive logs older than 90 days
-        cutoff_date = datetime.utcnow() - timedelta(days=90)
+        supabase = _supabase_client()
+        if supabase is None:
+            logger.error("Supabase credentials not configured for audit log rotation")
+            return {"status": "error", "reason": "credentials_missing"}
+        
+        result = archive_cold_partitions(supabase)
         
         logger.info("Audit log rotation completed", extra={
-            "cutoff_date": cutoff_date.isoformat(),
-            "archived_at": datetime.utcnow().isoformat()
+            "cutoff_date": result["cutoff"],
+            "partitions_archived": len(result["archived"])
         })
         
         return {
             "status": "success",
+            **result,
             "archived_at": datetime.utcnow().isoformat()
         }
         
@@ -253,6 +330,57 @@ def rotate_audit_logs(self):
         return {"status": "error", "error": str(exc)}
 
 
+@celery_app.task(bind=True)
+def flush_usage_counters(self):
+    """
+    Persist Redis usage counters to Mongo usage_daily.
+    Runs every minute.
+    """
+    try:
+        from services.usage_meter import get_usage_meter
+        
+        flushed = get_usage_meter().flush()
+        
+        return {
+            "status": "success",
+            "counters_flushed": flushed,
+            "flushed_at": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as exc:
+        logger.error(f"Usage counter flush failed: {exc}")
+        return {"status": "error", "error": str(exc)}
+
+
+@celery_app.task(bind=True)
+def reconcile_job_card_counters(self):
+    """
+    Rebuild materialized job card counters from job_cards.
+    Safety net for the trigger-maintained counters; runs nightly.
+    """
+    try:
+        from services.job_card_manager import JobCardManager
+        
+        supabase = _supabase_client()
+        if supabase is None:
+            logger.error("Supabase credentials not configured for counter reconciliation")
+            return {"status": "error", "reason": "credentials_missing"}
+        
+        success, result = JobCardManager(supabase).reconcile_counters()
+        if not success:
+            return {"status": "error", "error": result.get("error")}
+        
+        return {
+            "status": "success",
+            "rows": result["rows"],
+            "reconciled_at": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as exc:
+        logger.error(f"Job card counter reconciliation failed: {exc}")
+        return {"status": "error", "error": str(exc)}
+
+
 @celery_app.task(bind=True)
 def send_job_card_reminder(self, job_card_id: str, reminder_type: str):
     """
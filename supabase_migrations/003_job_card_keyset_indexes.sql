@@ -0,0 +1,15 @@
+-- ============================================================================
+-- EKA-AI Platform: Job Card List Indexes
+-- ============================================================================
+-- Supports keyset pagination on (created_at, id) within a workshop, with and
+-- without a status filter. Run in Supabase SQL Editor.
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_job_cards_workshop_created
+    ON job_cards(workshop_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_job_cards_workshop_status_created
+    ON job_cards(workshop_id, status, created_at DESC, id DESC);
+
+-- Keep planner statistics fresh so count=planned totals stay close
+ANALYZE job_cards;
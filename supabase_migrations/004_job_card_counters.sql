@@ -0,0 +1,95 @@
+-- ============================================================================
+-- EKA-AI Platform: Materialized Per-Workshop Job Card Counters
+-- ============================================================================
+-- One row per (workshop, status). Maintained by a trigger in the same
+-- transaction as every job card insert, status change and delete, so the
+-- counters can never drift from committed data. reconcile_job_card_counters()
+-- rebuilds them from job_cards (run by the nightly Celery task).
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS job_card_counters (
+    workshop_id UUID NOT NULL,
+    status TEXT NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (workshop_id, status)
+);
+
+-- ============================================================================
+-- 1. ATOMIC ADJUSTMENT
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION adjust_job_card_counter(
+    p_workshop_id UUID,
+    p_status TEXT,
+    p_delta BIGINT
+)
+RETURNS VOID AS $$
+BEGIN
+    IF p_workshop_id IS NULL OR p_status IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO job_card_counters (workshop_id, status, count, updated_at)
+    VALUES (p_workshop_id, p_status, GREATEST(p_delta, 0), NOW())
+    ON CONFLICT (workshop_id, status)
+    DO UPDATE SET count = GREATEST(job_card_counters.count + p_delta, 0),
+                  updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_job_card_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM adjust_job_card_counter(OLD.workshop_id, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM adjust_job_card_counter(NEW.workshop_id, NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS job_card_counters_insert_delete ON job_cards;
+CREATE TRIGGER job_card_counters_insert_delete
+    AFTER INSERT OR DELETE ON job_cards
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_job_card_counters();
+
+DROP TRIGGER IF EXISTS job_card_counters_status_change ON job_cards;
+CREATE TRIGGER job_card_counters_status_change
+    AFTER UPDATE OF status, workshop_id ON job_cards
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.workshop_id IS DISTINCT FROM NEW.workshop_id)
+    EXECUTE FUNCTION maintain_job_card_counters();
+
+-- ============================================================================
+-- 2. RECONCILIATION
+-- ============================================================================
+
+-- Rebuilds counters for one workshop (or all when NULL). The EXCLUSIVE lock
+-- makes concurrent job card writes wait, so none are lost or double counted.
+CREATE OR REPLACE FUNCTION reconcile_job_card_counters(p_workshop_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    LOCK TABLE job_card_counters IN EXCLUSIVE MODE;
+
+    DELETE FROM job_card_counters
+    WHERE p_workshop_id IS NULL OR workshop_id = p_workshop_id;
+
+    INSERT INTO job_card_counters (workshop_id, status, count, updated_at)
+    SELECT workshop_id, status, COUNT(*), NOW()
+    FROM job_cards
+    WHERE workshop_id IS NOT NULL
+      AND (p_workshop_id IS NULL OR workshop_id = p_workshop_id)
+    GROUP BY workshop_id, status;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Initial fill
+SELECT reconcile_job_card_counters();
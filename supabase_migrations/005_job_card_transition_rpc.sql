@@ -0,0 +1,72 @@
+-- ============================================================================
+-- EKA-AI Platform: Atomic Job Card State Transitions
+-- ============================================================================
+-- transition_job_cards() moves one or many cards to a target status in a
+-- single statement: each card is updated only if it is still in the status
+-- the caller validated against (no lost updates), and the history and audit
+-- rows are written in the same transaction. Cards whose status changed in
+-- the meantime are simply absent from the result.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION transition_job_cards(
+    p_workshop_id UUID,
+    p_items JSONB,              -- [{"id": "<uuid>", "expected": "<current status>"}, ...]
+    p_target_status TEXT,
+    p_updated_by UUID DEFAULT NULL,
+    p_notes TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_log_history BOOLEAN;
+    v_rows JSONB;
+BEGIN
+    -- schema_complete.sql installs a trigger that already writes job_card_states
+    SELECT NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgrelid = 'job_cards'::regclass
+          AND tgname = 'job_card_state_change'
+          AND NOT tgisinternal
+    ) INTO v_log_history;
+
+    WITH items AS (
+        SELECT (item->>'id')::UUID AS id, item->>'expected' AS expected
+        FROM jsonb_array_elements(p_items) AS item
+    ),
+    updated AS (
+        UPDATE job_cards jc
+        SET status = p_target_status,
+            updated_at = NOW(),
+            updated_by = p_updated_by,
+            status_notes = p_notes,
+            sent_for_approval_at = CASE WHEN p_target_status = 'CUSTOMER_APPROVAL'
+                                        THEN NOW() ELSE jc.sent_for_approval_at END,
+            started_at = CASE WHEN p_target_status = 'IN_PROGRESS'
+                              THEN NOW() ELSE jc.started_at END,
+            closed_at = CASE WHEN p_target_status = 'CLOSED'
+                             THEN NOW() ELSE jc.closed_at END
+        FROM items
+        WHERE jc.id = items.id
+          AND jc.workshop_id = p_workshop_id
+          AND jc.status = items.expected
+        RETURNING jc.id, jc.workshop_id, items.expected AS previous_status, to_jsonb(jc) AS job_card
+    ),
+    history AS (
+        INSERT INTO job_card_states (job_card_id, previous_status, new_status, changed_by, notes)
+        SELECT id, previous_status, p_target_status, p_updated_by, p_notes
+        FROM updated
+        WHERE v_log_history
+    ),
+    audit AS (
+        INSERT INTO audit_logs (workshop_id, user_id, action, entity_type, entity_id, old_values, new_values)
+        SELECT workshop_id, p_updated_by, 'STATE_TRANSITION', 'JOB_CARD', id,
+               jsonb_build_object('status', previous_status),
+               jsonb_build_object('status', p_target_status, 'notes', p_notes)
+        FROM updated
+    )
+    SELECT COALESCE(jsonb_agg(job_card || jsonb_build_object('previous_status', previous_status)), '[]'::jsonb)
+    INTO v_rows
+    FROM updated;
+
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,157 @@
+-- ============================================================================
+-- EKA-AI Platform: Monthly Partitioned Audit Logs
+-- ============================================================================
+-- audit_logs becomes a range-partitioned table (one partition per month of
+-- created_at) so inserts and recent-history queries only touch small, hot
+-- partitions. Cold months are exported to the audit archive by the
+-- rotate_audit_logs Celery task and then detached and dropped.
+-- ============================================================================
+
+-- ============================================================================
+-- 1. PARTITIONED TABLE
+-- ============================================================================
+
+DO $$
+BEGIN
+    -- Only a plain (not yet partitioned) table is moved aside
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'audit_logs' AND relkind = 'r') THEN
+        ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned;
+        -- Its indexes keep their names through the rename; free them so the
+        -- partitioned table below gets its own instead of a silent no-op
+        DROP INDEX IF EXISTS idx_audit_logs_workshop, idx_audit_logs_entity, idx_audit_logs_created;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS audit_logs (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    workshop_id UUID REFERENCES workshops(id),
+    user_id UUID REFERENCES user_profiles(user_id),
+    action TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    entity_id UUID,
+    old_values JSONB,
+    new_values JSONB,
+    ip_address TEXT,
+    user_agent TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Rows outside every monthly partition (e.g. late replays of old events)
+CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_audit_logs_workshop_created ON audit_logs (workshop_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_entity ON audit_logs (entity_type, entity_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_user_created ON audit_logs (user_id, created_at DESC);
+
+ALTER TABLE audit_logs ENABLE ROW LEVEL SECURITY;
+
+-- The old table's policy is dropped with it in section 3; recreate it here
+DO $$
+BEGIN
+    IF to_regproc('get_user_workshop_ids') IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM pg_policies
+        WHERE tablename = 'audit_logs' AND policyname = 'Workshop isolation - audit_logs'
+    ) THEN
+        CREATE POLICY "Workshop isolation - audit_logs" ON audit_logs
+            FOR ALL TO authenticated
+            USING (workshop_id IN (SELECT get_user_workshop_ids()));
+    END IF;
+END $$;
+
+-- ============================================================================
+-- 2. PARTITION MAINTENANCE
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION audit_partition_name(p_month DATE)
+RETURNS TEXT AS $$
+    SELECT 'audit_logs_' || to_char(p_month, '"y"YYYY"m"MM');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Creates monthly partitions from p_from through p_months_ahead months from now
+CREATE OR REPLACE FUNCTION ensure_audit_partitions(
+    p_months_ahead INTEGER DEFAULT 2,
+    p_from DATE DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_month DATE := date_trunc('month', COALESCE(p_from, NOW()))::DATE;
+    v_last DATE := (date_trunc('month', NOW()) + make_interval(months => p_months_ahead))::DATE;
+    v_created INTEGER := 0;
+BEGIN
+    WHILE v_month <= v_last LOOP
+        IF to_regclass(audit_partition_name(v_month)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                audit_partition_name(v_month), v_month, (v_month + INTERVAL '1 month')::DATE
+            );
+            v_created := v_created + 1;
+        END IF;
+        v_month := (v_month + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Monthly partitions whose whole range ends on or before p_before
+CREATE OR REPLACE FUNCTION cold_audit_partitions(p_before DATE)
+RETURNS TABLE(partition_name TEXT, month_start DATE, month_end DATE) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT c.relname::TEXT,
+           to_date(substring(c.relname FROM 'y(\d{4})m(\d{2})$'), 'YYYYMM'),
+           (to_date(substring(c.relname FROM 'y(\d{4})m(\d{2})$'), 'YYYYMM') + INTERVAL '1 month')::DATE
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'audit_logs'::regclass
+      AND c.relname ~ '^audit_logs_y\d{4}m\d{2}$'
+      AND (to_date(substring(c.relname FROM 'y(\d{4})m(\d{2})$'), 'YYYYMM') + INTERVAL '1 month')::DATE <= p_before
+    ORDER BY 2;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach and drop an archived monthly partition; refuses if the row count
+-- differs from what the archive holds
+CREATE OR REPLACE FUNCTION detach_audit_partition(p_name TEXT, p_expected_rows BIGINT)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_rows BIGINT;
+BEGIN
+    IF p_name !~ '^audit_logs_y\d{4}m\d{2}$' THEN
+        RAISE EXCEPTION 'Not an audit partition: %', p_name;
+    END IF;
+
+    EXECUTE format('SELECT COUNT(*) FROM %I', p_name) INTO v_rows;
+    IF v_rows <> p_expected_rows THEN
+        RAISE EXCEPTION 'Partition % has % rows, archive has %', p_name, v_rows, p_expected_rows;
+    END IF;
+
+    EXECUTE format('ALTER TABLE audit_logs DETACH PARTITION %I', p_name);
+    EXECUTE format('DROP TABLE %I', p_name);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- 3. MIGRATE EXISTING ROWS
+-- ============================================================================
+
+DO $$
+DECLARE
+    v_oldest TIMESTAMPTZ;
+BEGIN
+    IF to_regclass('audit_logs_unpartitioned') IS NOT NULL THEN
+        SELECT MIN(created_at) INTO v_oldest FROM audit_logs_unpartitioned;
+        PERFORM ensure_audit_partitions(2, COALESCE(v_oldest, NOW())::DATE);
+
+        INSERT INTO audit_logs (id, workshop_id, user_id, action, entity_type, entity_id,
+                                old_values, new_values, ip_address, user_agent, created_at)
+        SELECT id, workshop_id, user_id, action, entity_type, entity_id,
+               old_values, new_values, ip_address::TEXT, user_agent, COALESCE(created_at, NOW())
+        FROM audit_logs_unpartitioned;
+
+        DROP TABLE audit_logs_unpartitioned;
+    ELSE
+        PERFORM ensure_audit_partitions(2);
+    END IF;
+END $$;
@@ -0,0 +1,26 @@
+-- ============================================================================
+-- EKA-AI Platform: Hashed Approval Tokens
+-- ============================================================================
+-- Customer approval links carry a random token; only its SHA-256 hex digest
+-- is stored. The public lookup is a single probe of a unique partial index
+-- with expiry checked in the same query. Run in Supabase SQL Editor.
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+ALTER TABLE job_cards ADD COLUMN IF NOT EXISTS approval_token_hash TEXT;
+
+-- Hash tokens issued before this migration and drop the plaintext copies.
+-- Links without an expiry get one week from now.
+UPDATE job_cards
+SET approval_token_hash = encode(digest(approval_token, 'sha256'), 'hex'),
+    approval_expires_at = COALESCE(approval_expires_at, NOW() + INTERVAL '7 days'),
+    approval_token = NULL
+WHERE approval_token IS NOT NULL;
+
+DROP INDEX IF EXISTS idx_job_cards_approval_token;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_job_cards_approval_token_hash
+    ON job_cards(approval_token_hash)
+    INCLUDE (approval_expires_at)
+    WHERE approval_token_hash IS NOT NULL;
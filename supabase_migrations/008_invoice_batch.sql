@@ -0,0 +1,97 @@
+-- ============================================================================
+-- EKA-AI Platform: Invoice Number Blocks and Batch Invoice Creation
+-- ============================================================================
+-- allocate_invoice_numbers() reserves a contiguous block of invoice numbers
+-- for a workshop with one upsert on invoice_sequences (row-locked, so
+-- concurrent callers never share a number). create_invoices_batch() uses it
+-- to create many invoices, all their items and their audit rows in a single
+-- transaction: one statement per table instead of one round trip per row.
+-- ============================================================================
+
+-- Returns the first number of a block of p_count numbers. The sequence
+-- restarts at 1 when the fiscal year changes.
+CREATE OR REPLACE FUNCTION allocate_invoice_numbers(
+    p_workshop_id UUID,
+    p_fiscal_year TEXT,
+    p_count INTEGER DEFAULT 1,
+    p_prefix TEXT DEFAULT 'INV'
+)
+RETURNS INTEGER AS $$
+    INSERT INTO invoice_sequences AS s (workshop_id, fiscal_year, last_number, prefix, updated_at)
+    VALUES (p_workshop_id, p_fiscal_year, p_count, p_prefix, NOW())
+    ON CONFLICT (workshop_id) DO UPDATE
+    SET last_number = CASE WHEN s.fiscal_year = EXCLUDED.fiscal_year
+                           THEN s.last_number + p_count
+                           ELSE p_count END,
+        fiscal_year = EXCLUDED.fiscal_year,
+        updated_at = NOW()
+    RETURNING last_number - p_count + 1;
+$$ LANGUAGE sql;
+
+-- PREFIX-YYYY-NNNNN, widening past 99999 instead of truncating
+CREATE OR REPLACE FUNCTION format_invoice_number(p_prefix TEXT, p_fiscal_year TEXT, p_number INTEGER)
+RETURNS TEXT AS $$
+    SELECT p_prefix || '-' || p_fiscal_year || '-'
+           || lpad(p_number::TEXT, GREATEST(5, length(p_number::TEXT)), '0');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION create_invoices_batch(
+    p_workshop_id UUID,
+    p_fiscal_year TEXT,
+    p_prefix TEXT,
+    p_invoices JSONB,           -- [{<invoices columns>, "items": [{<invoice_items columns>}, ...]}, ...]
+    p_generated_by UUID DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_count INTEGER := jsonb_array_length(p_invoices);
+    v_first INTEGER;
+    v_rows JSONB;
+BEGIN
+    IF v_count = 0 THEN
+        RETURN '[]'::jsonb;
+    END IF;
+
+    v_first := allocate_invoice_numbers(p_workshop_id, p_fiscal_year, v_count, p_prefix);
+
+    WITH source AS (
+        SELECT s.invoice, s.ord, r.*
+        FROM jsonb_array_elements(p_invoices) WITH ORDINALITY AS s(invoice, ord),
+             jsonb_populate_record(NULL::invoices, s.invoice) AS r
+    ),
+    inserted AS (
+        INSERT INTO invoices (id, job_card_id, workshop_id, invoice_number, customer_gstin,
+                              customer_name, customer_address, tax_type, total_taxable_value,
+                              total_tax_amount, grand_total, status, due_date, generated_at,
+                              generated_by, notes)
+        SELECT id, job_card_id, p_workshop_id,
+               format_invoice_number(p_prefix, p_fiscal_year, v_first + ord::INTEGER - 1),
+               customer_gstin, customer_name, customer_address, tax_type, total_taxable_value,
+               total_tax_amount, grand_total, COALESCE(status, 'DRAFT'), due_date,
+               COALESCE(generated_at, NOW()), p_generated_by, notes
+        FROM source
+        RETURNING id, invoice_number, grand_total
+    ),
+    items AS (
+        INSERT INTO invoice_items (id, invoice_id, item_type, description, hsn_sac_code, quantity,
+                                   unit_price, taxable_value, gst_rate, tax_amount, total_amount,
+                                   discount_amount)
+        SELECT COALESCE(i.id, gen_random_uuid()), source.id, i.item_type, i.description,
+               i.hsn_sac_code, i.quantity, i.unit_price, i.taxable_value, i.gst_rate,
+               i.tax_amount, i.total_amount, COALESCE(i.discount_amount, 0)
+        FROM source,
+             jsonb_populate_recordset(NULL::invoice_items, source.invoice->'items') AS i
+    ),
+    audit AS (
+        INSERT INTO audit_logs (workshop_id, user_id, action, entity_type, entity_id, new_values)
+        SELECT p_workshop_id, p_generated_by, 'CREATE_INVOICE', 'INVOICE', id,
+               jsonb_build_object('invoice_number', invoice_number, 'amount', grand_total, 'batch', TRUE)
+        FROM inserted
+    )
+    SELECT jsonb_agg(jsonb_build_object('id', id, 'invoice_number', invoice_number))
+    INTO v_rows
+    FROM inserted;
+
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,14 @@
+-- ============================================================================
+-- EKA-AI Platform: Unique Invoice Numbers
+-- ============================================================================
+-- Invoice numbers now come from allocate_invoice_numbers() (migration 008),
+-- which cannot hand out the same number twice. This index makes the database
+-- reject any duplicate regardless of the writer. The old select-then-update
+-- allocator could race, so check for existing duplicates first:
+--
+--   SELECT workshop_id, invoice_number, COUNT(*)
+--   FROM invoices GROUP BY 1, 2 HAVING COUNT(*) > 1;
+-- ============================================================================
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_invoices_workshop_invoice_number
+    ON invoices(workshop_id, invoice_number);